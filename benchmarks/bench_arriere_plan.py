@@ -0,0 +1,47 @@
+"""
+Banc d'essai des salles en arrière plan.
+
+Le menu est affiché pendant que la salle "jeu", remplie d'ennemis et de
+boules, reste active en arrière plan. On compare le temps par frame :
+- sans salle en arrière plan (l'ancien fonctionnement, "jeu" est figée)
+- avec "jeu" actualisée à chaque pas, puis par paquets de 2 et de 4 pas
+- dans le fil principal, puis sur le fil du travailleur
+
+Utilisation : python benchmarks/bench_arriere_plan.py --frames 300 --ennemis 300
+"""
+import argparse, time
+
+import commun
+from jeu import Jeu, Reglages
+from bench_jeu import peupler, centile
+
+
+def mesurer(frames, ennemis, periode, fil):
+    salles_en_fond = None if periode is None else {"jeu" : periode}
+    jeu = Jeu(Reglages(
+        sans_tete=True, dt_fixe=1, graine=0, script_entrees=lambda frame: None,
+        salles_en_fond=salles_en_fond, fil_arriere_plan=fil
+    ))
+    durees = []
+    for _ in range(frames):
+        peupler(jeu, ennemis, ennemis)
+        debut = time.perf_counter()
+        jeu.frame()
+        durees.append(time.perf_counter() - debut)
+    return centile(durees, 50) * 1e3, centile(durees, 99) * 1e3
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Temps par frame avec une salle en arrière plan")
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--ennemis", type=int, default=300, help="ennemis et boules de la salle en arrière plan")
+    arguments = parser.parse_args()
+    frames, ennemis = arguments.frames, arguments.ennemis
+    print(f"{'arrière plan':>22} | {'p50 (ms)':>8} | {'p99 (ms)':>8}")
+    p50, p99 = mesurer(frames, ennemis, None, False)
+    print(f"{'aucun':>22} | {p50:>8.3f} | {p99:>8.3f}")
+    for fil in (False, True):
+        for periode in (1, 2, 4):
+            p50, p99 = mesurer(frames, ennemis, periode, fil)
+            nom = f"{periode} pas / {periode}, " + ("travailleur" if fil else "principal")
+            print(f"{nom:>22} | {p50:>8.3f} | {p99:>8.3f}")
@@ -0,0 +1,140 @@
+"""
+Banc d'essai de la boucle asyncio (Jeu.boucle_async).
+
+Compare la régularité des frames (écart entre deux débuts de frame) avec :
+- boucle : la boucle classique, limitée par pygame.time.Clock
+- async : boucle_async sans autre tâche
+- async + tâches : boucle_async avec une tâche de calcul découpée en
+  morceaux (qui cède entre chaque, voir Ordonnanceur.ceder) et une tâche
+  qui réveille très souvent (comme une tâche d'entrées/sorties), le
+  travail de chacune étant compté
+
+On vérifie d'abord que sans limite de FPS (jeu sans tête), une tâche qui
+cède avance bien d'un morceau à chaque frame.
+
+Le jeu tourne sans écran dans la salle "jeu", mais limité à --fps images
+par seconde comme à l'écran. Une frame est comptée comme sautée si elle
+commence plus d'une frame et demie après la précédente.
+
+Utilisation : python benchmarks/bench_async.py --frames 600 --fps 60 --morceau 0.5
+"""
+import argparse, asyncio, time
+
+import commun
+from jeu import Jeu, Reglages
+from moteur import Ordonnanceur
+from bench_jeu import centile
+
+
+class Fin(Exception):
+    pass
+
+
+class HorlogeLimitee:
+    """
+    Sans écran, Jeu ne limite pas les FPS : cette horloge les limite
+    quand même, pour la boucle classique.
+    """
+    def __init__(self, horloge, fps):
+        self.horloge = horloge
+        self.fps = fps
+
+    def tick(self, fps=0):
+        return self.horloge.tick(self.fps)
+
+
+class JeuMesure(Jeu):
+    """
+    Jeu qui note le début de chaque frame, et s'arrête au bout de frames.
+    Il est limité à fps images par seconde comme à l'écran.
+    """
+    def __init__(self, frames, fps):
+        super().__init__(Reglages(sans_tete=True, dt_fixe=1, graine=0, script_entrees=lambda frame: None, fps_max=fps))
+        self.horloge = HorlogeLimitee(self.horloge, fps)
+        self.ordonnanceur = Ordonnanceur(fps)
+        self.scene.changer_salle("jeu")
+        self.frames = frames
+        self.debuts = []
+
+    def frame(self):
+        if len(self.debuts) == self.frames:
+            raise Fin
+        self.debuts.append(time.perf_counter())
+        super().frame()
+
+
+async def calcul(jeu, morceau, compteur):
+    """
+    Calcule sans fin par morceaux de morceau secondes.
+    """
+    while True:
+        fin = time.perf_counter() + morceau
+        while time.perf_counter() < fin:
+            pass
+        compteur["calcul"] += 1
+        await jeu.ordonnanceur.ceder()
+
+
+async def reveils(compteur):
+    while True:
+        await asyncio.sleep(0.001)
+        compteur["reveils"] += 1
+
+
+def sans_limite(frames):
+    """
+    Nombre de morceaux de calcul faits pendant frames frames sans limite de
+    FPS (l'ordonnanceur n'a alors pas d'échéance).
+    """
+    jeu = JeuMesure(frames, None)
+    jeu.horloge = jeu.horloge.horloge
+    compteur = {"calcul" : 0}
+    try:
+        asyncio.run(jeu.boucle_async(calcul(jeu, 0, compteur)))
+    except Fin:
+        pass
+    return compteur["calcul"]
+
+
+def mesurer(frames, fps, mode, morceau):
+    jeu = JeuMesure(frames, fps)
+    if mode != "boucle":
+        # C'est l'ordonnanceur qui limite les FPS
+        jeu.horloge = jeu.horloge.horloge
+    compteur = {"calcul" : 0, "reveils" : 0}
+    try:
+        if mode == "boucle":
+            jeu.boucle()
+        elif mode == "async":
+            asyncio.run(jeu.boucle_async())
+        else:
+            asyncio.run(jeu.boucle_async(calcul(jeu, morceau, compteur), reveils(compteur)))
+    except Fin:
+        pass
+    ecarts = [b - a for a, b in zip(jeu.debuts, jeu.debuts[1:])]
+    sautees = sum(1 for ecart in ecarts if ecart > 1.5 / fps)
+    duree = jeu.debuts[-1] - jeu.debuts[0]
+    return ecarts, sautees, duree, compteur
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Régularité des frames avec boucle_async")
+    parser.add_argument("--frames", type=int, default=600)
+    parser.add_argument("--fps", type=int, default=60)
+    parser.add_argument("--morceau", type=float, default=0.5, help="durée d'un morceau de calcul, en ms")
+    arguments = parser.parse_args()
+
+    morceaux = sans_limite(arguments.frames)
+    print(f"sans limite de FPS : {morceaux} morceaux de calcul en {arguments.frames} frames")
+    assert morceaux >= arguments.frames - 1, "les tâches n'avancent pas à chaque frame"
+
+    print(f"{'':>15} | {'FPS':>6} | {'écart p50':>9} | {'écart p99':>9} | {'max':>6} | {'sautées':>7} | travail des tâches")
+    for mode in ("boucle", "async", "async + tâches"):
+        ecarts, sautees, duree, compteur = mesurer(arguments.frames, arguments.fps, mode, arguments.morceau / 1000)
+        travail = ""
+        if mode == "async + tâches":
+            travail = f"{compteur['calcul'] / duree:.0f} morceaux/s, {compteur['reveils'] / duree:.0f} réveils/s"
+        print(
+            f"{mode:>15} | {len(ecarts) / duree:>6.1f} | {centile(ecarts, 50) * 1e3:>9.2f} | "
+            f"{centile(ecarts, 99) * 1e3:>9.2f} | {max(ecarts) * 1e3:>6.2f} | {sautees:>7} | {travail}"
+        )
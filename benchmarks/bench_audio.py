@@ -0,0 +1,85 @@
+"""
+Banc d'essai du son.
+
+Compare l'ancienne gestion du son (2000 canaux, musique du menu décodée en
+entier dans un Sound, lasers joués sur un canal au hasard) au Mixeur (8
+voix, musique lue en continu). On joue 3 secondes de "partie" avec un laser
+toutes les 5 frames, puis on affiche le temps processeur de la partie, 
+celui du chargement (l'ancienne musique est décodée d'avance), le pic de
+mémoire (RSS) et les statistiques du mixeur. Le Mixeur est réglé comme 
+dans Jeu (voir Mixeur.preparer).
+
+Chaque mesure est faite dans un nouveau processus. Le pilote audio "disk"
+de SDL (qui écrit dans /dev/null) fait vraiment travailler le mixeur, sans
+carte son.
+
+Utilisation : python benchmarks/bench_audio.py --frames 180
+"""
+import argparse, os, sys, json, subprocess
+
+RACINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+MESURE = """
+import sys, time, json, random, resource
+chargement = time.process_time()
+sys.path.insert(0, ".")
+import pygame
+from moteur import Mixeur, Ressources
+mode, frames = sys.argv[1], int(sys.argv[2])
+if mode != "ancien":
+    Mixeur.preparer()
+pygame.mixer.init()
+if mode == "ancien":
+    pygame.mixer.set_num_channels(2000)
+    pygame.mixer.Channel(0).play(pygame.mixer.Sound("sons/menu.mp3"))
+    laser = pygame.mixer.Sound("sons/laser.mp3")
+else:
+    ressources = Ressources()
+    ressources.son("laser", "sons/laser.mp3")
+    mixeur = Mixeur(ressources)
+    mixeur.limiter("laser", 4)
+    mixeur.musique("menu", "sons/menu.mp3")
+    mixeur.jouer_musique("menu")
+debut = time.process_time()
+chargement = debut - chargement
+for frame in range(frames):
+    if frame % 5 == 0:
+        if mode == "ancien":
+            pygame.mixer.Channel(random.randint(10, 1000)).play(laser)
+        else:
+            mixeur.jouer("laser")
+    time.sleep(1 / 60)
+resultats = {
+    "cpu" : (time.process_time() - debut) * 1e3,
+    "chargement" : chargement * 1e3,
+    "rss" : resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 2 ** 10
+}
+if mode != "ancien":
+    resultats["mixeur"] = mixeur.statistiques()
+print(json.dumps(resultats))
+"""
+
+
+def lancer(mode, frames):
+    environnement = dict(
+        os.environ, SDL_AUDIODRIVER="disk", SDL_DISKAUDIOFILE=os.devnull, PYGAME_HIDE_SUPPORT_PROMPT="1"
+    )
+    sortie = subprocess.run(
+        [sys.executable, "-c", MESURE, mode, str(frames)], cwd=RACINE, env=environnement,
+        capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(sortie.strip().splitlines()[-1])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ancienne gestion du son contre Mixeur")
+    parser.add_argument("--frames", type=int, default=180)
+    frames = parser.parse_args().frames
+    for mode in ("ancien", "mixeur"):
+        resultats = lancer(mode, frames)
+        print(
+            f"{mode:>7} | cpu {resultats['cpu']:.1f} ms | chargement {resultats['chargement']:.1f} ms | "
+            f"pic RSS {resultats['rss']:.1f} Mo"
+        )
+        if "mixeur" in resultats:
+            print(f"        | {resultats['mixeur']}")
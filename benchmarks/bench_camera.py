@@ -0,0 +1,62 @@
+"""
+Banc d'essai de la caméra.
+
+Joue les vagues de niveaux/stress.json sans écran (le joueur étant mis à
+l'écart), et compare :
+- sans caméra : tout est dessiné et entièrement actualisé
+- avec la caméra : les entitées hors de l'ecran ne sont pas dessinées
+- avec la caméra et une marge d'actualisation : les ennemis loin de
+  l'ecran ne font plus qu'avancer
+
+Affiche les temps de frame (p50, p99) et, en moyenne par frame, le nombre
+d'entitées dessinées, écartées du dessin et actualisées sommairement.
+
+Utilisation : python benchmarks/bench_camera.py --frames 1200 --marge 300
+"""
+import argparse, time
+
+import commun
+from jeu import Jeu, Reglages
+from objets import *
+from bench_jeu import centile
+
+
+def lancer(frames, camera, marge_actualisation=None):
+    jeu = Jeu(Reglages(
+        sans_tete=True, dt_fixe=1, graine=0, script_entrees=lambda frame: None,
+        fichier_vagues="niveaux/stress.json", marge_actualisation=marge_actualisation
+    ))
+    if not camera:
+        del jeu.scene.cameras["jeu"]
+    jeu.scene.changer_salle("jeu")
+    # Le joueur est mis à l'écart pour que les ennemis ne terminent pas la partie
+    joueur = next(o for o in jeu.scene.salles["jeu"] if isinstance(o, Joueur))
+    joueur.x = -5000
+    durees = []
+    totaux = {"dessinees" : 0, "ecartees" : 0, "loin" : 0}
+    for _ in range(frames):
+        debut = time.perf_counter()
+        jeu.frame()
+        durees.append(time.perf_counter() - debut)
+        if camera:
+            for cle, valeur in jeu.scene.camera.statistiques().items():
+                totaux[cle] += valeur
+    moyennes = {cle : total / frames for cle, total in totaux.items()}
+    return centile(durees, 50) * 1e3, centile(durees, 99) * 1e3, moyennes
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Temps par frame avec et sans caméra")
+    parser.add_argument("--frames", type=int, default=1200)
+    parser.add_argument("--marge", type=int, default=300, help="marge d'actualisation de la caméra")
+    arguments = parser.parse_args()
+    frames, marge = arguments.frames, arguments.marge
+    print(f"{'':>22} | {'p50 (ms)':>8} | {'p99 (ms)':>8} | {'dessinées':>9} | {'écartées':>8} | {'loin':>6}")
+    for nom, camera, marge_actualisation in (
+        ("sans caméra", False, None), ("caméra", True, None), (f"caméra, marge {marge}", True, marge)
+    ):
+        p50, p99, moyennes = lancer(frames, camera, marge_actualisation)
+        print(
+            f"{nom:>22} | {p50:>8.3f} | {p99:>8.3f} | {moyennes['dessinees']:>9.1f} | "
+            f"{moyennes['ecartees']:>8.1f} | {moyennes['loin']:>6.1f}"
+        )
@@ -0,0 +1,55 @@
+"""
+Banc d'essai des collisions au pixel près.
+
+Place N ennemis et N boules, au hasard, dans une zone assez petite pour que
+beaucoup de rectangles se chevauchent, puis teste toutes les paires
+(boule, ennemi) que donne la grille de la scène :
+- avec les rectangles seulement
+- avec Objet.touche : les rectangles d'abord, puis les silhouettes
+
+Affiche le nombre de paires testées, de rectangles qui se touchent, de 
+contacts au pixel près, et le temps par passe.
+
+Utilisation : python benchmarks/bench_collisions.py --nombre 300 --repetitions 20
+"""
+import argparse, time, random
+
+from commun import JeuBanc
+from moteur import *
+from objets import *
+
+
+def construire(nombre):
+    random.seed(0)
+    jeu = JeuBanc()
+    scene = Scene(jeu)
+    scene.nouvelle_salle("jeu")
+    scene.changer_salle("jeu")
+    for i in range(nombre):
+        direction = "gauche" if i % 2 else "droite"
+        scene.lier(Ennemi1(jeu, (random.uniform(0, 1280), random.uniform(300, 700)), direction))
+        scene.lier(Boule(jeu, (random.uniform(0, 1280), random.uniform(0, 600)), (0, 1)))
+    scene.grille.reconstruire(scene.salles["jeu"])
+    return scene
+
+
+def mesurer(paires, test, repetitions):
+    debut = time.perf_counter()
+    for _ in range(repetitions):
+        touches = sum(1 for boule, ennemi in paires if test(boule, ennemi))
+    return touches, (time.perf_counter() - debut) / repetitions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Collisions aux rectangles contre collisions au pixel")
+    parser.add_argument("--nombre", type=int, default=300, help="nombre d'ennemis, et de boules")
+    parser.add_argument("--repetitions", type=int, default=20)
+    arguments = parser.parse_args()
+    nombre, repetitions = arguments.nombre, arguments.repetitions
+    scene = construire(nombre)
+    paires = scene.grille.paires("boule", "ennemi1")
+    rectangles, duree_rectangles = mesurer(paires, lambda a, b: a.rectangle.colliderect(b.rectangle), repetitions)
+    pixels, duree_pixels = mesurer(paires, lambda a, b: a.touche(b), repetitions)
+    print(f"{nombre} ennemis et {nombre} boules, {len(paires)} paires proches")
+    print(f"rectangles : {rectangles:>6} contacts | {duree_rectangles * 1e3:.3f} ms")
+    print(f"pixels     : {pixels:>6} contacts | {duree_pixels * 1e3:.3f} ms")
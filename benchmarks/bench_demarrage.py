@@ -0,0 +1,62 @@
+"""
+Banc d'essai du démarrage du jeu.
+
+Mesure le temps jusqu'à la première frame (création de Jeu puis une frame,
+en mode sans tête), et le temps pour que toutes les ressources soient
+chargées :
+- à froid : le cache disque des images est vide
+- à chaud : le cache a été rempli par le lancement précédent
+- sans cache disque
+
+Chaque mesure est faite dans un nouveau processus, pour que rien ne reste
+en mémoire d'un lancement à l'autre.
+
+Utilisation : python benchmarks/bench_demarrage.py --lancements 5
+"""
+import argparse, os, sys, json, shutil, statistics, subprocess, tempfile
+
+RACINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+MESURE = """
+import os, sys, time, json
+os.environ["PYGAME_HIDE_SUPPORT_PROMPT"] = "1"
+sys.path.insert(0, ".")
+from jeu import Jeu, Reglages
+debut = time.perf_counter()
+jeu = Jeu(Reglages(sans_tete=True, dt_fixe=1, script_entrees=lambda frame: None, cache_ressources=sys.argv[1] or None))
+jeu.frame()
+premiere_frame = time.perf_counter() - debut
+jeu.ressources.attendre()
+tout = time.perf_counter() - debut
+print(json.dumps({"premiere_frame" : premiere_frame * 1e3, "tout" : tout * 1e3}))
+"""
+
+
+def lancer(dossier_cache):
+    sortie = subprocess.run(
+        [sys.executable, "-c", MESURE, dossier_cache or ""], cwd=RACINE,
+        capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(sortie.strip().splitlines()[-1])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Temps de démarrage, avec et sans cache disque")
+    parser.add_argument("--lancements", type=int, default=5)
+    lancements = parser.parse_args().lancements
+    dossier = tempfile.mkdtemp()
+    resultats = {"à froid" : [], "à chaud" : [], "sans cache" : []}
+    try:
+        for _ in range(lancements):
+            shutil.rmtree(dossier, ignore_errors=True)
+            resultats["à froid"].append(lancer(dossier))
+            resultats["à chaud"].append(lancer(dossier))
+            resultats["sans cache"].append(lancer(None))
+    finally:
+        shutil.rmtree(dossier, ignore_errors=True)
+
+    print(f"{'démarrage':>10} | {'1ère frame (ms)':>15} | {'tout chargé (ms)':>16}")
+    for nom, mesures in resultats.items():
+        premiere_frame = statistics.median(mesure["premiere_frame"] for mesure in mesures)
+        tout = statistics.median(mesure["tout"] for mesure in mesures)
+        print(f"{nom:>10} | {premiere_frame:>15.1f} | {tout:>16.1f}")
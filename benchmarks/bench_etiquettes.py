@@ -0,0 +1,47 @@
+"""
+Banc d'essai de l'index d'etiquettes de la Scene.
+
+On remplit la salle "jeu" avec un nombre croissant d'ennemis et on mesure le
+temps moyen d'un Scene.actualiser(). Avec l'ancien filtrer() (qui parcourait
+toute la salle pour chaque ennemi), le temps par ennemi grandissait avec le
+nombre d'ennemis ; avec l'index, il doit rester à peu près constant.
+
+Utilisation : python benchmarks/bench_etiquettes.py --frames 50
+"""
+import argparse, time, random
+
+from commun import JeuBanc
+from moteur import *
+from objets import *
+
+
+def mesurer(nombre_ennemis, frames):
+    random.seed(0)
+    jeu = JeuBanc()
+    scene = Scene(jeu)
+    scene.nouvelle_salle("jeu")
+    scene.changer_salle("jeu")
+    # Le joueur est placé loin des ennemis pour qu'aucun ne le touche
+    scene.lier(Joueur(jeu, (-5000, 550)))
+    for i in range(nombre_ennemis):
+        direction = "gauche" if i % 2 else "droite"
+        scene.lier(Ennemi1(jeu, (random.randint(0, 1280), 695), direction))
+    # Une frame pour que le joueur reçoive son etiquette et son rectangle
+    scene.actualiser()
+
+    debut = time.perf_counter()
+    for _ in range(frames):
+        scene.actualiser()
+        scene.dessiner()
+    duree = (time.perf_counter() - debut) / frames
+    return duree
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Temps d'une actualisation selon le nombre d'ennemis")
+    parser.add_argument("--frames", type=int, default=50)
+    frames = parser.parse_args().frames
+    print(f"{'ennemis':>8} | {'ms / frame':>10} | {'us / ennemi':>11}")
+    for nombre in (10, 100, 1000, 2000, 5000):
+        duree = mesurer(nombre, frames)
+        print(f"{nombre:>8} | {duree * 1e3:>10.3f} | {duree * 1e6 / nombre:>11.3f}")
@@ -0,0 +1,113 @@
+"""
+Banc d'essai du jeu complet, sans ecran.
+
+Lance Jeu en mode sans tête (pilotes SDL "dummy", delta time fixe, graine
+fixe, aucune entrée), passe directement dans la salle "jeu", la remplit
+d'ennemis et de boules puis fait tourner N frames. Les morts sont remplacés
+à chaque frame pour garder des effectifs constants.
+
+Affiche les frames par seconde, les temps de frame médian (p50) et p99, et
+le pic de mémoire.
+
+Avec --profil, le temps de chaque phase de chaque frame est écrit dans un
+fichier (.csv ou .jsonl) et les phases les plus coûteuses sont affichées.
+
+Utilisation :
+    python benchmarks/bench_jeu.py --frames 600 --ennemis 200 --boules 100
+    python benchmarks/bench_jeu.py --profil profil.csv
+"""
+import argparse, math, random, sys, time, tracemalloc
+
+import commun
+from jeu import Jeu, Reglages
+from objets import *
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+def peupler(jeu, ennemis, boules):
+    """
+    Complète la salle "jeu" jusqu'aux effectifs demandés.
+    """
+    scene = jeu.scene
+    for _ in range(ennemis - len(scene.filtrer("ennemi1", "jeu"))):
+        direction = random.choice(("gauche", "droite"))
+        scene.lier(scene.creer(Ennemi1, jeu, (random.randint(0, 1280), random.randint(300, 695)), direction), "jeu")
+    for _ in range(boules - len(scene.filtrer("boule", "jeu"))):
+        angle = random.uniform(math.pi / 2, 3 * math.pi / 2)
+        scene.lier(scene.creer(Boule, jeu, (random.randint(0, 1280), random.randint(0, 500)), (math.cos(angle), math.sin(angle))), "jeu")
+
+
+def centile(valeurs, p):
+    valeurs = sorted(valeurs)
+    return valeurs[min(len(valeurs) - 1, int(len(valeurs) * p / 100))]
+
+
+def lancer(frames, ennemis, boules, graine=0, dt=1, physique=False, suivre_memoire=False, profil=None):
+    jeu = Jeu(Reglages(
+        physique_numpy=physique, sans_tete=True, dt_fixe=dt, graine=graine, 
+        script_entrees=lambda frame: None, fichier_profil=profil
+    ))
+    jeu.scene.changer_salle("jeu")
+    # Le joueur est mis à l'écart pour que les ennemis ne terminent pas la partie
+    # (son etiquette n'est ajoutée qu'à sa première actualisation)
+    joueur = next(o for o in jeu.scene.salles["jeu"] if isinstance(o, Joueur))
+    joueur.x = -5000
+
+    if suivre_memoire:
+        tracemalloc.start()
+    durees = []
+    for _ in range(frames):
+        debut = time.perf_counter()
+        peupler(jeu, ennemis, boules)
+        jeu.frame()
+        durees.append(time.perf_counter() - debut)
+
+    resultats = {
+        "fps" : frames / sum(durees),
+        "p50" : centile(durees, 50) * 1e3,
+        "p99" : centile(durees, 99) * 1e3,
+        "reserves" : jeu.scene.statistiques_reserves(),
+    }
+    if profil is not None:
+        resultats["profil"] = jeu.profileur.statistiques()
+        jeu.profileur.fermer()
+    if suivre_memoire:
+        resultats["memoire_python"] = tracemalloc.get_traced_memory()[1] / 2 ** 20
+        tracemalloc.stop()
+    if resource is not None:
+        # ru_maxrss est en kilo-octets sous Linux
+        resultats["memoire_max"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 2 ** 10
+    return resultats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Banc d'essai du jeu sans ecran")
+    parser.add_argument("--frames", type=int, default=600)
+    parser.add_argument("--ennemis", type=int, default=50)
+    parser.add_argument("--boules", type=int, default=50)
+    parser.add_argument("--graine", type=int, default=0)
+    parser.add_argument("--dt", type=float, default=1)
+    parser.add_argument("--physique", action="store_true", help="active le moteur physique numpy")
+    parser.add_argument("--profil", metavar="FICHIER", help="écrit le temps de chaque phase de chaque frame (.csv ou .jsonl)")
+    parser.add_argument("--tracemalloc", action="store_true", help="mesure aussi le pic d'allocations Python (plus lent)")
+    arguments = parser.parse_args()
+
+    resultats = lancer(
+        arguments.frames, arguments.ennemis, arguments.boules, arguments.graine,
+        arguments.dt, arguments.physique, arguments.tracemalloc, arguments.profil
+    )
+    print(f"frames/s : {resultats['fps']:.1f}")
+    print(f"frame p50 : {resultats['p50']:.3f} ms")
+    print(f"frame p99 : {resultats['p99']:.3f} ms")
+    for classe, statistiques in resultats["reserves"].items():
+        print(f"réserve {classe} : {statistiques}")
+    for phase, duree in resultats.get("profil", {}).items():
+        print(f"{phase:<24} p50 {duree['p50']:.3f} ms | p95 {duree['p95']:.3f} ms | max {duree['max']:.3f} ms")
+    if "memoire_python" in resultats:
+        print(f"pic Python : {resultats['memoire_python']:.1f} Mo")
+    if "memoire_max" in resultats:
+        print(f"pic RSS : {resultats['memoire_max']:.1f} Mo")
@@ -0,0 +1,264 @@
+"""
+Simulations par lots, pour équilibrer le jeu et pour les essais de charge.
+
+Joue des milliers de parties sans écran, chacune avec sa graine, réparties
+sur plusieurs processus (ProcessPoolExecutor). La salle "jeu" est construite
+directement avec la scène, comme dans Jeu, mais avec JeuBanc : pas de
+fenêtre, pas de son, et le dessin ne fait rien. Le joueur est conduit par un
+bot (voir Bot), une partie se termine quand il est touché ou au bout de
+--duree secondes.
+
+Chaque réglage peut prendre plusieurs valeurs, toutes les combinaisons sont
+jouées :
+- --gravite : la gravité des entitées (moteur.GRAVITE)
+- --cadence : un facteur sur la cadence de toutes les vagues
+- --saut : la vitesse d'un saut du joueur (Joueur.SAUT)
+- --vitesse-boule : un facteur sur la vitesse de lancer des boules
+  (Boule.VITESSE)
+
+Pour chaque combinaison, on affiche la distribution du score, le temps de
+survie, le pic d'objets dans la salle et le coût d'un pas de simulation.
+Avec --sortie, une ligne par partie est écrite dans un fichier en colonnes
+(.npz avec numpy, .parquet avec pyarrow, sinon .csv).
+
+Avec --echelle, le même lot est joué avec 1, 2, 4... processus pour vérifier
+que le débit suit le nombre de coeurs.
+
+Utilisation :
+    python benchmarks/bench_lots.py --parties 2000 --cadence 0.5 1 2
+    python benchmarks/bench_lots.py --gravite 1 1.2 1.5 --saut 25 30 --sortie lots.npz
+    python benchmarks/bench_lots.py --parties 200 --echelle
+"""
+import argparse, csv, itertools, math, os, random, time
+from concurrent.futures import ProcessPoolExecutor
+
+import commun
+import pygame
+import moteur, objets
+from moteur import Camera, Scene, Vagues
+from objets import *
+from jeu import TouchesScriptees
+from bench_jeu import centile
+
+# Colonnes du fichier de sortie, une ligne par partie
+COLONNES = (
+    "graine", "gravite", "cadence", "saut", "vitesse_boule",
+    "score", "survie", "perdue", "pic_objets", "pas_moyen", "pas_p99"
+)
+
+
+class JeuLots(commun.JeuBanc):
+    """
+    JeuBanc qui retient la fin de la partie : GestionnaireJeu.perdre lance
+    la transition vers le menu.
+    """
+    def __init__(self):
+        super().__init__()
+        self.dt = 1
+        self.fin = False
+
+    def lancer_transition(self, salle, style="fondu"):
+        if salle == "menu":
+            self.fin = True
+
+
+class Bot:
+    """
+    Conduit le joueur : il s'éloigne de l'ennemi le plus proche, saute
+    quand celui-ci arrive sur lui et tire sur les ennemis à portée, avec un
+    temps de réaction et un peu d'imprécision. Son hasard lui est propre,
+    pour ne pas changer celui du jeu.
+    """
+    PORTEE = 700
+    FUITE = 350
+    DANGER = 180
+
+    def __init__(self, graine, reaction=12, imprecision=40):
+        self.hasard = random.Random(graine)
+        self.reaction = reaction
+        self.imprecision = imprecision
+        self.attente = 0
+
+    def conduire(self, jeu, scene):
+        joueur = scene.trouver("joueur", "jeu")
+        touches = set()
+        jeu.souris_pressee = False
+        ennemis = [ennemi for ennemi in scene.filtrer("ennemi1", "jeu") if not ennemi.mort]
+        # Le joueur n'a son etiquette qu'après son premier pas
+        if joueur is not None and ennemis:
+            proche = min(ennemis, key=lambda ennemi: abs(ennemi.x - joueur.x))
+            distance = proche.x - joueur.x
+            if abs(distance) < self.FUITE:
+                touches.add(pygame.K_q if distance > 0 else pygame.K_d)
+            if abs(distance) < self.DANGER:
+                touches.add(pygame.K_SPACE)
+            self.attente -= 1
+            if self.attente <= 0 and joueur.balles > 0 and abs(distance) < self.PORTEE:
+                # Le bot vise dans le monde, la souris est à l'ecran
+                jeu.position_souris = scene.cameras["jeu"].vers_ecran(
+                    proche.x + self.hasard.gauss(0, self.imprecision),
+                    proche.y - 100 + self.hasard.gauss(0, self.imprecision)
+                )
+                jeu.souris_pressee = True
+                self.attente = self.reaction
+        jeu.touches = TouchesScriptees(touches)
+
+
+def construire(jeu, cadence):
+    """
+    La salle "jeu" telle que Jeu la construit, avec la cadence des vagues
+    multipliée par cadence.
+    """
+    vagues = Vagues.charger(os.path.join(commun.RACINE, "niveaux", "vagues.json")).vagues
+    jeu.vagues = Vagues([dict(vague, cadence=vague["cadence"] * cadence) if "cadence" in vague else vague for vague in vagues])
+    scene = Scene(jeu)
+    scene.nouvelle_salle("jeu")
+    scene.changer_salle("jeu")
+    scene.lier(GestionnaireJeu(jeu), "jeu")
+    scene.lier(Joueur(jeu, (600, 200)), "jeu")
+    scene.cameras["jeu"] = Camera(monde=pygame.Rect(0, 0, jeu.largeur_monde, 720))
+    return scene
+
+
+# Un jeu par processus : les silhouettes ne sont calculées qu'une fois
+JEU = None
+
+
+def partie(tache):
+    """
+    Joue une partie et renvoie sa ligne de résultats (voir COLONNES).
+    """
+    global JEU
+    graine, (gravite, cadence, saut, vitesse_boule), duree = tache
+    if JEU is None:
+        JEU = JeuLots()
+    jeu = JEU
+    jeu.fin = False
+    jeu.temps = 0
+    # Les réglages sont remis à chaque partie : un processus en joue
+    # plusieurs, pas forcément avec les mêmes
+    moteur.GRAVITE = gravite
+    Joueur.SAUT = saut
+    Boule.VITESSE = (40 * vitesse_boule, 30 * vitesse_boule)
+    random.seed(graine)
+    objets.SCORE = 0
+    scene = construire(jeu, cadence)
+    bot = Bot(graine)
+    # Le score est remis à zéro quand la partie est perdue, on garde le
+    # plus haut publié
+    scores = [0]
+    scene.abonner("score", lambda lot: scores.extend(score for score, in lot))
+
+    pas = []
+    pic = 0
+    salle = scene.salles["jeu"]
+    while not jeu.fin and len(pas) < duree * 60:
+        bot.conduire(jeu, scene)
+        debut = time.perf_counter()
+        scene.actualiser()
+        scene.distribuer()
+        pas.append(time.perf_counter() - debut)
+        jeu.temps += jeu.dt / 60
+        pic = max(pic, len(salle))
+    return (
+        graine, gravite, cadence, saut, vitesse_boule,
+        max(scores), len(pas) / 60, jeu.fin, pic,
+        sum(pas) / len(pas) * 1e3, centile(pas, 99) * 1e3
+    )
+
+
+def jouer(taches, processus):
+    """
+    Répartit les parties entre les processus, par paquets pour limiter les
+    allers-retours.
+    """
+    paquet = max(1, len(taches) // (processus * 8))
+    with ProcessPoolExecutor(processus) as executeur:
+        return list(executeur.map(partie, taches, chunksize=paquet))
+
+
+def ecrire(chemin, lignes):
+    """
+    Ecrit les résultats colonne par colonne.
+    """
+    colonnes = {nom : [ligne[i] for ligne in lignes] for i, nom in enumerate(COLONNES)}
+    if chemin.endswith(".npz"):
+        if moteur.numpy is None:
+            raise ValueError(f"Impossible d'écrire {chemin} : numpy n'est pas installé")
+        moteur.numpy.savez_compressed(chemin, **{nom : moteur.numpy.array(valeurs) for nom, valeurs in colonnes.items()})
+    elif chemin.endswith(".parquet"):
+        try:
+            import pyarrow, pyarrow.parquet
+        except ImportError:
+            raise ValueError(f"Impossible d'écrire {chemin} : pyarrow n'est pas installé")
+        pyarrow.parquet.write_table(pyarrow.table(colonnes), chemin)
+    else:
+        with open(chemin, "w", newline="") as fichier:
+            ecrivain = csv.writer(fichier)
+            ecrivain.writerow(COLONNES)
+            ecrivain.writerows(lignes)
+
+
+def resumer(lignes):
+    print(
+        f"{'gravité':>7} | {'cadence':>7} | {'saut':>4} | {'boule':>5} | {'parties':>7} | "
+        f"{'score p10/p50/p90':>17} | {'survie p50 (s)':>14} | {'perdues':>7} | "
+        f"{'pic objets':>10} | {'pas (ms)':>8} | {'pas p99':>7}"
+    )
+    groupes = {}
+    for ligne in lignes:
+        groupes.setdefault(ligne[1:5], []).append(ligne)
+    for (gravite, cadence, saut, vitesse_boule), groupe in sorted(groupes.items()):
+        scores = [ligne[5] for ligne in groupe]
+        survies = [ligne[6] for ligne in groupe]
+        perdues = sum(ligne[7] for ligne in groupe) / len(groupe) * 100
+        pics = [ligne[8] for ligne in groupe]
+        pas = sum(ligne[9] for ligne in groupe) / len(groupe)
+        pas_p99 = max(ligne[10] for ligne in groupe)
+        print(
+            f"{gravite:>7g} | {cadence:>7g} | {saut:>4g} | {vitesse_boule:>5g} | {len(groupe):>7} | "
+            f"{centile(scores, 10):>5}/{centile(scores, 50):>5}/{centile(scores, 90):>5} | "
+            f"{centile(survies, 50):>14.1f} | {perdues:>6.0f}% | "
+            f"{centile(pics, 50):>4}/{max(pics):>5} | {pas:>8.3f} | {pas_p99:>7.3f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Joue des parties par lots sur plusieurs processus")
+    parser.add_argument("--parties", type=int, default=1000, help="nombre de parties par combinaison de réglages")
+    parser.add_argument("--graine", type=int, default=0, help="graine de la première partie")
+    parser.add_argument("--duree", type=float, default=120, help="durée maximale d'une partie, en secondes")
+    parser.add_argument("--processus", type=int, default=os.cpu_count())
+    parser.add_argument("--gravite", type=float, nargs="+", default=[moteur.GRAVITE])
+    parser.add_argument("--cadence", type=float, nargs="+", default=[1])
+    parser.add_argument("--saut", type=float, nargs="+", default=[Joueur.SAUT])
+    parser.add_argument("--vitesse-boule", type=float, nargs="+", default=[1])
+    parser.add_argument("--sortie", metavar="FICHIER", help="résultats par partie (.npz, .parquet ou .csv)")
+    parser.add_argument("--echelle", action="store_true", help="mesure le débit avec 1, 2, 4... processus")
+    arguments = parser.parse_args()
+
+    reglages = list(itertools.product(arguments.gravite, arguments.cadence, arguments.saut, arguments.vitesse_boule))
+    taches = [
+        (graine, reglage, arguments.duree)
+        for reglage in reglages
+        for graine in range(arguments.graine, arguments.graine + arguments.parties)
+    ]
+
+    if arguments.echelle:
+        print(f"{'processus':>9} | {'parties/s':>9} | {'accélération':>12} | efficacité")
+        reference = None
+        nombres = sorted({2 ** i for i in range(int(math.log2(arguments.processus)) + 1)} | {arguments.processus})
+        for processus in nombres:
+            debut = time.perf_counter()
+            jouer(taches, processus)
+            debit = len(taches) / (time.perf_counter() - debut)
+            reference = reference or debit
+            print(f"{processus:>9} | {debit:>9.1f} | {debit / reference:>11.2f}x | {debit / reference / processus * 100:>9.0f}%")
+    else:
+        debut = time.perf_counter()
+        lignes = jouer(taches, arguments.processus)
+        duree = time.perf_counter() - debut
+        resumer(lignes)
+        print(f"{len(lignes)} parties en {duree:.1f} s sur {arguments.processus} processus ({len(lignes) / duree:.1f} parties/s)")
+        if arguments.sortie is not None:
+            ecrire(arguments.sortie, lignes)
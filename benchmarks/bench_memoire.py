@@ -0,0 +1,38 @@
+"""
+Banc d'essai de la mémoire occupée par les entitées.
+
+Crée N ennemis (10 000 par défaut) liés à une salle et mesure, avec
+tracemalloc, la mémoire allouée pour eux, rapportée au nombre d'ennemis.
+
+Utilisation : python benchmarks/bench_memoire.py --ennemis 10000
+"""
+import argparse, gc, tracemalloc
+
+from commun import JeuBanc
+from moteur import *
+from objets import *
+
+
+def mesurer(nombre):
+    jeu = JeuBanc()
+    scene = Scene(jeu)
+    scene.nouvelle_salle("jeu")
+    scene.changer_salle("jeu")
+    gc.collect()
+    tracemalloc.start()
+    avant = tracemalloc.get_traced_memory()[0]
+    for i in range(nombre):
+        scene.lier(Ennemi1(jeu, (i % 1280, 695), "gauche" if i % 2 else "droite"))
+    # Une frame pour que chaque ennemi ait tous ses attributs
+    scene.actualiser()
+    gc.collect()
+    apres = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return (apres - avant) / nombre
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mémoire occupée par ennemi")
+    parser.add_argument("--ennemis", type=int, default=10000)
+    nombre = parser.parse_args().ennemis
+    print(f"{nombre} ennemis : {mesurer(nombre):.0f} octets par ennemi")
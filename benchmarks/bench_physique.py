@@ -0,0 +1,60 @@
+"""
+Banc d'essai du moteur physique vectorisé.
+
+On joue la même partie (même graine, mêmes ennemis, mêmes boules) avec la
+physique classique puis avec MoteurPhysique, on vérifie que les positions et
+vitesses finales sont identiques (à la précision des flottants près) et on
+compare les temps par frame.
+
+Utilisation : python benchmarks/bench_physique.py --frames 60
+"""
+import argparse, time, random, math
+
+from commun import JeuBanc
+from moteur import *
+from objets import *
+
+
+def construire(nombre_ennemis, physique):
+    random.seed(0)
+    jeu = JeuBanc()
+    jeu.dt = 1
+    scene = Scene(jeu)
+    scene.nouvelle_salle("jeu")
+    scene.changer_salle("jeu")
+    if physique:
+        scene.activer_physique("jeu")
+    scene.lier(Joueur(jeu, (-5000, 200)))
+    for i in range(nombre_ennemis):
+        direction = "gauche" if i % 2 else "droite"
+        scene.lier(Ennemi1(jeu, (random.randint(0, 1280), random.randint(300, 700)), direction))
+        angle = random.uniform(0, math.pi)
+        scene.lier(Boule(jeu, (random.randint(0, 1280), 500), (math.cos(angle), math.sin(angle))))
+    return scene
+
+
+def jouer(nombre_ennemis, frames, physique):
+    scene = construire(nombre_ennemis, physique)
+    debut = time.perf_counter()
+    for _ in range(frames):
+        scene.actualiser()
+        scene.dessiner()
+    duree = (time.perf_counter() - debut) / frames
+    etat = [(o.x, o.y, o.dx, o.dy) for o in scene.salles["jeu"] if isinstance(o, Entitee)]
+    return duree, etat
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Physique classique contre physique vectorisée")
+    parser.add_argument("--frames", type=int, default=60)
+    frames = parser.parse_args().frames
+    print(f"{'ennemis':>8} | {'classique (ms)':>14} | {'numpy (ms)':>10} | identiques")
+    for nombre in (10, 100, 1000, 3000):
+        duree_classique, etat_classique = jouer(nombre, frames, False)
+        duree_numpy, etat_numpy = jouer(nombre, frames, True)
+        identiques = len(etat_classique) == len(etat_numpy) and all(
+            math.isclose(a, b, rel_tol=1e-9, abs_tol=1e-9)
+            for classique, vectorise in zip(etat_classique, etat_numpy)
+            for a, b in zip(classique, vectorise)
+        )
+        print(f"{nombre:>8} | {duree_classique * 1e3:>14.3f} | {duree_numpy * 1e3:>10.3f} | {identiques}")
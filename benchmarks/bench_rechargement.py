@@ -0,0 +1,77 @@
+"""
+Banc d'essai du rechargement à chaud (Jeu avec rechargement_a_chaud).
+
+Mesure, en mode sans tête et sans cache disque :
+- le démarrage complet (création de Jeu, toutes les ressources chargées),
+  ce que coûtait chaque modification avant
+- le rechargement d'un sprite : sa date de modification est changée (le
+  contenu ne change pas), puis une frame est jouée, qui le détecte, le
+  relit, recalcule sa silhouette et le redessine
+- le rechargement de objets.py (Jeu.recharger_objets) avec N ennemis dans
+  la salle "jeu"
+
+Utilisation : python benchmarks/bench_rechargement.py --mesures 10
+"""
+import argparse, os, time, statistics
+
+import commun
+from jeu import Jeu, Reglages
+from bench_jeu import peupler
+
+
+def creer():
+    os.chdir(commun.RACINE)
+    jeu = Jeu(Reglages(
+        sans_tete=True, dt_fixe=1, graine=0, script_entrees=lambda frame: None,
+        cache_ressources=None, rechargement_a_chaud=0
+    ))
+    jeu.scene.changer_salle("jeu")
+    jeu.ressources.attendre()
+    jeu.frame()
+    return jeu
+
+
+def sprite(jeu, nom, mesures):
+    chemin = jeu.ressources.definitions[nom][1][0]
+    durees = []
+    for _ in range(mesures):
+        # La date change à chaque fois, au moins d'une nanoseconde
+        date = os.stat(chemin).st_mtime_ns + 1
+        os.utime(chemin, ns=(date, date))
+        ancienne = jeu.images[nom]
+        debut = time.perf_counter()
+        jeu.frame()
+        durees.append(time.perf_counter() - debut)
+        assert jeu.images[nom] is not ancienne
+    return statistics.median(durees) * 1e3
+
+
+def objets(jeu, ennemis, mesures):
+    peupler(jeu, ennemis, 0)
+    durees = []
+    for _ in range(mesures):
+        debut = time.perf_counter()
+        jeu.recharger_objets()
+        durees.append(time.perf_counter() - debut)
+    return statistics.median(durees) * 1e3
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Coût du rechargement à chaud")
+    parser.add_argument("--mesures", type=int, default=10)
+    mesures = parser.parse_args().mesures
+    debut = time.perf_counter()
+    jeu = creer()
+    print(f"démarrage complet : {(time.perf_counter() - debut) * 1e3:.1f} ms")
+    # Frame sans rechargement, pour comparer
+    durees = []
+    for _ in range(mesures):
+        debut = time.perf_counter()
+        jeu.frame()
+        durees.append(time.perf_counter() - debut)
+    print(f"frame sans rechargement : {statistics.median(durees) * 1e3:.2f} ms")
+    for nom in ("boule", "joueur", "ennemi1", "fond_menu"):
+        taille = jeu.images[nom].get_size()
+        print(f"frame qui recharge {nom} ({taille[0]}x{taille[1]}) : {sprite(jeu, nom, mesures):.2f} ms")
+    for ennemis in (0, 200, 1000):
+        print(f"rechargement de objets.py, {ennemis} ennemis : {objets(jeu, ennemis, mesures):.2f} ms")
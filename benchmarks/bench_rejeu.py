@@ -0,0 +1,95 @@
+"""
+Banc d'essai par rejeu d'une partie enregistrée.
+
+Une partie enregistrée (voir JournalEntrees dans jeu.py) se rejoue à
+l'identique : même graine, mêmes delta time, mêmes entrées. On peut donc
+rejouer le même journal sur deux versions du jeu et comparer leurs temps de
+frame, phase par phase (voir Profileur).
+
+Sans journal, on en enregistre un en jouant une partie scriptée : le bot
+clique sur "Jouer", puis se déplace, saute et tire.
+
+Utilisation :
+    python benchmarks/bench_rejeu.py --enregistrer partie.ent --frames 1500
+    python benchmarks/bench_rejeu.py partie.ent --sortie resultats.json
+    python benchmarks/bench_rejeu.py partie.ent --reference resultats.json
+"""
+import argparse, json, time
+
+import commun
+import pygame
+from jeu import Jeu, Reglages
+from bench_jeu import centile
+
+
+def bot(frame):
+    """
+    Entrées d'une partie scriptée : un clic sur "Jouer", puis des allers
+    retours en tirant.
+    """
+    x = 900 if (frame // 30) % 2 else 300
+    touches = [pygame.K_d, pygame.K_SPACE] if frame % 50 < 20 else [pygame.K_q]
+    return {"souris" : (x, 260), "clic" : 215 <= frame < 225, "touches" : touches, "souris_pressee" : frame % 40 == 0}
+
+
+def enregistrer(chemin, frames, graine):
+    jeu = Jeu(Reglages(sans_tete=True, dt_fixe=1, graine=graine, script_entrees=bot, enregistrer_entrees=chemin))
+    for _ in range(frames):
+        jeu.frame()
+    jeu.journal.enregistrer(chemin)
+
+
+def rejouer(chemin):
+    jeu = Jeu(Reglages(sans_tete=True, rejouer_entrees=chemin))
+    # Toutes les frames sont gardées pour les statistiques du profileur
+    jeu.profileur.fenetre = len(jeu.journal)
+    jeu.profileur.actif = True
+    durees = []
+    while jeu.numero_frame < len(jeu.journal):
+        debut = time.perf_counter()
+        jeu.frame()
+        durees.append(time.perf_counter() - debut)
+    return {
+        "frames" : len(durees),
+        "p50" : centile(durees, 50) * 1e3,
+        "p99" : centile(durees, 99) * 1e3,
+        "profil" : jeu.profileur.statistiques(),
+        "salle" : jeu.scene.salle_actuelle,
+    }
+
+
+def ecart(nouveau, ancien):
+    return f"{nouveau:.3f} ms ({(nouveau - ancien) / ancien * 100:+.1f} %)" if ancien else f"{nouveau:.3f} ms"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rejoue une partie enregistrée et mesure ses temps de frame")
+    parser.add_argument("journal", nargs="?", help="journal d'entrées à rejouer")
+    parser.add_argument("--enregistrer", metavar="FICHIER", help="enregistre une partie scriptée dans FICHIER")
+    parser.add_argument("--frames", type=int, default=1500)
+    parser.add_argument("--graine", type=int, default=0)
+    parser.add_argument("--sortie", metavar="FICHIER", help="écrit les résultats en JSON")
+    parser.add_argument("--reference", metavar="FICHIER", help="compare aux résultats JSON d'une version précédente")
+    arguments = parser.parse_args()
+
+    if arguments.enregistrer is not None:
+        enregistrer(arguments.enregistrer, arguments.frames, arguments.graine)
+        print(f"{arguments.frames} frames enregistrées dans {arguments.enregistrer}")
+    if arguments.journal is None:
+        if arguments.enregistrer is None:
+            parser.error("il faut un journal à rejouer, ou --enregistrer")
+    else:
+        resultats = rejouer(arguments.journal)
+        reference = {"p50" : 0, "p99" : 0, "profil" : {}}
+        if arguments.reference is not None:
+            with open(arguments.reference) as fichier:
+                reference = json.load(fichier)
+        print(f"{resultats['frames']} frames rejouées, salle finale : {resultats['salle']}")
+        print(f"frame p50 : {ecart(resultats['p50'], reference['p50'])}")
+        print(f"frame p99 : {ecart(resultats['p99'], reference['p99'])}")
+        for phase, duree in resultats["profil"].items():
+            avant = reference["profil"].get(phase, {"p50" : 0, "p95" : 0})
+            print(f"{phase:<24} p50 {ecart(duree['p50'], avant['p50']):<22} | p95 {ecart(duree['p95'], avant['p95'])}")
+        if arguments.sortie is not None:
+            with open(arguments.sortie, "w") as fichier:
+                json.dump(resultats, fichier, indent=1)
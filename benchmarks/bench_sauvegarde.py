@@ -0,0 +1,74 @@
+"""
+Banc d'essai des sauvegardes de salle.
+
+Remplit une salle de N entitées (moitié ennemis, moitié boules, plus le
+joueur), puis mesure le nombre de sauvegardes (Scene.sauvegarder) et de
+restaurations (Scene.restaurer) par seconde, et la taille d'une sauvegarde.
+
+On vérifie aussi que la sauvegarde est fidèle : restaurer puis sauvegarder
+redonne les mêmes octets, et la partie continue exactement de la même façon
+après une restauration.
+
+Utilisation : python benchmarks/bench_sauvegarde.py --duree 1
+"""
+import argparse, time, random, math
+
+from commun import JeuBanc
+from moteur import *
+from objets import *
+
+
+def construire(nombre, physique):
+    random.seed(0)
+    jeu = JeuBanc()
+    jeu.dt = 1
+    scene = Scene(jeu)
+    scene.nouvelle_salle("jeu")
+    scene.changer_salle("jeu")
+    if physique:
+        scene.activer_physique("jeu")
+    scene.lier(Joueur(jeu, (-5000, 200)))
+    for i in range(nombre // 2):
+        direction = "gauche" if i % 2 else "droite"
+        scene.lier(Ennemi1(jeu, (random.randint(0, 1280), random.randint(300, 700)), direction))
+        angle = random.uniform(0, math.pi)
+        scene.lier(Boule(jeu, (random.randint(0, 1280), 500), (math.cos(angle), math.sin(angle))))
+    scene.actualiser()
+    return scene
+
+
+def debit(fonction, duree):
+    nombre = 0
+    debut = time.perf_counter()
+    while time.perf_counter() - debut < duree:
+        fonction()
+        nombre += 1
+    return nombre / (time.perf_counter() - debut)
+
+
+def etat(scene, frames):
+    for _ in range(frames):
+        scene.actualiser()
+    return [objet.etat() for objet in scene.salles["jeu"]], random.random()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Débit et fidélité de la sauvegarde des salles")
+    parser.add_argument("--duree", type=float, default=1, help="durée de chaque mesure, en secondes")
+    duree = parser.parse_args().duree
+    print(f"{'entitées':>8} | {'physique':>8} | {'octets':>8} | {'sauvegardes/s':>13} | {'restaurations/s':>15} | fidèle")
+    for nombre in (1000, 10000):
+        for physique in (False, True):
+            scene = construire(nombre, physique)
+            sauvegarde = scene.sauvegarder()
+            sauvegardes = debit(scene.sauvegarder, duree)
+            restaurations = debit(lambda: scene.restaurer(sauvegarde), duree)
+            scene.restaurer(sauvegarde)
+            fidele = scene.sauvegarder() == sauvegarde
+            apres = etat(scene, 30)
+            scene.restaurer(sauvegarde)
+            fidele = fidele and etat(scene, 30) == apres
+            print(
+                f"{nombre:>8} | {'numpy' if physique else 'classique':>8} | {len(sauvegarde):>8} | "
+                f"{sauvegardes:>13.1f} | {restaurations:>15.1f} | {fidele}"
+            )
@@ -0,0 +1,66 @@
+"""
+Banc d'essai de charge, piloté par un fichier de vagues.
+
+Lance Jeu en mode sans tête dans la salle "jeu" avec un fichier de vagues
+(niveaux/stress.json par défaut : une rafale de 300 ennemis, puis des
+paliers de plus en plus chargés), le joueur étant mis à l'écart. Les temps
+de frame sont regroupés selon le nombre d'objets de la salle, pour trouver
+à partir de combien d'objets on ne tient plus 60 FPS.
+
+Utilisation :
+    python benchmarks/bench_vagues.py --frames 3600 --tranche 200
+    python benchmarks/bench_vagues.py --vagues niveaux/vagues.json --physique
+"""
+import argparse, time
+
+import commun
+from jeu import Jeu, Reglages
+from objets import *
+from bench_jeu import centile
+
+# Temps disponible pour une frame à 60 FPS (en ms)
+BUDGET = 1000 / 60
+
+
+def lancer(frames, fichier_vagues, physique=False):
+    jeu = Jeu(Reglages(
+        physique_numpy=physique, sans_tete=True, dt_fixe=1, graine=0,
+        script_entrees=lambda frame: None, fichier_vagues=fichier_vagues
+    ))
+    jeu.scene.changer_salle("jeu")
+    # Le joueur est mis à l'écart pour que les ennemis ne terminent pas la partie
+    joueur = next(o for o in jeu.scene.salles["jeu"] if isinstance(o, Joueur))
+    joueur.x = -5000
+    mesures = []
+    for _ in range(frames):
+        debut = time.perf_counter()
+        jeu.frame()
+        mesures.append((len(jeu.scene.salles["jeu"]), time.perf_counter() - debut))
+    return mesures, jeu.scene.statistiques_reserves()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Banc d'essai de charge piloté par des vagues")
+    parser.add_argument("--frames", type=int, default=3600)
+    parser.add_argument("--vagues", default="niveaux/stress.json", help="fichier de vagues (.json ou .toml)")
+    parser.add_argument("--tranche", type=int, default=200, help="largeur des tranches de nombre d'objets")
+    parser.add_argument("--physique", action="store_true", help="active le moteur physique numpy")
+    arguments = parser.parse_args()
+
+    mesures, reserves = lancer(arguments.frames, arguments.vagues, arguments.physique)
+    tranches = {}
+    for nombre, duree in mesures:
+        tranches.setdefault(nombre // arguments.tranche * arguments.tranche, []).append(duree)
+    plafond = None
+    print(f"{'objets':>11} | {'frames':>6} | {'p50 (ms)':>8} | {'p99 (ms)':>8}")
+    for debut, durees in sorted(tranches.items()):
+        p50, p99 = centile(durees, 50) * 1e3, centile(durees, 99) * 1e3
+        if plafond is None and p50 > BUDGET:
+            plafond = debut
+        print(f"{debut:>5}-{debut + arguments.tranche - 1:<5} | {len(durees):>6} | {p50:>8.3f} | {p99:>8.3f}")
+    for classe, statistiques in reserves.items():
+        print(f"réserve {classe} : {statistiques}")
+    if plafond is None:
+        print(f"60 FPS tenus jusqu'à {max(tranches) + arguments.tranche - 1} objets")
+    else:
+        print(f"60 FPS perdus à partir d'environ {plafond} objets")
@@ -0,0 +1,59 @@
+"""
+Outils partagés par les bancs d'essai.
+"""
+import os, sys
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+RACINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, RACINE)
+
+import pygame
+
+from moteur import Profileur, Ressources, Silhouette
+
+
+class JeuBanc:
+    """
+    Version minimale de Jeu : juste ce dont les objets ont besoin, sans
+    fenêtre ni son. Le dessin ne fait rien pour ne mesurer que la scène.
+    """
+    def __init__(self):
+        self.dt = 0.1
+        self.touches = pygame.key.ScancodeWrapper([0] * 512)
+        self.souris_pressee = False
+        self.position_souris = (0, 0)
+        self.boutons_souris = (False, False, False)
+        self.temps = 0
+        self.interpolation = 1
+        self.horloge_transition = -1
+        self.reessai_instantane = False
+        self.largeur_monde = 1280
+        self.profileur = Profileur()
+        # Aucune ressource déclarée : les images sont données directement
+        self.ressources = Ressources()
+        # Une toute petite image : on ne veut pas mesurer pygame.transform
+        image = pygame.Surface((8, 8))
+        self.images = {"joueur" : image, "ennemi1" : image, "boule" : image}
+        # Mais les collisions suivent les vraies images
+        self.silhouettes = {
+            nom : Silhouette.variantes(pygame.image.load(os.path.join(RACINE, "images", nom + ".png")))
+            for nom in self.images
+        }
+
+    def dessiner(self, surface, position, z=0):
+        pass
+
+    def dessiner_monde(self, surface, position, z=0):
+        pass
+
+    def variante(self, surface, taille=None, retourner_x=False, retourner_y=False):
+        return surface
+
+    def lancer_transition(self, salle, style="fondu"):
+        pass
+
+    def jouer_son(self, son, priorite=0):
+        pass
+
+    def jouer_musique(self, musique):
+        pass
@@ -3,11 +3,19 @@ Fichier principal, à exectuer pour lancer le jeu.
 """
 
 
-import pygame, time, sys, math, random
+import os, pygame, time, sys, math, random, struct, zlib, asyncio, importlib
+from dataclasses import dataclass
 
+import objets
 from moteur import *
 from objets import *
 
+# Taille de images/boutton.png : la lire dans l'image forcerait son 
+# chargement (et celui de tout l'atlas) dès le démarrage
+TAILLE_BOUTTON = (562, 181)
+# Cache disque des images, à coté du jeu quel que soit le dossier courant
+CACHE_RESSOURCES = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache")
+
 def gaussienne_normalisee(x: float, centre: float = 0.5, ecart_type: float = 0.2) -> float:
     """
     fonction retournant une forme de cloche (comme la courble du Q.I) : 
@@ -24,6 +32,178 @@ def gaussienne_normalisee(x: float, centre: float = 0.5, ecart_type: float = 0.2
     coef = 1 / (math.exp(-((centre - centre) ** 2) / (2 * ecart_type ** 2)))
     return coef * math.exp(-((x - centre) ** 2) / (2 * ecart_type ** 2))
 
+class TouchesScriptees:
+    """
+    Remplace le résultat de pygame.key.get_pressed() quand les entrées sont
+    scriptées : touches[pygame.K_q] vaut True si la touche est pressée.
+    """
+    def __init__(self, pressees=()):
+        self.pressees = set(pressees)
+
+    def __getitem__(self, touche):
+        return touche in self.pressees
+
+class JournalEntrees:
+    """
+    Journal des entrées d'une partie, frame par frame, pour la rejouer à 
+    l'identique (avec la même graine et les mêmes delta time).
+
+    Chaque frame tient en 15 octets, plus 4 par touche enfoncée : delta 
+    time, position de la souris, un octet pour le boutton gauche et le clic
+    en attente, le nombre de touches puis leurs codes. Le fichier est 
+    compressé avec zlib, après un entête "ENT1" qui contient la graine, la
+    fréquence de simulation et le nombre de frames.
+    """
+    FRAME = struct.Struct("<dhhBB")
+    ENTETE = struct.Struct("<4sqdI")
+
+    def __init__(self, graine:int, frequence_simulation:int = 60):
+        self.graine = graine
+        self.frequence_simulation = frequence_simulation
+        self.dts = []
+        self.frames = []
+
+    def ajouter(self, dt:float, souris:Tuple[int, int], clic:bool, souris_pressee:bool, touches):
+        """
+        Ajoute une frame au journal (touches est un TouchesScriptees).
+        """
+        self.dts.append(dt)
+        self.frames.append((souris, clic, souris_pressee, tuple(sorted(touches.pressees))))
+
+    def entrees(self, numero:int):
+        """
+        Entrées d'une frame, dans le format de script_entrees (voir 
+        Jeu.lire_entrees).
+        """
+        souris, clic, souris_pressee, touches = self.frames[numero]
+        return {"souris" : souris, "clic" : clic, "souris_pressee" : souris_pressee, "touches" : touches}
+
+    def __len__(self):
+        return len(self.frames)
+
+    def enregistrer(self, chemin:str):
+        morceaux = []
+        for dt, (souris, clic, souris_pressee, touches) in zip(self.dts, self.frames):
+            morceaux.append(self.FRAME.pack(dt, *souris, clic | souris_pressee << 1, len(touches)))
+            morceaux.append(struct.pack(f"<{len(touches)}I", *touches))
+        frequence = math.nan if self.frequence_simulation is None else self.frequence_simulation
+        with open(chemin, "wb") as fichier:
+            fichier.write(self.ENTETE.pack(b"ENT1", self.graine, frequence, len(self.frames)))
+            fichier.write(zlib.compress(b"".join(morceaux)))
+
+    @classmethod
+    def charger(cls, chemin:str):
+        with open(chemin, "rb") as fichier:
+            magique, graine, frequence, nombre = cls.ENTETE.unpack(fichier.read(cls.ENTETE.size))
+            if magique != b"ENT1":
+                raise ValueError(f"{chemin} n'est pas un journal d'entrées")
+            donnees = zlib.decompress(fichier.read())
+        journal = cls(graine, None if math.isnan(frequence) else frequence)
+        position = 0
+        for _ in range(nombre):
+            dt, x, y, boutons, nb_touches = cls.FRAME.unpack_from(donnees, position)
+            position += cls.FRAME.size
+            touches = struct.unpack_from(f"<{nb_touches}I", donnees, position)
+            position += 4 * nb_touches
+            journal.dts.append(dt)
+            journal.frames.append(((x, y), bool(boutons & 1), bool(boutons & 2), touches))
+        return journal
+
+@dataclass
+class Reglages:
+    """
+    Options de Jeu. Une nouvelle option s'ajoute ici, avec sa valeur par
+    défaut, plutôt qu'au constructeur de Jeu :
+
+        Jeu(Reglages(sans_tete=True, graine=0))
+
+    physique_numpy active le moteur physique vectorisé (voir moteur.py) 
+    pour la salle de jeu, si numpy est installé.
+
+    Pour faire tourner le jeu sans ecran (serveurs d'integration continue, 
+    bancs d'essai), on peut aussi : 
+    - sans_tete : utiliser les pilotes vidéo et audio "dummy" de SDL, sans 
+      charger les sons ni limiter les FPS
+    - dt_fixe : imposer le delta time au lieu de le mesurer
+    - graine : initialiser le module random pour rejouer la même partie
+    - script_entrees : fonction qui reçoit le numéro de la frame et renvoie
+      un dictionnaire des entrées à simuler (voir lire_entrees), à la place
+      du clavier et de la souris
+
+    rendu_partiel active le rendu par zones (voir preparer_ecran et 
+    presenter) : seules les zones de l'ecran qui changent sont redessinées 
+    et envoyées à l'affichage.
+
+    La simulation avance par pas fixes, frequence_simulation fois par 
+    seconde (voir frame), indépendamment de l'affichage qui est limité à 
+    fps_max images par seconde. frequence_simulation = None revient à 
+    l'ancien fonctionnement : une actualisation par image, avec un delta 
+    time variable.
+
+    Le profileur (voir Profileur dans moteur.py) s'affiche par dessus le jeu
+    avec F10. fichier_profil l'active dès le départ et écrit le temps de 
+    chaque phase de chaque frame dans ce fichier (.csv ou .jsonl).
+
+    Les images et les sons sont chargés en arrière plan (voir Ressources 
+    dans moteur.py). cache_ressources est le dossier où garder les images 
+    déjà redimensionnées (.cache à coté de ce fichier par défaut, None pour
+    ne rien écrire sur le disque). Les bruitages se partagent voix_audio 
+    voix (voir Mixeur), et les musiques sont lues en continu. tampon_audio
+    est la taille du tampon du mixeur, en echantillons (None : 
+    Mixeur.TAMPON).
+
+    salles_en_fond associe à des salles une période (en pas de simulation) :
+    elles restent actives quand elles ne sont pas affichées, actualisées 
+    par paquets de période pas (voir Scene.activer_salle). Avec 
+    fil_arriere_plan, elles sont actualisées sur un fil d'execution à part,
+    pendant le dessin de la salle courante (ce qui ne gagne du temps que si
+    le dessin est long : la logique, en Python, ne tourne jamais vraiment 
+    en parallèle à cause du GIL).
+
+    Avec reessai_instantane, toucher un ennemi ne renvoie plus au menu : la
+    salle de jeu est remise dans l'état où elle était quand on y est entré
+    (voir Scene.sauvegarder).
+
+    enregistrer_entrees est un fichier où écrire, en quittant, le journal 
+    des entrées de la partie (voir JournalEntrees). rejouer_entrees rejoue 
+    un tel journal à l'identique : même graine, mêmes delta time et mêmes
+    entrées à chaque frame, puis quitte le jeu à la fin du journal.
+
+    fichier_vagues décrit les vagues d'ennemis de la salle "jeu" (voir 
+    Vagues dans moteur.py). niveaux/stress.json sert aux essais de charge.
+
+    La salle "jeu" est vue par une caméra (voir Camera dans moteur.py) qui 
+    suit le joueur dans un monde de largeur_monde pixels de large, et ne 
+    dessine pas ce qui est hors de l'ecran. Avec marge_actualisation, les 
+    ennemis à plus de cette distance de l'ecran ne font plus qu'avancer.
+
+    Avec rechargement_a_chaud (une période en secondes), les images, les 
+    sons, les musiques et objets.py sont surveillés (voir Surveillant dans 
+    moteur.py) : un fichier modifié est rechargé au début de la frame 
+    suivante, sans relancer le jeu (voir recharger_objets).
+    """
+    physique_numpy:bool = False
+    sans_tete:bool = False
+    dt_fixe:float = None
+    graine:int = None
+    script_entrees:Callable = None
+    rendu_partiel:bool = False
+    frequence_simulation:int = 60
+    fps_max:int = 120
+    fichier_profil:str = None
+    cache_ressources:str = CACHE_RESSOURCES
+    voix_audio:int = 8
+    tampon_audio:int = None
+    salles_en_fond:dict = None
+    fil_arriere_plan:bool = False
+    reessai_instantane:bool = False
+    enregistrer_entrees:str = None
+    rejouer_entrees:str = None
+    fichier_vagues:str = "niveaux/vagues.json"
+    largeur_monde:int = 1280
+    marge_actualisation:int = None
+    rechargement_a_chaud:float = None
+
 class Jeu:
     """
     Classe qui gère le jeu.
@@ -34,34 +214,169 @@ class Jeu:
 
     Cela nous evite d'utiliser des variables globales et de devoir
     définir des fonctions a 40 paramètres répétitifs.
+
+    Ses options sont données par reglages (voir Reglages).
+
+    boucle_async remplace boucle quand d'autres tâches doivent tourner dans
+    le même fil (voir Ordonnanceur dans moteur.py) : elles n'ont que le 
+    temps libre de chaque frame, et passent par Scene.differer pour toucher
+    aux salles.
     """
-    def __init__(self):
-        # Initialisation classique de pygame
+    def __init__(self, reglages:Reglages = None):
+        if reglages is None:
+            reglages = Reglages()
+        self.reglages = reglages
+        # Un rejeu impose la graine, la fréquence et les entrées
+        graine = reglages.graine
+        frequence_simulation = reglages.frequence_simulation
+        script_entrees = reglages.script_entrees
+        # Journal des entrées, enregistré ou rejoué
+        self.fichier_journal = reglages.enregistrer_entrees
+        self.journal = None
+        self.rejeu = reglages.rejouer_entrees is not None
+        if self.rejeu:
+            # Le journal impose tout ce qui influence la partie
+            self.journal = JournalEntrees.charger(reglages.rejouer_entrees)
+            graine = self.journal.graine
+            frequence_simulation = self.journal.frequence_simulation
+            script_entrees = self.journal.entrees
+        elif reglages.enregistrer_entrees is not None:
+            # Sans graine, la partie ne pourrait pas être rejouée
+            if graine is None:
+                graine = random.randrange(2 ** 32)
+            self.journal = JournalEntrees(graine, frequence_simulation)
+        # Touches enfoncées, suivies grâce aux evenements (pour le journal)
+        self.touches_enfoncees = set()
+        self.sans_tete = reglages.sans_tete
+        self.fps_max = reglages.fps_max
+        # Pas de la simulation, dans l'unité du delta time (1 = 1/60 de seconde)
+        self.pas_simulation = None if frequence_simulation is None else 60 / frequence_simulation
+        # Temps mesuré mais pas encore simulé
+        self.accumulateur = 0
+        # Au dela de ce nombre de pas par image, on abandonne le retard plutôt
+        # que de ralentir encore plus l'affichage en voulant le rattraper
+        self.pas_max = 5
+        # Avancement entre les deux derniers pas (de 0 à 1) au moment de 
+        # l'affichage, pour interpoler la position des entitées
+        self.interpolation = 1
+        self.rendu_partiel = reglages.rendu_partiel
+        self.dt_fixe = reglages.dt_fixe
+        self.script_entrees = script_entrees
+        if graine is not None:
+            random.seed(graine)
+        # Les effets purement visuels (tremblement) ont leur propre générateur,
+        # pour que le nombre d'images affichées ne change pas la partie
+        self.aleatoire_visuel = random.Random(graine)
+        if reglages.sans_tete:
+            # SDL doit connaitre ses pilotes avant pygame.init()
+            os.environ["SDL_VIDEODRIVER"] = "dummy"
+            os.environ["SDL_AUDIODRIVER"] = "dummy"
+
+        # Initialisation classique de pygame (le mixeur d'abord, voir Mixeur)
+        Mixeur.preparer(reglages.tampon_audio)
         pygame.init()
-        pygame.mixer.set_num_channels(2000)
-        self.ecran_ = pygame.display.set_mode((1280, 720), pygame.SCALED)
+        # (SCALED n'a pas de sens, et pas de rendu accéléré, sans ecran)
+        self.ecran_ = pygame.display.set_mode((1280, 720), 0 if reglages.sans_tete else pygame.SCALED)
         self.horloge = pygame.time.Clock()
+        # Avec boucle_async, c'est l'ordonnanceur qui limite les FPS
+        self.ordonnanceur = Ordonnanceur(None if reglages.sans_tete else reglages.fps_max)
+        self.boucle_asyncio = False
+
+        # Numéro de la frame courante et temps de jeu écoulé (en secondes)
+        self.numero_frame = 0
+        self.temps = 0
        
         # L'utilisation de deux ecran permet la gestion de l'effet de tremblement
         self.ecran = pygame.Surface((1280, 720))
+
+        # File de rendu : les images à dessiner pendant la frame, avec leur
+        # profondeur. Elle est triée puis vidée à la fin de chaque frame.
+        self.file_rendu = []
+        # Nombre d'images dessinées à la dernière frame
+        self.appels_dessin = 0
+
+        # Rendu partiel : fond fixe de chaque salle, composé une seule fois
+        self.fonds = {}
+        self.fond_en_construction = None
+        self.salle_en_construction = None
+        # Zones dessinées pendant la frame courante et la précédente
+        self.zones = []
+        self.zones_precedentes = []
+        # Au dela de ce nombre de zones, autant tout envoyer à l'affichage
+        self.zones_max = 64
+        # tout_redessiner : la prochaine frame doit repartir du fond complet
+        # plein_ecran : la frame courante sera envoyée en entier
+        self.tout_redessiner = True
+        self.plein_ecran = True
         
         # L'horloge de transition gère le timing des transitions
         self.horloge_transition = -1
+        # Les différentes transitions possibles (voir Transition), et celle
+        # en cours
+        self.transitions = {
+            "fondu" : Transition(gaussienne_normalisee),
+            "volet" : Transition(gaussienne_normalisee, effet="volet", tremblement=[(0, 0), (0.5, 8), (1, 0)]),
+        }
+        self.transition = self.transitions["fondu"]
         
         # Verifie si la souris passe sur un boutton
         self.souris_sur_boutton = False
+        # Clic en attente d'être traité par la simulation
+        self.souris_pressee = False
+
+        # Réessai instantané : sauvegarde de la salle de jeu à son entrée, et
+        # demande de restauration (faite à la fin du pas)
+        self.reessai_instantane = reglages.reessai_instantane
+        self.sauvegarde_jeu = None
+        self.reessai_demande = False
+
+        # Profileur des frames, et son affichage (rafraichi toutes les 
+        # frames_profil frames pour rester lisible)
+        self.profileur = Profileur()
+        if reglages.fichier_profil is not None:
+            self.profileur.exporter(reglages.fichier_profil)
+        self.afficher_profil = False
+        self.frames_profil = 30
+        self.lignes_profil = []
+
+        # Caches du texte : les polices chargées, et les surfaces déjà rendues
+        self.polices = CacheLRU()
+        self.textes = CacheLRU(256)
+
+        # Cache des images redimensionnées et/ou inversées (voir variante), 
+        # limité à 32 Mo. Les tailles sont arrondies au multiple de 
+        # pas_variantes pixels pour que les animations de zoom ne produisent 
+        # qu'un petit nombre de variantes.
+        self.pas_variantes = 4
+        self.variantes = CacheLRU(
+            poids_max=32 * 2 ** 20,
+            poids=lambda surface: surface.get_width() * surface.get_height() * surface.get_bytesize()
+        )
         
         # Initialisation du "dernier temps", utile au calcul du delta time
         self.dernier_temps = time.time()
         
-        # Chargement des ressources
+        # Chargement des ressources : seulement celles du menu pour l'instant,
+        # les autres seront chargées pendant la transition vers leur salle
+        self.ressources = Ressources(reglages.cache_ressources)
+        self.images = self.ressources.images
+        # Formes de collision des sprites (voir Silhouette)
+        self.silhouettes = self.ressources.silhouettes
+        self.sons = self.ressources.sons
+        self.audio = Mixeur(self.ressources, reglages.voix_audio, actif=not reglages.sans_tete)
         self.charger_images()
         self.charger_sons()
+        self.ressources.precharger("menu")
         
-        TAILLE_BOUTTON = self.images["boutton"].get_size()
+        # Largeur du monde de la salle "jeu" (voir Camera)
+        self.largeur_monde = reglages.largeur_monde
+        # Calendrier des apparitions d'ennemis (voir GestionnaireJeu)
+        self.vagues = Vagues.charger(reglages.fichier_vagues)
 
         # Initialisation de la scène
         self.scene = Scene(self)
+        # Chaque salle a sa musique, lancée quand on y entre
+        self.scene.abonner("salle", self.musique_salle)
         
         # Et des salles
         self.scene.nouvelle_salle("menu")
@@ -72,6 +387,22 @@ class Jeu:
         self.scene.lier(Boutton(self, (900, 260), TAILLE_BOUTTON, 0), "menu")
         self.scene.lier(Boutton(self, (900, 500), TAILLE_BOUTTON, 1), "menu")
         self.scene.lier(Joueur(self, (600, 200)), "jeu")
+        self.scene.cameras["jeu"] = Camera(
+            monde=pygame.Rect(0, 0, reglages.largeur_monde, 720), marge_actualisation=reglages.marge_actualisation
+        )
+        if reglages.physique_numpy:
+            self.scene.activer_physique("jeu")
+        # Salles qui continuent à vivre en arrière plan
+        for salle, periode in (reglages.salles_en_fond or {}).items():
+            self.scene.activer_salle(salle, periode)
+        if reglages.salles_en_fond and reglages.fil_arriere_plan:
+            self.scene.activer_travailleur()
+
+        # Fichiers à recharger quand ils changent
+        self.surveillant = None
+        if reglages.rechargement_a_chaud is not None:
+            self.surveillant = Surveillant(reglages.rechargement_a_chaud)
+            self.surveiller_fichiers()
         
         # On débute le jeu dans le menu
         self.scene.changer_salle("menu")
@@ -92,80 +423,462 @@ class Jeu:
         # de la méthode, et celui mesuré à la dernière itération, multuplié par 60
         # Une valeur choisie arbitrairement pour uniformiser la vitesse des objets
         # pour que dt = 1, à 60 FPS, une valeur courante dans le jeu vidéo.
-        self.dt = (time.time() - self.dernier_temps) * 60
+        self.dt_reel = (time.time() - self.dernier_temps) * 60
         # On recalcule ensuite le dernier temps.
         self.dernier_temps = time.time()
+        # Un delta time imposé remplace celui mesuré (le jeu devient 
+        # alors reproductible d'une machine à l'autre)
+        if self.dt_fixe is not None:
+            self.dt_reel = self.dt_fixe
+        # En rejeu, c'est celui de la frame enregistrée
+        if self.rejeu:
+            self.dt_reel = self.journal.dts[self.numero_frame]
+        # PS : avec la simulation à pas fixe, c'est le pas qui sert de delta
+        # time aux objets (voir frame)
+        self.dt = self.dt_reel
 
     def boucle(self):
         """
         Boucle du jeu qui s'execute en continu jusqu'à la fin de celui-ci
         """
         while True:
-            self.touches = pygame.key.get_pressed() # Récupère les touches pressées
-            self.delta_time()
-            self.logique_curseur()
-            self.souris_sur_boutton = False
-            self.souris_pressee = False
-            
-            # Evenements pygame
-            for event in pygame.event.get():
-                # Lorqu'on ferme le jeu ...
-                if event.type == pygame.QUIT:
-                    # ... on le quitte
+            # Un rejeu s'arrête à la fin du journal
+            if self.rejeu and self.numero_frame >= len(self.journal):
+                self.quitter()
+            self.frame()
+
+    async def boucle_async(self, *taches):
+        """
+        Variante de boucle à lancer dans une boucle asyncio, avec les 
+        coroutines taches qui tournent pendant le temps libre de chaque 
+        frame (voir Ordonnanceur). Elles sont annulées quand le jeu s'arrête.
+
+            async def principal():
+                jeu = Jeu()
+                await jeu.boucle_async(telemetrie(jeu), console(jeu))
+
+            asyncio.run(principal())
+        """
+        taches = [asyncio.ensure_future(tache) for tache in taches]
+        self.boucle_asyncio = True
+        try:
+            while True:
+                if self.rejeu and self.numero_frame >= len(self.journal):
                     self.quitter()
-                if event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_F11: 
-                        # On met en plein ecran quand F11 est pressé
-                        pygame.display.toggle_fullscreen()
-                if event.type == pygame.MOUSEBUTTONDOWN:
-                    self.souris_pressee = True
-                        
-            # Tour de l'horloge du jeu
-            self.horloge.tick(1000)
+                self.frame()
+                await self.ordonnanceur.attendre_frame()
+        finally:
+            self.boucle_asyncio = False
+            for tache in taches:
+                tache.cancel()
+
+    def frame(self):
+        """
+        Une seule itération de la boucle du jeu.
+        """
+        profileur = self.profileur
+        debut_frame = debut = profileur.top()
+        self.delta_time()
+        self.logique_curseur()
+        
+        # Evenements pygame
+        for event in pygame.event.get():
+            # Lorqu'on ferme le jeu ...
+            if event.type == pygame.QUIT:
+                # ... on le quitte
+                self.quitter()
+            if event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_F11: 
+                    # On met en plein ecran quand F11 est pressé
+                    pygame.display.toggle_fullscreen()
+                if event.key == pygame.K_F10:
+                    # Et on affiche ou cache le profileur avec F10
+                    self.basculer_profileur()
+            if event.type == pygame.MOUSEBUTTONDOWN and not self.rejeu:
+                # Le clic reste en attente jusqu'au prochain pas de simulation
+                # (en rejeu, les clics viennent du journal)
+                self.souris_pressee = True
+            if event.type == pygame.KEYDOWN:
+                self.touches_enfoncees.add(event.key)
+            if event.type == pygame.KEYUP:
+                self.touches_enfoncees.discard(event.key)
+        # Récupère les touches pressées et l'etat de la souris
+        self.lire_entrees()
+        debut = profileur.noter("entrees", debut)
+                    
+        # Tour de l'horloge du jeu (sans limite de FPS en mode sans tête, ou
+        # quand l'ordonnanceur attend à notre place)
+        if self.sans_tete or self.boucle_asyncio:
+            self.horloge.tick()
+        else:
+            self.horloge.tick(self.fps_max)
+        debut = profileur.noter("attente", debut)
+        if self.rendu_partiel:
+            self.preparer_ecran()
+        else:
             # Actualisation de l'affichage
             pygame.display.update()
             self.gerer_tremblement()
-            # On actualise la scène
-            self.scene.actualiser()
-            # Et gère les transitions
-            self.gerer_transition()
+        profileur.noter("affichage", debut)
+
+        # Les fichiers modifiés sont rechargés avant la simulation
+        if self.surveillant is not None:
+            debut = profileur.top()
+            self.surveillant.verifier()
+            profileur.noter("rechargement", debut)
+        # Le travail demandé par les tâches (voir Scene.differer) aussi
+        debut = profileur.top()
+        self.scene.executer_differes()
+        profileur.noter("differes", debut)
+
+        # Simulation
+        if self.pas_simulation is None:
+            self.etape()
+        else:
+            # Le temps écoulé s'accumule, et on le simule par pas fixes.
+            # Le jeu se comporte ainsi de la même façon quelle que soit la 
+            # vitesse de la machine.
+            pas = self.pas_simulation
+            self.accumulateur = min(self.accumulateur + self.dt_reel, pas * self.pas_max)
+            self.dt = pas
+            while self.accumulateur >= pas:
+                self.etape()
+                self.accumulateur -= pas
+            self.interpolation = self.accumulateur / pas
+        # Les evenements publiés pendant la simulation sont livrés à leurs 
+        # abonnés, une fois par frame
+        debut = profileur.top()
+        self.scene.distribuer()
+        profileur.noter("evenements", debut)
+
+        # Dessin de la scène et de la transition
+        debut = profileur.top()
+        self.scene.dessiner()
+        if self.horloge_transition != -1:
+            self.afficher_transition()
+        if self.afficher_profil:
+            self.afficher_profileur()
+        debut = profileur.noter("dessin", debut)
+        # Enfin on dessine tout ce qui a été demandé pendant la frame
+        self.rendre()
+        debut = profileur.noter("rendu", debut)
+        if self.rendu_partiel:
+            self.presenter()
+            debut = profileur.noter("affichage", debut)
+        # Les salles en arrière plan ont été actualisées pendant le dessin,
+        # on attend qu'elles aient fini avant la frame suivante
+        self.scene.attendre_arriere_plan()
+        profileur.noter("frame", debut_frame)
+        profileur.terminer_frame(self.numero_frame)
+        self.numero_frame += 1
+
+    def etape(self):
+        """
+        Un pas de simulation : actualisation de la scène et des transitions,
+        sans rien dessiner.
+        """
+        self.souris_sur_boutton = False
+        # On actualise la scène
+        self.scene.actualiser()
+        # La salle ne peut pas être restaurée pendant qu'on la parcourt, 
+        # d'où la demande, traitée ici
+        if self.reessai_demande:
+            self.reessai_demande = False
+            self.scene.restaurer(self.sauvegarde_jeu, "jeu")
+        # Et gère les transitions
+        debut = self.profileur.top()
+        self.gerer_transition()
+        self.profileur.noter("transition", debut)
+        # Le clic a été traité, il ne doit pas l'être une deuxième fois si
+        # plusieurs pas sont simulés pendant la même image
+        self.souris_pressee = False
+        self.temps += self.dt / 60
+
+    def rendre(self):
+        """
+        Vide la file de rendu : les images sont triées par profondeur (les 
+        plus petits z en premier, donc en dessous) puis dessinées en un seul
+        appel à Surface.blits. A profondeur égale, l'ordre des demandes est
+        conservé.
+        """
+        file = self.file_rendu
+        file.sort(key=lambda commande: commande[2])
+        self.appels_dessin = len(file)
+        zones = self.ecran.blits([(surface, position) for surface, position, z in file], self.rendu_partiel)
+        # En rendu partiel, on retient les zones touchées
+        if self.rendu_partiel:
+            self.zones.extend(zones)
+        self.file_rendu = []
+
+    def preparer_ecran(self):
+        """
+        Rendu partiel : efface les objets dessinés à la frame précédente en
+        recopiant le fond de la salle par dessus, et seulement là où ils 
+        étaient.
+        """
+        salle = self.scene.salle_actuelle
+        self.zones = []
+        self.plein_ecran = self.tout_redessiner
+        self.tout_redessiner = False
+        fond = self.fonds.get(salle)
+        if fond is None:
+            # Première frame dans cette salle : les gestionnaires vont dessiner
+            # le fond (voir dessiner_fond), on le garde au passage
+            self.fond_en_construction = pygame.Surface((1280, 720)).convert()
+            self.salle_en_construction = salle
+            self.ecran.fill((0, 0, 0))
+            self.plein_ecran = True
+        elif self.plein_ecran:
+            self.ecran.blit(fond, (0, 0))
+        else:
+            for zone in self.zones_precedentes:
+                self.ecran.blit(fond, zone, zone)
+
+    def presenter(self):
+        """
+        Rendu partiel : envoie à l'affichage les zones effacées et les zones
+        redessinées pendant la frame. 
+        
+        Les transitions (et leur tremblement) touchent tout l'ecran, elles 
+        passent donc par l'affichage complet.
+        """
+        if self.fond_en_construction is not None:
+            self.fonds[self.salle_en_construction] = self.fond_en_construction
+            self.fond_en_construction = None
+        zones = self.zones_precedentes + self.zones
+        if self.plein_ecran or len(zones) > self.zones_max:
+            self.gerer_tremblement()
+            pygame.display.update()
+        else:
+            for zone in zones:
+                self.ecran_.blit(self.ecran, zone, zone)
+            pygame.display.update(zones)
+        self.zones_precedentes = self.zones
+
+    def lire_entrees(self):
+        """
+        Lit le clavier et la souris une seule fois par frame. Les objets 
+        utilisent ensuite touches, position_souris, boutons_souris et 
+        souris_pressee au lieu d'interroger pygame eux même.
+
+        Si les entrées sont scriptées, le script renvoie pour chaque frame un
+        dictionnaire (ou None) avec les clés facultatives :
+        - "touches" : les touches pressées (codes pygame.K_...)
+        - "souris" : la position de la souris
+        - "clic" : True si le boutton gauche est maintenu
+        - "souris_pressee" : True si on vient de cliquer
+        """
+        if self.script_entrees is None:
+            if self.journal is None:
+                self.touches = pygame.key.get_pressed()
+            else:
+                # Pour que le rejeu soit exact, la partie ne voit que les 
+                # touches qui sont écrites dans le journal
+                self.touches = TouchesScriptees(self.touches_enfoncees)
+            self.position_souris = pygame.mouse.get_pos()
+            self.boutons_souris = pygame.mouse.get_pressed()
+        else:
+            entrees = self.script_entrees(self.numero_frame) or {}
+            self.touches = TouchesScriptees(entrees.get("touches", ()))
+            self.position_souris = entrees.get("souris", (0, 0))
+            self.boutons_souris = (entrees.get("clic", False), False, False)
+            self.souris_pressee = self.souris_pressee or entrees.get("souris_pressee", False)
+        if self.journal is not None and not self.rejeu:
+            self.journal.ajouter(self.dt_reel, self.position_souris, self.boutons_souris[0], self.souris_pressee, self.touches)
             
     def quitter(self):
+        if self.fichier_journal is not None:
+            self.journal.enregistrer(self.fichier_journal)
+        self.profileur.fermer()
+        self.ressources.fermer()
         pygame.quit()
         sys.exit()
          
     def charger_images(self):
         """
-        Charge toutes les images dans un dictionnaire.
+        Déclare toutes les images, avec les salles qui les utilisent. Elles
+        sont ensuite chargées en arrière plan, et disponibles dans le 
+        dictionnaire images.
+
+        Les sprites sont rangés dans un même atlas.
         """
-        self.images = {
-            "fond_menu" : pygame.transform.scale(pygame.image.load("images/fond.png"), (1280, 720)).convert_alpha(),
-            "sol" : pygame.transform.scale(pygame.image.load("images/sol.png"), (1280, 720)).convert_alpha(),
-            "boutton" : pygame.image.load("images/boutton.png").convert_alpha(),
-            "logo" : pygame.transform.scale(pygame.image.load("images/logo.png"), (1000, 1000)).convert_alpha(),
-            "joueur" : pygame.image.load("images/joueur.png").convert_alpha(),
-            "boule" : pygame.image.load("images/boule.png").convert_alpha(),
-            "ennemi1" : pygame.image.load("images/ennemi1.png").convert_alpha() 
-        }
+        ressources = self.ressources
+        ressources.image("fond_menu", "images/fond.png", (1280, 720), salles=("menu", "jeu"))
+        ressources.image("sol", "images/sol.png", (1280, 720), salles=("jeu",))
+        ressources.image("logo", "images/logo.png", (1000, 1000), salles=("menu",))
+        ressources.image("boutton", "images/boutton.png", salles=("menu",), atlas=True)
+        ressources.image("joueur", "images/joueur.png", salles=("jeu",), atlas=True)
+        ressources.image("boule", "images/boule.png", salles=("jeu",), atlas=True)
+        ressources.image("ennemi1", "images/ennemi1.png", salles=("jeu",), atlas=True)
         
     def charger_sons(self):
-        # Même logique que pour le chargement des images
-        self.sons = {
-            "jeu" : pygame.mixer.Sound("sons/jeu.mp3"),
-            "menu" : pygame.mixer.Sound("sons/menu.mp3"),
-            "menu_click" : pygame.mixer.Sound("sons/menu_click.mp3"),
-            "laser" : pygame.mixer.Sound("sons/laser.mp3")
-        }
+        # Sans tête, on ne joue aucun son, inutile de les décoder
+        if self.sans_tete:
+            return
+        # Même logique que pour le chargement des images, pour les bruitages
+        ressources = self.ressources
+        ressources.son("menu_click", "sons/menu_click.mp3", salles=("menu",))
+        ressources.son("laser", "sons/laser.mp3", salles=("jeu",))
+        # Au plus 4 lasers en même temps
+        self.audio.limiter("laser", 4)
+        # Les musiques ne sont pas décodées d'avance, elles sont lues au fur
+        # et à mesure
+        self.audio.musique("jeu", "sons/jeu.mp3")
+        self.audio.musique("menu", "sons/menu.mp3")
         
-    def dessiner(self, surface, position):
-        self.ecran.blit(surface, position)
+    def surveiller_fichiers(self):
+        """
+        Déclare au surveillant les fichiers des ressources, des musiques et
+        des objets.
+        """
+        ressources = self.ressources
+        for nom, (fonction, arguments) in ressources.definitions.items():
+            self.surveillant.surveiller(arguments[0], lambda nom=nom: self.recharger_ressource(nom))
+        for nom, chemin in self.audio.musiques.items():
+            self.surveillant.surveiller(chemin, lambda nom=nom: self.recharger_musique(nom))
+        self.surveillant.surveiller(objets.__file__, self.recharger_objets)
+
+    def recharger_ressource(self, nom:str):
+        self.ressources.recharger(nom)
+        # En rendu partiel, les fonds gardés ont pu être composés avec 
+        # l'ancienne image : ils sont oubliés, et recomposés à la prochaine
+        # frame de chaque salle
+        if nom in self.ressources.images:
+            self.fonds.clear()
+            self.tout_redessiner = True
+
+    def recharger_musique(self, nom:str):
+        # Une musique est relue à chaque lancement : il suffit de relancer
+        # celle qui joue
+        if self.audio.musique_actuelle == nom:
+            self.audio.arreter_musique()
+            self.audio.jouer_musique(nom)
+
+    def recharger_objets(self):
+        """
+        Recharge objets.py sans relancer le jeu. Les objets existants (ceux
+        des salles et des réserves) passent aux nouvelles classes sur place 
+        (voir Scene.changer_classe) : ils gardent tout leur état, et ce qui 
+        les référence (abonnés du bus, caméras, evenements en attente...) 
+        aussi. Les globales déclarées (le score) sont gardées, les autres 
+        reprennent leur valeur du fichier.
+
+        Une classe dont les __slots__ ont changé ne peut pas être changée 
+        sur place : les salles qui ont de ses objets sont alors sauvegardées
+        puis restaurées avec la nouvelle classe (voir Scene.sauvegarder), et
+        chaque objet y est remplacé par un nouvel objet dans le même état.
+
+        Si le module ne se charge pas, ou si le format d'état (FORMAT) d'une
+        de ses classes a changé, on revient à l'ancien module et l'erreur est
+        levée : un nouveau format demande de relancer le jeu.
+        """
+        scene = self.scene
+        scene.attendre_arriere_plan()
+        module = vars(objets)
+        ancien_module = dict(module)
+        anciennes_classes = dict(Objet.classes)
+        try:
+            importlib.reload(objets)
+            for nom, classe in anciennes_classes.items():
+                if classe.__module__ == objets.__name__ and Objet.classes[nom].FORMAT != classe.FORMAT:
+                    raise ValueError(f"le format de {nom} a changé, il faut relancer le jeu")
+        except Exception:
+            module.clear()
+            module.update(ancien_module)
+            Objet.classes.clear()
+            Objet.classes.update(anciennes_classes)
+            raise
+        # Nouvelle classe de chaque ancienne, et celles qui ne peuvent pas 
+        # être changées sur place
+        nouvelles = {
+            classe : Objet.classes[nom] for nom, classe in anciennes_classes.items()
+            if Objet.classes[nom] is not classe
+        }
+        incompatibles = {
+            ancienne for ancienne, nouvelle in nouvelles.items()
+            if disposition(ancienne) != disposition(nouvelle)
+        }
+        sauvegardes = {
+            salle : scene.sauvegarder(salle, aleatoire=False)
+            for salle, contenu in scene.salles.items()
+            if any(classe_de(objet) in incompatibles for objet in contenu)
+        }
+        for salle, donnees in sauvegardes.items():
+            scene.restaurer(donnees, salle)
+        for contenu in scene.salles.values():
+            for objet in contenu:
+                classe = classe_de(objet)
+                if classe in nouvelles:
+                    scene.changer_classe(objet, nouvelles[classe])
+        # Les objets en attente de recyclage passent aussi aux nouvelles 
+        # classes, sauf ceux des classes incompatibles, qui sont oubliés
+        morts = [objet for objet in scene.morts if classe_de(objet) not in incompatibles]
+        scene.morts.clear()
+        scene.morts.extend(morts)
+        for objet in morts:
+            if type(objet) in nouvelles:
+                scene.changer_classe(objet, nouvelles[type(objet)])
+        for classe, reserve in list(scene.reserves.items()):
+            if classe not in nouvelles:
+                continue
+            del scene.reserves[classe]
+            if classe not in incompatibles:
+                for objet in reserve.libres:
+                    scene.changer_classe(objet, nouvelles[classe])
+                reserve.classe = nouvelles[classe]
+                scene.reserves[reserve.classe] = reserve
+        # Les modules qui ont fait "from objets import *" (dont celui-ci) 
+        # passent aux nouvelles classes et fonctions
+        remplacees = {
+            nom : (ancienne, module[nom]) for nom, ancienne in ancien_module.items()
+            if getattr(ancienne, "__module__", None) == objets.__name__ and module.get(nom) is not ancienne
+        }
+        for autre in list(sys.modules.values()):
+            globales = getattr(autre, "__dict__", None)
+            if globales is None or autre is objets:
+                continue
+            for nom, (ancienne, nouvelle) in remplacees.items():
+                if globales.get(nom) is ancienne:
+                    globales[nom] = nouvelle
+
+    def dessiner(self, surface, position, z:float=0):
+        """
+        Demande à dessiner une surface pendant cette frame. Le dessin réel est
+        fait par rendre(), dans l'ordre des profondeurs z.
+        """
+        self.file_rendu.append((surface, position, z))
+
+    def dessiner_monde(self, surface, position, z:float=0):
+        """
+        Comme dessiner, mais la position est dans le monde de la salle : 
+        elle est ramenée à l'ecran par la caméra de la salle, s'il y en a une.
+        """
+        camera = self.scene.camera
+        if camera is not None:
+            position = (position[0] - camera.x, position[1] - camera.y)
+        self.file_rendu.append((surface, position, z))
+
+    def dessiner_fond(self, surface, position):
+        """
+        Dessine une partie du fond fixe de la salle. En rendu partiel, le 
+        fond n'est dessiné qu'à la première frame de la salle, puis restauré
+        zone par zone.
+        """
+        if not self.rendu_partiel:
+            self.dessiner(surface, position, Z_FOND)
+        elif self.fond_en_construction is not None:
+            self.fond_en_construction.blit(surface, position)
+            self.dessiner(surface, position, Z_FOND)
         
-    def lancer_transition(self, salle):
+    def lancer_transition(self, salle, style:str = "fondu"):
         """ 
-        Débute une transition
+        Débute une transition (style est une clé de transitions)
         """
         # Salle ou transitionner
         self.salle_cible = salle
+        self.transition = self.transitions[style]
+        # Ses ressources ont le temps de charger pendant la première moitié
+        self.ressources.precharger(salle)
         # Demarre l'horloge de transition (par défaut à -1 lorqu'il n'y a aucune transition)
         self.horloge_transition = 0
         
@@ -173,66 +886,170 @@ class Jeu:
         # Si l'horloge de transition est active
         if self.horloge_transition != -1:
             # On augmente celle-ci (limité à 1)
-            self.horloge_transition = min(self.horloge_transition + 0.01 * self.dt, 1)
-            # On affiche le rectangle transparant (qui est l'utilité même de la transition)
-            self.afficher_transition()
+            self.horloge_transition = min(self.horloge_transition + self.transition.vitesse * self.dt, 1)
+            # PS : le rectangle transparant (qui est l'utilité même de la 
+            # transition) est affiché par frame(), au moment du dessin.
+            # En rendu partiel, il faudra tout redessiner après la transition
+            self.tout_redessiner = True
             # A la moitié de la transition, on change de salle (car l'ecran est completement noir à la mi transition)
             if self.horloge_transition > 0.5:
                 self.scene.changer_salle(self.salle_cible)
-                if self.salle_cible == "jeu":
-                    self.jouer_son("jeu", 0)
             # Si on atteint 1, on arrête la transition
             if self.horloge_transition == 1:
                 self.horloge_transition = -1
+                if self.salle_cible == "jeu" and self.reessai_instantane:
+                    self.sauvegarde_jeu = self.scene.sauvegarder("jeu")
                 
     def afficher_transition(self):
         """  
         Cette méthode sert simplement à afficher le rectangle 
         transparant qui apparait lors des transitions.
         """
-        # On crée une nouvelle surface de la taille de l'ecran
-        surface = pygame.surface.Surface((1280, 720))
-        # On la rend noire
-        surface.fill((0, 0, 0))
-        # On définit sa transparance grâce à une courble gaussienne
-        surface.set_alpha(gaussienne_normalisee(self.horloge_transition) * 255)
-        # Enfin, on la dessine
-        self.dessiner(surface, (0, 0))
+        # La transition couvre tout l'ecran (rendu partiel)
+        self.plein_ecran = True
+        # Sa transparence (une courbe gaussienne par défaut) est lue dans la
+        # table précalculée de la transition
+        self.transition.afficher(self, self.horloge_transition)
         
     def generer_texte(self, texte:str, police:pygame.font.Font, taille:int,  gras:bool=False, antialias:bool=True, couleur:Tuple[int, int, int]=(0, 0, 0), fond=None):
         """
         Permet de générer une surface avec un texte inscrit dessus
+
+        Les surfaces sont gardées en cache : un même texte n'est rendu qu'une
+        fois tant qu'il reste dans le cache. La surface renvoyée est donc 
+        partagée, il ne faut pas la modifier.
         """
-        police_ = pygame.font.SysFont(police, taille, gras)
-        if fond == None:
-            return police_.render(texte, antialias, couleur)
-        else:
-            return police_.render(texte, antialias, couleur, fond)
+        if fond != None:
+            fond = tuple(fond)
+        cle = (texte, police, taille, gras, tuple(couleur), fond, antialias)
+        surface = self.textes.obtenir(cle)
+        if surface is None:
+            police_ = self.charger_police(police, taille, gras)
+            if fond == None:
+                surface = police_.render(texte, antialias, couleur)
+            else:
+                surface = police_.render(texte, antialias, couleur, fond)
+            self.textes.ajouter(cle, surface)
+        return surface
+
+    def variante(self, surface:pygame.Surface, taille:Tuple[float, float]=None, retourner_x:bool=False, retourner_y:bool=False):
+        """
+        Renvoie la surface redimensionnée à la taille demandée et/ou inversée
+        horizontalement (retourner_x) ou verticalement (retourner_y).
+
+        Le résultat est gardé en cache : à la frame suivante on renverra la 
+        même surface au lieu de refaire la transformation. Elle est partagée,
+        il ne faut donc pas la modifier.
+        """
+        if taille != None:
+            # La taille est arrondie au pas le plus proche (au moins un pas)
+            pas = self.pas_variantes
+            taille = (
+                max(pas, round(taille[0] / pas) * pas),
+                max(pas, round(taille[1] / pas) * pas)
+            )
+            if taille == surface.get_size():
+                taille = None
+        if taille == None and not (retourner_x or retourner_y):
+            return surface
+        # La surface fait elle même partie de la clé : tant qu'elle est en 
+        # cache, elle ne peut pas être détruite puis remplacée par une autre
+        cle = (surface, taille, retourner_x, retourner_y)
+        resultat = self.variantes.obtenir(cle)
+        if resultat is None:
+            resultat = surface
+            if taille != None:
+                resultat = pygame.transform.scale(resultat, taille)
+            if retourner_x or retourner_y:
+                resultat = pygame.transform.flip(resultat, retourner_x, retourner_y)
+            # On convertit au format de l'ecran pour des dessins plus rapides
+            resultat = resultat.convert_alpha()
+            self.variantes.ajouter(cle, resultat)
+        return resultat
+
+    def charger_police(self, nom:str, taille:int, gras:bool=False):
+        """
+        Renvoie la police demandée, qui n'est cherchée et chargée qu'une fois.
+        """
+        cle = (nom, taille, gras)
+        police = self.polices.obtenir(cle)
+        if police is None:
+            police = pygame.font.SysFont(nom, taille, gras)
+            self.polices.ajouter(cle, police)
+        return police
         
     def logique_curseur(self):
         """  
         Permet simplement de modifier le curseur de la souris selon 
         si un boutton la touche ou non. 
         """
+        # Il n'y a pas de curseur sans ecran
+        if self.sans_tete:
+            return
         if self.souris_sur_boutton:
             pygame.mouse.set_cursor(pygame.SYSTEM_CURSOR_HAND) # Curseur en mode "main"
         else: 
             pygame.mouse.set_cursor(pygame.SYSTEM_CURSOR_ARROW) # Curseur classique
             
+    def basculer_profileur(self):
+        """
+        Affiche ou cache le profileur. Il ne mesure que s'il est affiché ou
+        s'il écrit dans un fichier.
+        """
+        self.afficher_profil = not self.afficher_profil
+        self.profileur.actif = self.afficher_profil or self.profileur.fichier is not None
+        self.lignes_profil = []
+
+    def afficher_profileur(self):
+        """
+        Affiche, en haut à gauche, les phases les plus coûteuses avec leur 
+        médiane, p95 et maximum en millisecondes.
+        """
+        # Les textes ne sont regénérés que de temps en temps : les chiffres
+        # seraient illisibles, et chaque nouveau texte passe par le cache
+        if not self.lignes_profil or self.numero_frame % self.frames_profil == 0:
+            lignes = [f"{'phase':<24}{'p50':>8}{'p95':>8}{'max':>8}"]
+            for phase, duree in list(self.profileur.statistiques().items())[:14]:
+                lignes.append(f"{phase[:24]:<24}{duree['p50']:>8.2f}{duree['p95']:>8.2f}{duree['max']:>8.2f}")
+            camera = self.scene.camera
+            if camera is not None:
+                lignes.append(f"dessinees {camera.dessinees} | ecartees {camera.ecartees} | loin {camera.loin}")
+            self.lignes_profil = [
+                self.generer_texte(ligne, "couriernew", 18, couleur=(255, 255, 255), fond=(0, 0, 0)) 
+                for ligne in lignes
+            ]
+        for i, ligne in enumerate(self.lignes_profil):
+            self.dessiner(ligne, (10, 90 + i * 20), Z_DEBOGUAGE)
+
     def gerer_tremblement(self):
         # Si la transition est inactive
         if self.horloge_transition == -1:
             # On affiche le deuxieme ecran dans l'ecran principal à l'origine
             self.ecran_.blit(self.ecran, (0, 0))
         else:
-            # Sinon, on ajoute un décalage aléatoire qui provoque l'effet de tremblement
-            self.ecran_.blit(self.ecran, (random.randint(-5, 5), random.randint(-5, 5)))
+            # Sinon, on ajoute un décalage aléatoire qui provoque l'effet de 
+            # tremblement, d'amplitude donnée par la transition
+            amplitude = self.transition.amplitude(self.horloge_transition)
+            self.ecran_.blit(self.ecran, (self.aleatoire_visuel.randint(-amplitude, amplitude), self.aleatoire_visuel.randint(-amplitude, amplitude)))
         # PS : tout l'affichage du jeu est fait sur le deuxieme ecran "ecran"
         # qui est ensuite affiché dans l'ecran principal "ecran_"
         
-    def jouer_son(self, son, channel):
-        pygame.mixer.Channel(channel).play(self.sons[son])
+    def jouer_son(self, son:str, priorite:int = 0):
+        """
+        Joue un bruitage sur une des voix du mixeur (voir Mixeur.jouer).
+        """
+        self.audio.jouer(son, priorite)
+
+    def jouer_musique(self, musique:str):
+        self.audio.jouer_musique(musique)
+
+    def musique_salle(self, lot):
+        # Seul le dernier changement de salle de la frame compte
+        ancienne, nouvelle = lot[-1]
+        if nouvelle in self.audio.musiques:
+            self.jouer_musique(nouvelle)
             
             
 # Démarrage du jeu et de sa boucle.
-Jeu().boucle()
+if __name__ == "__main__":
+    Jeu().boucle()
@@ -2,6 +2,190 @@
 Fichier gérant toute la partie inhérente au moteur de jeu, gestion des objets,
 scènes, ...
 """
+import math, time, json, os, sys, glob, random, struct, hashlib, heapq, asyncio
+from array import array
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import *
+
+import pygame
+
+# numpy n'est utile qu'au moteur physique vectorisé, qui est optionnel
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Les fichiers de vagues peuvent aussi être écrits en TOML (Python 3.11+)
+try:
+    import tomllib
+except ImportError:
+    tomllib = None
+
+# Accélération de la gravité (par frame à 60 FPS)
+GRAVITE = 1.2
+
+# Profondeurs (z) de dessin particulières : le fond des salles tout en 
+# dessous, l'interface (score, ...) puis les transitions tout au dessus
+Z_FOND = -1
+Z_INTERFACE = 10
+Z_TRANSITION = 100
+# Les outils de déboguage (profileur) passent par dessus même les transitions
+Z_DEBOGUAGE = 1000
+
+
+def bits(masque:int):
+    """
+    Enumère les bits à 1 d'un masque d'etiquettes (voir Scene.bit_etiquette).
+    """
+    while masque:
+        bit = masque & -masque
+        yield bit
+        masque ^= bit
+
+
+def disposition(classe) -> tuple:
+    """
+    Les __slots__ de la classe et de chacune de ses mères. Deux classes de 
+    même disposition ont des objets interchangeables (voir 
+    Scene.changer_classe).
+    """
+    return tuple(vars(mere).get("__slots__") for mere in classe.__mro__)
+
+
+def classe_de(objet) -> type:
+    """
+    La classe de l'objet, sans la vue que lui donne un moteur physique le 
+    temps de son rattachement (voir MoteurPhysique.vue).
+    """
+    return getattr(objet, "classe_reelle", type(objet))
+
+
+class GrilleSpatiale:
+    """
+    Grille uniforme qui range les rectangles des objets par cellule, et par 
+    etiquette. Elle sert de "phase large" aux collisions : au lieu de tester
+    chaque boule contre chaque ennemi, on ne teste que les objets qui 
+    partagent une cellule.
+
+    La grille ne donne que des candidats, il reste à vérifier la collision 
+    exacte avec colliderect.
+    """
+    def __init__(self, taille_cellule:int = 128, marge:int = 64):
+        self.taille_cellule = taille_cellule
+        # Les objets bougent pendant la frame alors que la grille est 
+        # construite au début de celle-ci, on élargit donc les recherches
+        # d'une marge pour ne pas rater un objet qui aurait changé de cellule
+        self.marge = marge
+        # bit d'etiquette -> (colonne, ligne) -> liste d'objets
+        self.cellules = {}
+
+    def couvrir(self, rectangle):
+        """
+        Renvoie les coordonnées des cellules recouvertes par un rectangle.
+        """
+        t = self.taille_cellule
+        for colonne in range(rectangle.left // t, (rectangle.right - 1) // t + 1):
+            for ligne in range(rectangle.top // t, (rectangle.bottom - 1) // t + 1):
+                yield colonne, ligne
+
+    def reconstruire(self, objets):
+        """
+        Vide la grille puis y range tous les objets vivants qui ont un 
+        rectangle et au moins une etiquette.
+        """
+        self.cellules = {}
+        for objet in objets:
+            rectangle = objet.rectangle
+            if rectangle is None or not objet.vivant or not objet.masque:
+                continue
+            cellules = list(self.couvrir(rectangle))
+            for bit in bits(objet.masque):
+                grille = self.cellules.setdefault(bit, {})
+                for cellule in cellules:
+                    grille.setdefault(cellule, []).append(objet)
+
+    def candidats(self, rectangle, etiquette:str):
+        """
+        Renvoie les objets portant l'etiquette qui sont proches du rectangle.
+        """
+        grille = self.cellules.get(Scene.etiquettes.get(etiquette))
+        if not grille:
+            return []
+        objets = {}
+        for cellule in self.couvrir(rectangle.inflate(2 * self.marge, 2 * self.marge)):
+            for objet in grille.get(cellule, ()):
+                if objet.vivant:
+                    objets[objet] = None
+        return list(objets)
+
+    def paires(self, etiquette_a:str, etiquette_b:str):
+        """
+        Renvoie les paires (a, b) d'objets qui partagent au moins une cellule,
+        a portant etiquette_a et b etiquette_b. Chaque paire n'apparait qu'une
+        fois même si les objets ont plusieurs cellules en commun.
+        """
+        grille_a = self.cellules.get(Scene.etiquettes.get(etiquette_a), {})
+        grille_b = self.cellules.get(Scene.etiquettes.get(etiquette_b), {})
+        # On parcourt la grille la plus petite
+        if len(grille_b) < len(grille_a):
+            cellules = [c for c in grille_b if c in grille_a]
+        else:
+            cellules = [c for c in grille_a if c in grille_b]
+        paires = {}
+        for cellule in cellules:
+            for a in grille_a[cellule]:
+                if not a.vivant:
+                    continue
+                for b in grille_b[cellule]:
+                    if b is not a and b.vivant:
+                        paires[(a, b)] = None
+        return list(paires)
+
+
+class Silhouette:
+    """
+    Forme de collision d'un sprite, calculée une fois pour toutes à partir
+    de son image : le rectangle englobant de ses pixels visibles (relatif 
+    au coin de l'image) et le masque de ces pixels (pygame.mask), découpé 
+    à ce rectangle.
+
+    Le rectangle sert de premier test, très peu coûteux (voir Objet.touche) :
+    les masques ne sont comparés que si les rectangles se touchent.
+    """
+    __slots__ = ("rectangle", "pixels")
+
+    def __init__(self, image:pygame.Surface, seuil:int = 127):
+        pixels = pygame.mask.from_surface(image, seuil)
+        rectangles = pixels.get_bounding_rects()
+        if rectangles:
+            self.rectangle = rectangles[0].unionall(rectangles[1:])
+        else:
+            self.rectangle = pygame.Rect(0, 0, 0, 0)
+        # Le masque ne garde que le rectangle englobant : comparer deux 
+        # objets revient alors à décaler l'un de l'écart entre leurs rectangles
+        self.pixels = pygame.mask.Mask(self.rectangle.size)
+        self.pixels.draw(pixels, (-self.rectangle.x, -self.rectangle.y))
+
+    @classmethod
+    def variantes(cls, image:pygame.Surface):
+        """
+        Les silhouettes de l'image et de ses versions inversées, comme 
+        celles que renvoie Jeu.variante : (retourner_x, retourner_y) -> 
+        silhouette.
+        """
+        return {
+            (retourner_x, retourner_y) : cls(pygame.transform.flip(image, retourner_x, retourner_y))
+            for retourner_x in (False, True) for retourner_y in (False, True)
+        }
+
+    def placer(self, rectangle:pygame.Rect, x:float, y:float):
+        """
+        Place le rectangle de collision d'un objet dont l'image est dessinée
+        en (x, y). Comme au dessin, la position de l'image est tronquée au
+        pixel.
+        """
+        rectangle.update(int(x) + self.rectangle.x, int(y) + self.rectangle.y, self.rectangle.w, self.rectangle.h)
 
 
 class Scene:
@@ -12,41 +196,427 @@ class Scene:
     Elle se comporte comme un dictionnaire où chaque clé représente le nom 
     d'une salle, et sa valeur associée, la liste des objets présentes dans la 
     salle.
+
+    Les noms d'etiquettes sont enregistrés une fois pour toutes dans le 
+    registre Scene.etiquettes qui associe à chacun un bit : les etiquettes
+    d'un objet ne sont alors qu'un entier (son masque), et tester une 
+    etiquette revient à un ET binaire.
+
+    En plus de la salle courante, d'autres salles peuvent continuer à vivre
+    en arrière plan (voir activer_salle) : elles sont actualisées moins 
+    souvent, sans être dessinées, éventuellement sur un fil d'execution à 
+    part (voir activer_travailleur).
+
+    L'état d'une salle peut être sauvegardé dans un format binaire compact
+    puis restauré (voir sauvegarder et restaurer).
+
+    Une salle peut avoir une caméra (voir Camera et cameras) : ses entitées
+    hors de la vue ne sont pas dessinées, et celles qui en sont loin peuvent
+    n'être actualisées que sommairement.
+
+    Les objets se préviennent entre eux grâce à un bus d'evenements (voir 
+    publier) plutôt qu'en parcourant les salles ou en modifiant des 
+    variables globales. Les types d'evenements du moteur et du jeu sont :
+    - "touche" (cible, auteur) : une collision qui a des conséquences
+    - "mort" (objet) : un objet vient d'être tué
+    - "score" (score) et "mana" (balles) : le score ou le mana ont changé
+    - "salle" (ancienne, nouvelle) : la salle courante a changé
+
+    Du code qui ne tourne pas pendant la frame (une tâche asyncio, voir 
+    Ordonnanceur, ou un autre fil d'execution) ne touche pas aux salles 
+    directement : il demande à la scène de le faire au début de la frame 
+    suivante (voir differer).
     """
+    # Registre des etiquettes : nom -> bit, et la liste des noms dans l'ordre
+    etiquettes = {}
+    noms_etiquettes = []
+    # Variables globales sauvegardées avec les salles : 
+    # "module.nom" -> (module, nom, format struct)
+    globales = {}
+
+    @classmethod
+    def bit_etiquette(cls, nom:str) -> int:
+        """
+        Renvoie le bit associé à une etiquette, en l'enregistrant si besoin.
+        """
+        bit = cls.etiquettes.get(nom)
+        if bit is None:
+            bit = cls.etiquettes[nom] = 1 << len(cls.noms_etiquettes)
+            cls.noms_etiquettes.append(nom)
+        return bit
+
+    @classmethod
+    def declarer_globale(cls, module:str, nom:str, format:str):
+        """
+        Ajoute une variable globale d'un module (par exemple le score) à ce
+        qui est sauvegardé avec les salles. format est un code du module 
+        struct ("q" pour un entier, "d" pour un flottant, ...).
+        """
+        cls.globales[f"{module}.{nom}"] = (module, nom, format)
+
     def __init__(self, jeu):
         self.jeu = jeu 
         # Initialisation des salles
         self.salles = {"defaut" : []}
         self.salle_actuelle = "defaut"
+        # Index des etiquettes : pour chaque salle, on associe à chaque 
+        # etiquette (son bit) les objets qui la portent. Un dictionnaire (dont les 
+        # valeurs sont ignorées) sert d'ensemble ordonné, ce qui conserve 
+        # l'ordre d'insertion des objets comme le faisait l'ancien parcours.
+        self.index = {"defaut" : {}}
+        # Grille de collisions de chaque salle, reconstruite à chaque 
+        # actualisation de la salle
+        self.grilles = {"defaut" : GrilleSpatiale()}
+        # Moteurs physiques vectorisés des salles qui en ont un (optionnel)
+        self.physiques = {}
+        # Réserves d'objets recyclés, une par classe (voir creer)
+        self.reserves = {}
+        # Delta time de la salle en cours d'actualisation (celui du jeu pour
+        # la salle courante, plus grand pour les salles en arrière plan)
+        self.dt = 0
+        # Salles actualisées en arrière plan, avec leur période (en pas)
+        self.salles_actives = {}
+        self.pas = 0
+        # Fil d'execution des salles en arrière plan (None : elles sont 
+        # actualisées dans le fil principal) et son travail en cours
+        self.executeur = None
+        self.en_cours = None
+        self.duree_arriere_plan = 0
+        # Bus d'evenements : ceux en attente de distribution (une deque, à 
+        # laquelle le fil des salles en arrière plan peut aussi ajouter) et
+        # les abonnés de chaque type (un dictionnaire sert d'ensemble ordonné)
+        self.evenements = deque()
+        self.abonnes = {}
+        # Travail demandé pour la prochaine frame (voir differer)
+        self.differes = deque()
+        # Morts qui attendent la fin de la distribution pour retourner à leur
+        # réserve (voir retirer_morts et distribuer)
+        self.morts = deque()
+        # Caméras des salles qui en ont une (voir Camera)
+        self.cameras = {}
+
+    @property
+    def grille(self):
+        """
+        Grille de collisions de la salle courante.
+        """
+        return self.grilles[self.salle_actuelle]
+
+    @property
+    def camera(self):
+        """
+        Caméra de la salle courante (None si elle n'en a pas).
+        """
+        return self.cameras.get(self.salle_actuelle)
 
     def actualiser(self):
         """
-        Actualise la salle courante et donc tous les objets qui s'y trouvent
+        Actualise la salle courante et donc tous les objets qui s'y trouvent,
+        puis lance l'actualisation des salles en arrière plan qui en ont 
+        besoin à ce pas. Rien n'est dessiné ici (voir dessiner).
         """
-        # Actualisation des objets
-        for objet in self.salles[self.salle_actuelle]:
-            objet.actualiser(self)
+        # Les salles en arrière plan du pas précédent doivent avoir fini
+        self.attendre_arriere_plan()
+        self.pas += 1
+        self.actualiser_salle(self.salle_actuelle, self.jeu.dt, self.jeu.profileur)
+
+        # Une salle en arrière plan n'est actualisée qu'une fois tous les 
+        # "periode" pas, mais de periode pas d'un coup (voir 
+        # actualiser_arriere_plan), et seulement s'il y reste des entitées
+        salles = [
+            (salle, self.jeu.dt, periode) for salle, periode in self.salles_actives.items()
+            if salle != self.salle_actuelle and self.pas % periode == 0 and self.a_des_entitees(salle)
+        ]
+        if salles:
+            if self.executeur is None:
+                self.actualiser_arriere_plan(salles)
+                self.noter_arriere_plan()
+            else:
+                self.en_cours = self.executeur.submit(self.actualiser_arriere_plan, salles)
+
+    def actualiser_salle(self, salle:str, dt:float, profileur = None):
+        """
+        Actualise une salle (logique seulement). Le profileur, s'il est 
+        donné et actif, chronomètre chaque phase.
+        """
+        chronometrer = profileur is not None and profileur.actif
+        if chronometrer:
+            debut = time.perf_counter_ns()
+        self.dt = dt
+
+        # On range les rectangles de la frame précédente dans la grille, 
+        # les objets pourront ensuite l'interroger pendant leur actualisation
+        self.grilles[salle].reconstruire(self.salles[salle])
+        if chronometrer:
+            debut = profileur.noter("grille", debut)
+
+        # Si la salle a un moteur physique, toutes les entitées avancent d'un coup
+        physique = self.physiques.get(salle)
+        if physique is not None:
+            physique.etape(dt)
+            if chronometrer:
+                profileur.noter("physique", debut)
+
+        # Actualisation des objets (logique seulement). Avec une caméra qui 
+        # le permet, les entitées loin de la vue n'ont droit qu'à une 
+        # actualisation réduite (voir Entitee.actualiser_loin)
+        camera = self.cameras.get(salle)
+        zone = None if camera is None else camera.zone_actualisation()
+        if zone is not None:
+            loin = 0
+            for objet in self.salles[salle]:
+                if isinstance(objet, Entitee) and not zone.collidepoint(objet.x, objet.y):
+                    loin += 1
+                    if chronometrer:
+                        debut = time.perf_counter_ns()
+                        objet.actualiser_loin(self)
+                        profileur.ajouter("loin " + type(objet).__name__, time.perf_counter_ns() - debut)
+                    else:
+                        objet.actualiser_loin(self)
+                elif chronometrer:
+                    debut = time.perf_counter_ns()
+                    objet.actualiser(self)
+                    profileur.ajouter("logique " + type(objet).__name__, time.perf_counter_ns() - debut)
+                else:
+                    objet.actualiser(self)
+            camera.loin = loin
+        elif chronometrer:
+            # Même boucle, mais chaque objet est chronométré (par classe)
+            for objet in self.salles[salle]:
+                debut = time.perf_counter_ns()
+                objet.actualiser(self)
+                profileur.ajouter("logique " + type(objet).__name__, time.perf_counter_ns() - debut)
+        else:
+            for objet in self.salles[salle]:
+                objet.actualiser(self)
         
-        # Filtrage des objets de la salle pour ne garder que ceux vivants
-        self.salles[self.salle_actuelle] = list(filter(lambda objet : objet.vivant, self.salles[self.salle_actuelle]))
+        self.retirer_morts(salle)
+
+    def abonner(self, type:str, fonction:Callable):
+        """
+        fonction(lot) sera appelée à chaque distribution où des evenements
+        de ce type ont été publiés, avec la liste de leurs données (voir 
+        distribuer).
+        """
+        self.abonnes.setdefault(type, {})[fonction] = None
+
+    def desabonner(self, type:str, fonction:Callable):
+        abonnes = self.abonnes.get(type)
+        if abonnes is not None:
+            abonnes.pop(fonction, None)
+
+    def publier(self, type:str, *donnees):
+        """
+        Publie un evenement. Il n'est pas livré tout de suite mais à la 
+        prochaine distribution, avec tous ceux du même type. Un evenement 
+        qui n'a pas d'abonné est ignoré immédiatement.
+        """
+        if self.abonnes.get(type):
+            self.evenements.append((type, donnees))
+
+    def differer(self, fonction:Callable, *arguments):
+        """
+        Demande l'execution de fonction(*arguments) au début de la prochaine
+        frame, sur le fil du jeu (voir executer_differes). deque.append 
+        étant atomique, on peut le faire depuis n'importe quel fil.
+        """
+        self.differes.append((fonction, arguments))
+
+    def executer_differes(self):
+        """
+        Execute le travail demandé avec differer, dans l'ordre des demandes.
+        Ce qui est demandé pendant l'execution attend la frame suivante.
+        """
+        differes = self.differes
+        if not differes:
+            return
+        self.attendre_arriere_plan()
+        for _ in range(len(differes)):
+            fonction, arguments = differes.popleft()
+            fonction(*arguments)
+
+    def distribuer(self):
+        """
+        Livre les evenements en attente (une fois par frame, voir Jeu.frame):
+        chaque abonné reçoit en une fois le lot des evenements de son type, 
+        dans l'ordre de publication. Ceux publiés pendant la distribution 
+        sont livrés dans la foulée.
+
+        Ensuite, les objets morts avant la distribution retournent à leur 
+        réserve : aucun evenement livré ne parle ainsi d'un objet déjà 
+        réutilisé. Un abonné qui garde un objet au dela de la distribution
+        doit vérifier qu'il est encore vivant.
+        """
+        evenements = self.evenements
+        # Ceux qui meurent en arrière plan pendant la distribution attendent
+        # la suivante, comme leurs evenements
+        morts = len(self.morts)
+        if evenements:
+            # Les abonnés peuvent modifier les salles en arrière plan
+            self.attendre_arriere_plan()
+            while evenements:
+                lots = {}
+                for _ in range(len(evenements)):
+                    type, donnees = evenements.popleft()
+                    lots.setdefault(type, []).append(donnees)
+                for type, lot in lots.items():
+                    # Copie : un abonné peut en désabonner un autre (en le tuant)
+                    for fonction in list(self.abonnes.get(type, ())):
+                        fonction(lot)
+        self.rendre_morts(morts)
+
+    def retirer_morts(self, salle:str):
+        """
+        Filtrage des objets de la salle pour ne garder que ceux vivants.
+        La liste est compactée sur place : les vivants sont décalés vers le
+        début puis on coupe la fin, sans créer de nouvelle liste.
+        """
+        objets = self.salles[salle]
+        i = 0
+        for objet in objets:
+            if objet.vivant:
+                objets[i] = objet
+                i += 1
+            else:
+                # Normalement déjà fait par tuer(), mais on s'assure 
+                # qu'aucun mort ne reste dans l'index
+                self.desindexer(objet)
+                # On libère aussi sa place dans le moteur physique
+                if isinstance(objet, Entitee) and objet.physique is not None:
+                    objet.physique.detacher(objet)
+                # Et s'il vient d'une réserve, il y retournera après la 
+                # distribution (des evenements peuvent encore parler de lui)
+                if objet.reserve is not None:
+                    self.morts.append(objet)
+        del objets[i:]
+
+    def rendre_morts(self, nombre:int):
+        """
+        Rend à leur réserve les nombre premiers objets morts en attente (voir
+        retirer_morts). Ils peuvent alors être réutilisés par creer.
+        """
+        morts = self.morts
+        for _ in range(nombre):
+            objet = morts.popleft()
+            objet.reserve.rendre(objet)
+
+    def actualiser_arriere_plan(self, salles):
+        """
+        Actualise les salles en arrière plan : periode pas du delta time du
+        premier plan, à la suite. Un seul pas de periode fois le delta time
+        ferait sauter aux objets plus que la marge de la grille (les 
+        collisions seraient ratées), et changerait les probabilités par pas
+        (les sauts des ennemis). Peut tourner sur le fil du travailleur.
+        """
+        debut = time.perf_counter_ns()
+        for salle, dt, periode in salles:
+            for _ in range(periode):
+                self.actualiser_salle(salle, dt)
+        self.duree_arriere_plan = time.perf_counter_ns() - debut
+
+    def attendre_arriere_plan(self):
+        """
+        Attend que le travailleur ait fini d'actualiser les salles en arrière
+        plan. Ensuite, et jusqu'au prochain actualiser(), on peut toucher à 
+        toutes les salles sans risque.
+        """
+        if self.en_cours is None:
+            return
+        en_cours, self.en_cours = self.en_cours, None
+        # Une erreur levée dans le travailleur est relevée ici
+        en_cours.result()
+        self.noter_arriere_plan()
+
+    def noter_arriere_plan(self):
+        if self.jeu.profileur.actif:
+            self.jeu.profileur.ajouter("arriere plan", self.duree_arriere_plan)
+
+    def activer_salle(self, salle:str, periode:int = 1):
+        """
+        Garde une salle active quand elle n'est pas la salle courante : elle
+        sera actualisée (sans être dessinée) une fois tous les periode pas,
+        de periode pas d'un coup. Elle évolue donc exactement comme au 
+        premier plan, par paquets : avec le travailleur, chaque paquet est
+        calculé pendant le dessin.
+        """
+        self.salles_actives[salle] = periode
+
+    def desactiver_salle(self, salle:str):
+        self.attendre_arriere_plan()
+        self.salles_actives.pop(salle, None)
+
+    def activer_travailleur(self):
+        """
+        Les salles en arrière plan seront actualisées sur un fil d'execution
+        à part, pendant que le fil principal dessine la salle courante. Le
+        jeu doit appeler attendre_arriere_plan avant de toucher à une autre
+        salle que la salle courante (changer_salle le fait).
+        """
+        if self.executeur is None:
+            self.executeur = ThreadPoolExecutor(1, thread_name_prefix="arriere-plan")
+
+    def a_des_entitees(self, salle:str) -> bool:
+        for objet in self.salles[salle]:
+            if objet.vivant and isinstance(objet, Entitee):
+                return True
+        return False
+
+    def dessiner(self):
+        """
+        Dessin des objets de la salle courante : ils ne dessinent pas 
+        directement mais confient leurs images au jeu, qui les trie par 
+        profondeur. 
+
+        Le jeu peut actualiser la scène plusieurs fois (ou pas du tout) 
+        entre deux dessins.
+
+        Si la salle a une caméra, les entitées dont le rectangle est hors de
+        la vue ne sont pas dessinées du tout.
+        """
+        camera = self.camera
+        if camera is None:
+            for objet in self.salles[self.salle_actuelle]:
+                objet.dessiner()
+            return
+        vue = camera.zone_dessin()
+        dessinees = ecartees = 0
+        for objet in self.salles[self.salle_actuelle]:
+            if isinstance(objet, Entitee) and objet.rectangle is not None:
+                if not vue.colliderect(objet.rectangle):
+                    ecartees += 1
+                    continue
+                dessinees += 1
+            objet.dessiner()
+        camera.dessinees = dessinees
+        camera.ecartees = ecartees
                 
     def filtrer(self, etiquette:str, salle:str = None): 
         """
         Permet de filtrer les objets présents dans une salle en fonction d'une
         etiquette demandée.
+
+        Grâce à l'index, on ne parcourt que les objets qui portent l'etiquette
+        et non toute la salle. Les objets tués ne sont plus retournés, même 
+        avant la fin de la frame.
         """
         # Si la salle n'est pas précisé, on ciblera la salle courante
         if salle == None:
             salle = self.salle_actuelle
 
-        # On récupère les objets qui ont l'etiquette recherchée
-        objets = []
-        for objet in self.salles[salle]:
-            if etiquette in objet.etiquettes:
-                objets.append(objet)
-                
-        # Avant de les retourner
-        return objets
+        # On renvoie une copie pour que l'appelant puisse tuer des objets
+        # pendant qu'il parcourt la liste
+        return list(self.index[salle].get(Scene.etiquettes.get(etiquette), ()))
+
+    def trouver(self, etiquette:str, salle:str = None):
+        """
+        Renvoie le premier objet portant l'etiquette (ou None s'il n'y en a
+        aucun). Pratique pour les etiquettes uniques comme "joueur".
+        """
+        if salle == None:
+            salle = self.salle_actuelle
+        for objet in self.index[salle].get(Scene.etiquettes.get(etiquette), ()):
+            return objet
+        return None
     
     def lier(self, objet, salle:str=None):
         """
@@ -55,32 +625,384 @@ class Scene:
         if salle == None:
             salle = self.salle_actuelle
         self.salles[salle].append(objet)
+        # L'objet retient sa salle pour pouvoir mettre l'index à jour
+        # lorsqu'il gagne une etiquette ou qu'il meurt
+        objet.scene = self
+        objet.salle = salle
+        if objet.vivant:
+            for bit in bits(objet.masque):
+                self.indexer(objet, bit)
+            for type, methode in objet.abonnements.items():
+                self.abonner(type, getattr(objet, methode))
+        physique = self.physiques.get(salle)
+        if physique is not None and isinstance(objet, Entitee):
+            physique.attacher(objet)
+
+    def changer_classe(self, objet, classe):
+        """
+        Fait passer un objet à une autre classe de même disposition (mêmes
+        __slots__), par exemple la même classe rechargée, sans toucher à 
+        son état. S'il est vivant dans la scène, ses abonnements au bus 
+        sont refaits avec les méthodes de la nouvelle classe.
+        """
+        lie = objet.scene is self and objet.vivant
+        if lie:
+            for type, methode in objet.abonnements.items():
+                self.desabonner(type, getattr(objet, methode))
+        # Une entitée rattachée à un moteur physique passe à la vue de sa
+        # nouvelle classe
+        if isinstance(objet, Entitee) and objet.physique is not None:
+            classe = MoteurPhysique.vue(classe)
+        objet.__class__ = classe
+        if lie:
+            for type, methode in objet.abonnements.items():
+                self.abonner(type, getattr(objet, methode))
+
+    def creer(self, classe, *arguments, **options):
+        """
+        Crée un objet de la classe demandée, en recyclant si possible un 
+        objet mort de la même classe plutôt que d'en allouer un nouveau. 
+        Les arguments sont ceux du constructeur de la classe.
+
+        L'objet doit ensuite être lié à une salle comme n'importe quel autre.
+        """
+        reserve = self.reserves.get(classe)
+        if reserve is None:
+            reserve = self.reserves[classe] = Reserve(classe)
+        return reserve.obtenir(*arguments, **options)
+
+    def statistiques_reserves(self):
+        return {classe.__name__ : reserve.statistiques() for classe, reserve in self.reserves.items()}
+
+    def activer_physique(self, salle:str = None, capacite:int = 64):
+        """
+        Donne à une salle un moteur physique vectorisé (voir MoteurPhysique).
+        Les entitées déjà présentes y sont rattachées.
+
+        Renvoie False si numpy n'est pas installé, la salle garde alors la
+        physique classique, objet par objet.
+        """
+        if numpy is None:
+            return False
+        if salle == None:
+            salle = self.salle_actuelle
+        if salle not in self.physiques:
+            physique = MoteurPhysique(capacite)
+            self.physiques[salle] = physique
+            for objet in self.salles[salle]:
+                if isinstance(objet, Entitee) and objet.vivant:
+                    physique.attacher(objet)
+        return True
+
+    def indexer(self, objet, bit:int):
+        """
+        Ajoute un objet à l'index de sa salle pour une etiquette (son bit).
+        """
+        self.index[objet.salle].setdefault(bit, {})[objet] = None
+
+    def desindexer(self, objet):
+        """
+        Retire un objet de l'index de sa salle, pour toutes ses etiquettes.
+        """
+        index = self.index[objet.salle]
+        for bit in bits(objet.masque):
+            objets = index.get(bit)
+            if objets is not None:
+                objets.pop(objet, None)
+        # Un objet mort ne reçoit plus d'evenements
+        for type, methode in objet.abonnements.items():
+            self.desabonner(type, getattr(objet, methode))
         
+    def sauvegarder(self, salle:str = None, aleatoire:bool = True) -> bytes:
+        """
+        Renvoie l'état de la salle (la salle courante par défaut) sous forme
+        binaire : chaque objet vivant, dans l'ordre de la salle, écrit avec 
+        le format de sa classe (voir Objet.FORMAT), les variables globales 
+        déclarées et, si aleatoire est vrai, l'état du module random.
+
+        Disposition :
+        - entête : "SCN1", nombre d'etiquettes, de classes, de globales et 
+          d'objets, puis les noms des etiquettes (dans l'ordre des bits), des
+          classes et des globales
+        - les valeurs des globales, l'état du générateur aléatoire
+        - un octet par objet : l'indice de sa classe
+        - l'état de chaque objet, à la suite
+        """
+        if salle is None:
+            salle = self.salle_actuelle
+        classes = {}
+        indices = array("B")
+        etats = []
+        for objet in self.salles[salle]:
+            if not objet.vivant:
+                continue
+            classe = classe_de(objet)
+            indice = classes.get(classe)
+            if indice is None:
+                indice = classes[classe] = len(classes)
+            indices.append(indice)
+            etats.append(classe.structure.pack(*objet.etat()))
+
+        globales = list(Scene.globales.values())
+        morceaux = [
+            b"SCN1", 
+            struct.pack("<HHHI", len(Scene.noms_etiquettes), len(classes), len(globales), len(indices))
+        ]
+        for nom in Scene.noms_etiquettes + [classe.__name__ for classe in classes] + list(Scene.globales):
+            nom = nom.encode()
+            morceaux.append(struct.pack("<B", len(nom)) + nom)
+        for module, nom, format in globales:
+            morceaux.append(struct.pack("<" + format, getattr(sys.modules[module], nom)))
+        if aleatoire:
+            version, interne, gauss = random.getstate()
+            morceaux.append(struct.pack("<?B625I?d", True, version, *interne, gauss is not None, gauss or 0))
+        else:
+            morceaux.append(struct.pack("<?", False))
+        morceaux.append(indices.tobytes())
+        morceaux.extend(etats)
+        return b"".join(morceaux)
+
+    def restaurer(self, donnees:bytes, salle:str = None):
+        """
+        Remplace le contenu de la salle (la salle courante par défaut) par 
+        une sauvegarde faite avec sauvegarder. Les objets actuels de la salle
+        sont retirés (et rendus à leur réserve), les nouveaux sont pris dans
+        les réserves si possible.
+        """
+        if salle is None:
+            salle = self.salle_actuelle
+        if donnees[:4] != b"SCN1":
+            raise ValueError("Ce n'est pas une sauvegarde de salle")
+        self.attendre_arriere_plan()
+        nb_etiquettes, nb_classes, nb_globales, nb_objets = struct.unpack_from("<HHHI", donnees, 4)
+        position = 14
+        noms = []
+        for _ in range(nb_etiquettes + nb_classes + nb_globales):
+            longueur = donnees[position]
+            noms.append(donnees[position + 1 : position + 1 + longueur].decode())
+            position += 1 + longueur
+        etiquettes = noms[:nb_etiquettes]
+        classes = [Objet.classes[nom] for nom in noms[nb_etiquettes : nb_etiquettes + nb_classes]]
+
+        # Les bits des etiquettes dépendent de l'ordre dans lequel elles ont
+        # été enregistrées : si la sauvegarde vient d'une autre partie, on
+        # traduit les masques
+        conversion = None
+        if etiquettes != Scene.noms_etiquettes[:nb_etiquettes]:
+            conversion = [Scene.bit_etiquette(nom) for nom in etiquettes]
+
+        for cle in noms[nb_etiquettes + nb_classes:]:
+            module, nom, format = Scene.globales[cle]
+            valeur, = struct.unpack_from("<" + format, donnees, position)
+            setattr(sys.modules[module], nom, valeur)
+            position += struct.calcsize("<" + format)
+        if donnees[position]:
+            version, *interne, a_gauss, gauss = struct.unpack_from("<B625I?d", donnees, position + 1)
+            random.setstate((version, tuple(interne), gauss if a_gauss else None))
+            position += struct.calcsize("<?B625I?d")
+        else:
+            position += 1
+        indices = donnees[position : position + nb_objets]
+        position += nb_objets
+
+        # On vide la salle. Son moteur physique, s'il y en a un, est vidé 
+        # d'un coup puis rempli d'un coup une fois les objets restaurés
+        physique = self.physiques.pop(salle, None)
+        if physique is not None:
+            physique.vider()
+        for objet in self.salles[salle]:
+            objet.tuer()
+        self.retirer_morts(salle)
+        # Les evenements en attente qui parlent d'objets de la salle sont 
+        # oubliés (ces objets n'existent plus), ceux des autres salles sont 
+        # gardés. Les morts de la salle peuvent alors retourner tout de 
+        # suite à leur réserve.
+        evenements = [
+            (type, donnees) for type, donnees in self.evenements
+            if not any(isinstance(donnee, Objet) and donnee.salle == salle for donnee in donnees)
+        ]
+        self.evenements.clear()
+        self.evenements.extend(evenements)
+        morts = deque()
+        for objet in self.morts:
+            if objet.salle == salle:
+                objet.reserve.rendre(objet)
+            else:
+                morts.append(objet)
+        self.morts = morts
+
+        for indice in indices:
+            classe = classes[indice]
+            valeurs = classe.structure.unpack_from(donnees, position)
+            position += classe.structure.size
+            reserve = self.reserves.get(classe)
+            if reserve is None:
+                reserve = self.reserves[classe] = Reserve(classe)
+            objet = reserve.libres.pop() if reserve.libres else classe.__new__(classe)
+            objet.restaurer(self.jeu, valeurs)
+            objet.reserve = reserve
+            if conversion is not None:
+                objet.masque = sum(conversion[i] for i in range(nb_etiquettes) if objet.masque >> i & 1)
+            self.lier(objet, salle)
+        if physique is not None:
+            self.physiques[salle] = physique
+            physique.attacher_tous([objet for objet in self.salles[salle] if isinstance(objet, Entitee)])
+
     def nouvelle_salle(self, nom:str):
         self.salles[nom] = []
+        self.index[nom] = {}
+        self.grilles[nom] = GrilleSpatiale()
         
     def changer_salle(self, nom:str):
+        self.attendre_arriere_plan()
+        if nom != self.salle_actuelle:
+            self.publier("salle", self.salle_actuelle, nom)
         self.salle_actuelle = nom
+        # Les ressources de la salle sont chargées si ce n'est pas déjà fait
+        self.jeu.ressources.precharger(nom)
     
 
 class Objet:
     """
     Cette classe, qui a vocation à être héritée, définit 
     les composantes de base d'un objet dans le moteur de jeu.
+
+    Les objets utilisent __slots__ : ils n'ont pas de __dict__, ce qui les
+    rend bien plus légers en mémoire. En contrepartie, chaque classe fille
+    doit déclarer dans ses __slots__ les attributs qu'elle ajoute.
     """
+    __slots__ = ("jeu", "z_pos", "vivant", "masque", "rectangle", "silhouette", "scene", "salle", "reserve")
+
+    # Etat binaire (voir Scene.sauvegarder) : FORMAT est le format struct 
+    # des valeurs renvoyées par etat(), et relues par restaurer(). Chaque 
+    # classe fille qui ajoute des attributs complète le format de sa mère,
+    # sans nombre de répétitions (sauf pour les textes : "8s").
+    # Ici : profondeur, masque, puis le rectangle (existe-t-il, x, y, l, h)
+    FORMAT = "dQ?iiii"
+    # Toutes les classes d'objets, par nom (pour relire les sauvegardes)
+    classes = {}
+    # Evenements reçus par les objets de la classe : type -> nom de la 
+    # méthode appelée avec le lot (voir Scene.publier)
+    abonnements = {}
+
+    def __init_subclass__(cls, **options):
+        super().__init_subclass__(**options)
+        # Les vues du moteur physique portent le nom de leur classe, mais ne
+        # doivent pas la remplacer
+        if "classe_reelle" not in vars(cls):
+            Objet.classes[cls.__name__] = cls
+        cls.structure = struct.Struct("<" + cls.FORMAT)
+
     def __init__(self, jeu, z_pos:float=0):
+        # Rectangle de collision (None si l'objet n'en a pas)
+        self.rectangle = None
+        # Appel explicite : chaque classe a son _initialiser, pour ses 
+        # propres attributs et avec ses propres arguments
+        Objet._initialiser(self, jeu, z_pos)
+
+    def _initialiser(self, jeu, z_pos:float):
+        """
+        Remise à zéro des attributs d'Objet, sauf le rectangle : commune à 
+        __init__ et aux reinitialiser qui gardent ce dernier.
+        """
         self.jeu = jeu
         self.z_pos = z_pos
         self.vivant = True 
-        # Les etiquettes sont des textes qui permettent d'identifier les objets
-        self.etiquettes = set({})
+        # Les etiquettes sont des textes qui permettent d'identifier les objets.
+        # On ne stocke que leurs bits, réunis dans un masque (voir Scene)
+        self.masque = 0
+        # Silhouette pour des collisions au pixel près (None : le rectangle 
+        # suffit)
+        self.silhouette = None
+        # Scène et salle auxquelles l'objet est lié (renseignées par Scene.lier)
+        self.scene = None
+        self.salle = None
+        # Réserve d'où vient l'objet, s'il est recyclable (voir Scene.creer)
+        self.reserve = None
+
+    def etat(self) -> tuple:
+        """
+        Valeurs qui décrivent l'objet, dans l'ordre de FORMAT. Les classes
+        filles ajoutent les leurs à la suite de celles de leur mère.
+        """
+        rectangle = self.rectangle
+        if rectangle is None:
+            return (self.z_pos, self.masque, False, 0, 0, 0, 0)
+        return (self.z_pos, self.masque, True, rectangle.x, rectangle.y, rectangle.w, rectangle.h)
+
+    def restaurer(self, jeu, valeurs:tuple) -> int:
+        """
+        Inverse de etat() : remet l'objet (qui peut sortir de __new__, ou 
+        d'une réserve) dans l'état décrit par les valeurs. Tous les 
+        attributs doivent être donnés. Renvoie l'indice de la première 
+        valeur qui n'a pas été lue, pour les classes filles.
+        """
+        self.jeu = jeu
+        self.z_pos, self.masque, a_rectangle, x, y, l, h = valeurs[:7]
+        self.rectangle = pygame.Rect(x, y, l, h) if a_rectangle else None
+        self.silhouette = None
+        self.vivant = True
+        self.scene = None
+        self.salle = None
+        self.reserve = None
+        return 7
+
+    def reinitialiser(self, *arguments, **options):
+        """
+        Remet à neuf un objet mort pour le réutiliser (voir Reserve). Par 
+        défaut, on rappelle simplement le constructeur avec les nouveaux 
+        arguments, ce qui réalloue ce qu'il crée (son rectangle par exemple).
+        Les classes souvent recyclées la redéfinissent pour tout remettre à
+        zéro sur place (voir Entitee.reinitialiser).
+        """
+        self.__init__(*arguments, **options)
+        
+    @property
+    def etiquettes(self):
+        """
+        Les noms des etiquettes de l'objet (reconstruits à partir du masque).
+        """
+        return {Scene.noms_etiquettes[bit.bit_length() - 1] for bit in bits(self.masque)}
+
+    def a_etiquette(self, etiquette:str) -> bool:
+        return bool(self.masque & Scene.etiquettes.get(etiquette, 0))
         
     def ajouter_etiquette(self, etiquette:str):
         # Le nom de cette methode est très explicite
-        self.etiquettes.add(etiquette)
+        bit = Scene.bit_etiquette(etiquette)
+        if self.masque & bit:
+            return
+        self.masque |= bit
+        # On tient l'index de la scène à jour
+        if self.scene is not None and self.vivant:
+            self.scene.indexer(self, bit)
         
+    def touche(self, autre) -> bool:
+        """
+        Vrai si les deux objets se touchent. Les rectangles sont comparés
+        d'abord, et seulement s'ils se touchent, les silhouettes (au pixel
+        près) si les deux objets en ont une.
+        """
+        if not self.rectangle.colliderect(autre.rectangle):
+            return False
+        if self.silhouette is None or autre.silhouette is None:
+            return True
+        decalage = (autre.rectangle.x - self.rectangle.x, autre.rectangle.y - self.rectangle.y)
+        return self.silhouette.pixels.overlap(autre.silhouette.pixels, decalage) is not None
+
+    def au_premier_plan(self) -> bool:
+        """
+        Vrai si l'objet est dans la salle courante. Les objets des salles en
+        arrière plan ne doivent ni lire les entrées, ni jouer de son, ni 
+        lancer de transition.
+        """
+        return self.scene is not None and self.salle == self.scene.salle_actuelle
+
     def tuer(self):
         # Celui ci aussi
+        if self.vivant and self.scene is not None:
+            self.scene.desindexer(self)
+            self.scene.publier("mort", self)
         self.vivant = False
 
     def actualiser(self, scene:Scene):
@@ -97,20 +1019,1499 @@ class Objet:
         """
         pass
 
+    def dessiner(self):
+        """
+        Apelée par la scène après l'actualisation de tous les objets, pour
+        que l'objet confie ses images au jeu (voir Jeu.dessiner). Par défaut,
+        l'objet n'est pas dessiné.
+        """
+        pass
+
+
+Objet.classes["Objet"] = Objet
+Objet.structure = struct.Struct("<" + Objet.FORMAT)
+
 
 class Entitee(Objet):
     """  
     Les entitées sont les objets affectés par la physique du jeu.
+
+    Leur position et leur vitesse sont stockées dans l'objet lui même. Si 
+    leur salle possède un MoteurPhysique, elles sont rangées dans ses 
+    tableaux et l'entitée passe le temps de son rattachement à une classe 
+    vue (voir VuePhysique) : le reste du code n'a pas à s'en soucier.
     """
+    __slots__ = (
+        "physique", "place", "x", "y", "dx", "dy", "au_sol", "x_precedent", "y_precedent", 
+        "gravite", "sol", "limites"
+    )
+
+    # Position, vitesse, position précédente, au sol, gravité, sol (NaN s'il
+    # n'y en a pas), limites (existent-elles, x min, x max, y max)
+    FORMAT = Objet.FORMAT + "dddddd??d?ddd"
+
     def __init__(self, jeu, position):
         super().__init__(jeu, 1)
+        Entitee._initialiser(self, position)
+
+    def _initialiser(self, position):
+        """
+        Remise à zéro des attributs d'Entitee, commune à __init__ et 
+        reinitialiser.
+        """
+        # Moteur physique et place dans celui-ci (si la salle en a un)
+        self.physique = None
+        self.place = None
         # Initialisation des positions et vitesses
         self.x, self.y = position
         self.dx, self.dy = 0, 0
+        # Position avant le dernier pas de simulation (voir position_affichee)
+        self.x_precedent, self.y_precedent = position
+        # L'entitée tombe-t-elle ?
+        self.gravite = True
+        # Hauteur du sol (None s'il n'y en a pas) et indique si on est dessous
+        self.sol = None
+        self.au_sol = False
+        # (x minimum, x maximum, y maximum) au dela desquels l'entitée meurt
+        self.limites = None
+
+    def reinitialiser(self, jeu, position):
+        """
+        Comme __init__, mais sur place : rien n'est alloué. Le rectangle est
+        gardé, les classes filles le remettent à jour avec prendre_silhouette.
+        La place dans le moteur physique a été rendue par Scene.retirer_morts.
+        """
+        Objet._initialiser(self, jeu, 1)
+        Entitee._initialiser(self, position)
+
+    def etat(self) -> tuple:
+        limites = self.limites
+        return super().etat() + (
+            self.x, self.y, self.dx, self.dy, self.x_precedent, self.y_precedent, self.au_sol, self.gravite,
+            math.nan if self.sol is None else self.sol, 
+            limites is not None, *(limites or (0, 0, 0))
+        )
+
+    def restaurer(self, jeu, valeurs:tuple) -> int:
+        i = super().restaurer(jeu, valeurs)
+        self.physique = None
+        self.place = None
+        (
+            self.x, self.y, self.dx, self.dy, self.x_precedent, self.y_precedent, self.au_sol, self.gravite, 
+            sol, a_limites, x_min, x_max, y_max
+        ) = valeurs[i : i + 13]
+        self.sol = None if math.isnan(sol) else sol
+        self.limites = (x_min, x_max, y_max) if a_limites else None
+        return i + 13
+
+    def prendre_silhouette(self, silhouette:Silhouette, decalage:Tuple[float, float] = (0, 0)):
+        """
+        Donne à l'entitée la forme de collision de son image, dessinée en
+        (x, y) + decalage : son rectangle est alors celui des pixels 
+        visibles de l'image.
+        """
+        self.silhouette = silhouette
+        if self.rectangle is None:
+            self.rectangle = pygame.Rect(0, 0, 0, 0)
+        silhouette.placer(self.rectangle, self.x + decalage[0], self.y + decalage[1])
+
+    def position_affichee(self):
+        """
+        Position à utiliser pour dessiner l'entitée : la simulation avance
+        par pas fixes, on interpole donc entre la position précédente et 
+        l'actuelle selon l'avancement du jeu vers le prochain pas.
+        """
+        t = self.jeu.interpolation
+        x_precedent, y_precedent = self.x_precedent, self.y_precedent
+        return (
+            x_precedent + (self.x - x_precedent) * t,
+            y_precedent + (self.y - y_precedent) * t
+        )
+
+    def definir_sol(self, sol):
+        """
+        Change la hauteur du sol de l'entitée (None pour ne plus en avoir).
+        """
+        self.sol = sol
         
     def actualiser(self, scene):
+        self.avancer(scene.dt)
+
+    def actualiser_loin(self, scene):
+        """
+        Actualisation des entitées loin de la vue, quand la caméra de leur
+        salle le demande (voir Camera). Les classes filles peuvent n'y 
+        garder que l'essentiel (la physique par exemple) ; par défaut, c'est
+        l'actualisation complète.
+        """
+        self.actualiser(scene)
+
+    def avancer(self, dt):
+        """
+        Physique d'une seule entitée. MoteurPhysique.etape fait exactement 
+        la même chose, mais pour toutes les entitées d'une salle à la fois.
+        """
+        # On retient la position d'avant le pas pour l'interpolation
+        self.x_precedent = self.x
+        self.y_precedent = self.y
         # On actualiser les vitesses en prenant en compte 
         # La rapidité du jeu en elle même
-        self.x += self.dx * self.jeu.dt 
-        self.y += self.dy * self.jeu.dt
-        
+        self.x += self.dx * dt 
+        self.y += self.dy * dt
+        # Gravité
+        if self.gravite:
+            self.dy += GRAVITE * dt
+        # Si on tombe en dessous du sol, on annule la vitesse verticale
+        self.au_sol = self.sol is not None and self.y > self.sol
+        if self.au_sol:
+            self.dy = 0
+        # On tue les entitées sorties de la carte
+        if self.limites is not None:
+            x_min, x_max, y_max = self.limites
+            if self.x > x_max or self.x < x_min or self.y > y_max:
+                self.tuer()
+
+
+class VuePhysique:
+    """
+    Mélangée (en tête) aux classes des entitées rattachées à un 
+    MoteurPhysique : x, y, dx, dy, au_sol et les positions précédentes 
+    deviennent des vues sur la place de l'entitée dans les tableaux du 
+    moteur. Seules ces entitées paient ces propriétés, les autres gardent
+    leurs attributs simples.
+    """
+    __slots__ = ()
+
+    @property
+    def x(self):
+        return self.physique.x[self.place]
+
+    @x.setter
+    def x(self, valeur):
+        self.physique.x[self.place] = valeur
+        # Le rectangle placé par etape() n'est plus à jour
+        self.physique.deplacees.add(self.place)
+
+    @property
+    def y(self):
+        return self.physique.y[self.place]
+
+    @y.setter
+    def y(self, valeur):
+        self.physique.y[self.place] = valeur
+        self.physique.deplacees.add(self.place)
+
+    @property
+    def dx(self):
+        return self.physique.dx[self.place]
+
+    @dx.setter
+    def dx(self, valeur):
+        self.physique.dx[self.place] = valeur
+
+    @property
+    def dy(self):
+        return self.physique.dy[self.place]
+
+    @dy.setter
+    def dy(self, valeur):
+        self.physique.dy[self.place] = valeur
+
+    @property
+    def x_precedent(self):
+        return self.physique.x_precedent[self.place]
+
+    @x_precedent.setter
+    def x_precedent(self, valeur):
+        self.physique.x_precedent[self.place] = valeur
+
+    @property
+    def y_precedent(self):
+        return self.physique.y_precedent[self.place]
+
+    @y_precedent.setter
+    def y_precedent(self, valeur):
+        self.physique.y_precedent[self.place] = valeur
+
+    @property
+    def au_sol(self):
+        return bool(self.physique.au_sol[self.place])
+
+    @au_sol.setter
+    def au_sol(self, valeur):
+        self.physique.au_sol[self.place] = valeur
+
+    def definir_sol(self, sol):
+        super().definir_sol(sol)
+        self.physique.sol[self.place] = math.inf if sol is None else sol
+
+    def avancer(self, dt):
+        # Le moteur a déjà fait avancer l'entitée, sauf si celle-ci vient 
+        # juste d'être créée pendant la frame
+        if self.place in self.physique.nouveaux:
+            super().avancer(dt)
+
+    def prendre_silhouette(self, silhouette:Silhouette, decalage:Tuple[float, float] = (0, 0)):
+        physique = self.physique
+        place = self.place
+        # etape() a déjà calculé la place du rectangle, sauf si la forme a 
+        # changé ou si l'entitée a été déplacée depuis
+        if (
+            silhouette is self.silhouette and decalage == physique.decalages[place] 
+            and place not in physique.deplacees
+        ):
+            rectangle = self.rectangle
+            rectangle.x = physique.gauches[place]
+            rectangle.y = physique.hauts[place]
+            return
+        super().prendre_silhouette(silhouette, decalage)
+        # On retient de quoi refaire le même calcul dans etape(), qui n'est 
+        # plus à jour pour cette place jusqu'au prochain pas
+        physique.decalages[place] = decalage
+        physique.decalage_x[place], physique.decalage_y[place] = decalage
+        physique.bord_x[place] = silhouette.rectangle.x
+        physique.bord_y[place] = silhouette.rectangle.y
+        physique.deplacees.add(place)
+
+    def position_affichee(self):
+        # Calculée pour toute la salle à la fois, sauf si l'entitée a été 
+        # déplacée depuis le dernier pas
+        if self.place in self.physique.deplacees:
+            return super().position_affichee()
+        xs, ys = self.physique.positions_affichees(self.jeu.interpolation)
+        return xs[self.place], ys[self.place]
+
+
+class MoteurPhysique:
+    """
+    Moteur physique vectorisé (nécessite numpy).
+
+    Les positions, vitesses, sols et limites de toutes les entitées d'une
+    salle sont rangés dans des tableaux numpy (un tableau par grandeur), 
+    chaque entitée occupant une place. Une seule etape() par frame fait
+    alors avancer toute la salle et calcule la place de tous les rectangles,
+    au lieu d'un appel par entitée.
+
+    Le temps de leur rattachement, les entitées passent à la vue de leur 
+    classe (voir VuePhysique et vue), qui lit et écrit dans les tableaux.
+    """
+    # Nom des tableaux et leur valeur par défaut. decalage et bord servent
+    # à placer les rectangles (voir Silhouette.placer)
+    CHAMPS = {
+        "x" : 0.0, "y" : 0.0, "dx" : 0.0, "dy" : 0.0, "x_precedent" : 0.0, "y_precedent" : 0.0,
+        "gravite" : False, "sol" : math.inf, "au_sol" : False, "actif" : False,
+        "x_min" : -math.inf, "x_max" : math.inf, "y_max" : math.inf,
+        "decalage_x" : 0.0, "decalage_y" : 0.0, "bord_x" : 0, "bord_y" : 0,
+    }
+    # Classe d'entitées -> sa vue
+    vues = {}
+
+    def __init__(self, capacite:int = 64):
+        # Nombre de places déjà utilisées au moins une fois
+        self.taille = 0
+        # Places libérées, réutilisées en priorité
+        self.libres = []
+        # Places attribuées depuis la dernière etape()
+        self.nouveaux = set()
+        # Places pour lesquelles les calculs de la dernière etape() ne sont 
+        # plus à jour : attribuées, déplacées ou changées de silhouette depuis
+        self.deplacees = set()
+        # Coin des rectangles, par place, calculé par etape()
+        self.gauches = []
+        self.hauts = []
+        # Positions affichées depuis la dernière etape() : (interpolation, 
+        # abscisses, ordonnées), voir positions_affichees
+        self.affichage = None
+        self.entitees = [None] * capacite
+        # Dernier decalage donné à prendre_silhouette, par place
+        self.decalages = [None] * capacite
+        for champ, defaut in self.CHAMPS.items():
+            setattr(self, champ, numpy.full(capacite, defaut))
+
+    @staticmethod
+    def vue(classe):
+        """
+        La vue d'une classe d'entitées : la même classe, précédée de 
+        VuePhysique. Elle est créée une fois pour toutes.
+        """
+        vue = MoteurPhysique.vues.get(classe)
+        if vue is None:
+            vue = MoteurPhysique.vues[classe] = type(classe.__name__, (VuePhysique, classe), {
+                "__slots__" : (), "__module__" : classe.__module__, "__qualname__" : classe.__qualname__,
+                "classe_reelle" : classe,
+            })
+        return vue
+
+    def agrandir(self):
+        """
+        Double la capacité des tableaux.
+        """
+        capacite = len(self.entitees) * 2
+        for champ, defaut in self.CHAMPS.items():
+            ancien = getattr(self, champ)
+            nouveau = numpy.full(capacite, defaut)
+            nouveau[:len(ancien)] = ancien
+            setattr(self, champ, nouveau)
+        self.entitees += [None] * (capacite - len(self.entitees))
+        self.decalages += [None] * (capacite - len(self.decalages))
+
+    def attacher(self, entitee):
+        """
+        Donne une place à l'entitée, y recopie son état et la fait passer à
+        la vue de sa classe.
+        """
+        if entitee.physique is not None:
+            return
+        if self.libres:
+            place = self.libres.pop()
+        else:
+            if self.taille == len(self.entitees):
+                self.agrandir()
+            place = self.taille
+            self.taille += 1
+        # La place est entièrement réécrite (detacher ne la remet pas à zéro)
+        self.x[place] = entitee.x
+        self.y[place] = entitee.y
+        self.dx[place] = entitee.dx
+        self.dy[place] = entitee.dy
+        self.x_precedent[place] = entitee.x_precedent
+        self.y_precedent[place] = entitee.y_precedent
+        self.au_sol[place] = entitee.au_sol
+        self.gravite[place] = entitee.gravite
+        self.sol[place] = math.inf if entitee.sol is None else entitee.sol
+        self.x_min[place], self.x_max[place], self.y_max[place] = entitee.limites or (-math.inf, math.inf, math.inf)
+        self.actif[place] = True
+        # Le rectangle sera placé par le prochain prendre_silhouette
+        self.decalages[place] = None
+        self.entitees[place] = entitee
+        self.nouveaux.add(place)
+        self.deplacees.add(place)
+        entitee.physique = self
+        entitee.place = place
+        entitee.__class__ = self.vue(type(entitee))
+
+    def attacher_tous(self, entitees:List["Entitee"]):
+        """
+        Comme attacher pour chacune des entitées, mais chaque tableau est 
+        rempli d'un coup.
+        """
+        entitees = [entitee for entitee in entitees if entitee.physique is None]
+        # Les places libres d'abord, puis de nouvelles
+        pris = min(len(entitees), len(self.libres))
+        places = self.libres[len(self.libres) - pris:]
+        del self.libres[len(self.libres) - pris:]
+        reste = len(entitees) - pris
+        while self.taille + reste > len(self.entitees):
+            self.agrandir()
+        places += range(self.taille, self.taille + reste)
+        self.taille += reste
+        self.x[places] = [entitee.x for entitee in entitees]
+        self.y[places] = [entitee.y for entitee in entitees]
+        self.dx[places] = [entitee.dx for entitee in entitees]
+        self.dy[places] = [entitee.dy for entitee in entitees]
+        self.x_precedent[places] = [entitee.x_precedent for entitee in entitees]
+        self.y_precedent[places] = [entitee.y_precedent for entitee in entitees]
+        self.au_sol[places] = [entitee.au_sol for entitee in entitees]
+        self.gravite[places] = [entitee.gravite for entitee in entitees]
+        self.sol[places] = [math.inf if entitee.sol is None else entitee.sol for entitee in entitees]
+        limites = numpy.array(
+            [entitee.limites or (-math.inf, math.inf, math.inf) for entitee in entitees], dtype=float
+        ).reshape(-1, 3)
+        self.x_min[places], self.x_max[places], self.y_max[places] = limites.T
+        self.actif[places] = True
+        vues = {}
+        for place, entitee in zip(places, entitees):
+            self.entitees[place] = entitee
+            self.decalages[place] = None
+            entitee.physique = self
+            entitee.place = place
+            classe = type(entitee)
+            vue = vues.get(classe)
+            if vue is None:
+                vue = vues[classe] = self.vue(classe)
+            entitee.__class__ = vue
+        self.nouveaux.update(places)
+        self.deplacees.update(places)
+
+    def detacher(self, entitee):
+        """
+        Libère la place de l'entitée en lui rendant sa classe et son état.
+        """
+        place = entitee.place
+        entitee.__class__ = entitee.classe_reelle
+        entitee.physique = None
+        entitee.place = None
+        entitee.x = float(self.x[place])
+        entitee.y = float(self.y[place])
+        entitee.dx = float(self.dx[place])
+        entitee.dy = float(self.dy[place])
+        entitee.x_precedent = float(self.x_precedent[place])
+        entitee.y_precedent = float(self.y_precedent[place])
+        entitee.au_sol = bool(self.au_sol[place])
+        # Une place inactive ne tue personne
+        self.actif[place] = False
+        self.entitees[place] = None
+        self.decalages[place] = None
+        self.nouveaux.discard(place)
+        self.deplacees.discard(place)
+        self.libres.append(place)
+
+    def vider(self):
+        """
+        Détache toutes les entitées d'un coup (voir detacher) : le moteur 
+        repart de zéro.
+        """
+        n = self.taille
+        valeurs = [
+            getattr(self, champ)[:n].tolist() 
+            for champ in ("x", "y", "dx", "dy", "x_precedent", "y_precedent", "au_sol")
+        ]
+        for entitee, x, y, dx, dy, x_precedent, y_precedent, au_sol in zip(self.entitees, *valeurs):
+            if entitee is None:
+                continue
+            entitee.__class__ = entitee.classe_reelle
+            entitee.physique = None
+            entitee.place = None
+            entitee.x, entitee.y, entitee.dx, entitee.dy = x, y, dx, dy
+            entitee.x_precedent, entitee.y_precedent = x_precedent, y_precedent
+            entitee.au_sol = au_sol
+        self.actif[:n] = False
+        self.taille = 0
+        self.libres.clear()
+        self.nouveaux.clear()
+        self.deplacees.clear()
+        self.affichage = None
+        self.entitees = [None] * len(self.entitees)
+        self.decalages = [None] * len(self.decalages)
+
+    def etape(self, dt:float):
+        """
+        Equivalent de Entitee.avancer pour toutes les entitées à la fois,
+        suivi du calcul de la place de leurs rectangles.
+        """
+        n = self.taille
+        self.nouveaux.clear()
+        self.deplacees.clear()
+        self.affichage = None
+        if n == 0:
+            return
+        x, y, dx, dy = self.x[:n], self.y[:n], self.dx[:n], self.dy[:n]
+        self.x_precedent[:n] = x
+        self.y_precedent[:n] = y
+        x += dx * dt
+        y += dy * dt
+        dy += self.gravite[:n] * (GRAVITE * dt)
+        au_sol = self.au_sol[:n]
+        numpy.greater(y, self.sol[:n], out=au_sol)
+        dy[au_sol] = 0
+        # Même calcul que Silhouette.placer (troncature au pixel). Chaque 
+        # entitée recopie le sien dans prendre_silhouette, au même moment
+        # qu'avec la physique classique
+        self.gauches = ((x + self.decalage_x[:n]).astype(int) + self.bord_x[:n]).tolist()
+        self.hauts = ((y + self.decalage_y[:n]).astype(int) + self.bord_y[:n]).tolist()
+        hors_limites = (x > self.x_max[:n]) | (x < self.x_min[:n]) | (y > self.y_max[:n])
+        hors_limites &= self.actif[:n]
+        for place in numpy.flatnonzero(hors_limites):
+            self.entitees[place].tuer()
+
+    def positions_affichees(self, interpolation:float):
+        """
+        Equivalent de Entitee.position_affichee pour toutes les places : deux
+        listes (abscisses, ordonnées), calculées une fois par pas et par 
+        interpolation.
+        """
+        affichage = self.affichage
+        if affichage is None or affichage[0] != interpolation:
+            n = self.taille
+            x_precedent, y_precedent = self.x_precedent[:n], self.y_precedent[:n]
+            affichage = self.affichage = (
+                interpolation,
+                (x_precedent + (self.x[:n] - x_precedent) * interpolation).tolist(),
+                (y_precedent + (self.y[:n] - y_precedent) * interpolation).tolist(),
+            )
+        return affichage[1], affichage[2]
+
+
+class Reserve:
+    """
+    Réserve (ou "pool") d'objets d'une même classe.
+
+    Plutôt que de laisser le ramasse-miettes détruire les objets morts puis
+    d'en allouer de nouveaux (les boules par exemple, à chaque tir), la scène
+    rend les morts à leur réserve, qui les remet à neuf quand on lui en 
+    redemande un.
+    """
+    def __init__(self, classe, taille_max:int = 1024):
+        self.classe = classe
+        # Au dela, les objets rendus sont laissés au ramasse-miettes
+        self.taille_max = taille_max
+        self.libres = []
+        self.crees = 0
+        self.reutilises = 0
+
+    def obtenir(self, *arguments, **options):
+        if self.libres:
+            objet = self.libres.pop()
+            objet.reinitialiser(*arguments, **options)
+            self.reutilises += 1
+        else:
+            objet = self.classe(*arguments, **options)
+            self.crees += 1
+        objet.reserve = self
+        return objet
+
+    def rendre(self, objet):
+        if len(self.libres) < self.taille_max:
+            self.libres.append(objet)
+
+    def statistiques(self):
+        return {"libres" : len(self.libres), "crees" : self.crees, "reutilises" : self.reutilises}
+
+
+class CacheLRU:
+    """
+    Cache borné : au dela de la capacité, on oublie l'element utilisé il y
+    a le plus longtemps (Least Recently Used). Une capacité None rend le 
+    cache illimité.
+
+    On peut aussi borner le poids total des elements (par exemple leur taille
+    en mémoire) en donnant poids_max et une fonction poids(valeur).
+
+    Les compteurs succes et echecs permettent de vérifier que le cache sert
+    à quelque chose.
+    """
+    def __init__(self, capacite:int = None, poids_max:int = None, poids:Callable = None):
+        self.capacite = capacite
+        self.poids_max = poids_max
+        self.poids = poids
+        self.poids_total = 0
+        self.elements = OrderedDict()
+        self.succes = 0
+        self.echecs = 0
+        self.evictions = 0
+
+    def obtenir(self, cle):
+        """
+        Renvoie la valeur associée à la clé, ou None si elle n'est pas en cache.
+        """
+        valeur = self.elements.get(cle)
+        if valeur is None:
+            self.echecs += 1
+            return None
+        self.succes += 1
+        # L'element devient le plus récemment utilisé
+        self.elements.move_to_end(cle)
+        return valeur
+
+    def ajouter(self, cle, valeur):
+        if cle in self.elements:
+            self.retirer(cle)
+        self.elements[cle] = valeur
+        if self.poids is not None:
+            self.poids_total += self.poids(valeur)
+        # On oublie les plus anciens tant qu'on dépasse une des limites
+        # (en gardant au moins l'element qu'on vient d'ajouter)
+        while len(self.elements) > 1 and (
+            (self.capacite is not None and len(self.elements) > self.capacite)
+            or (self.poids_max is not None and self.poids_total > self.poids_max)
+        ):
+            self.retirer(next(iter(self.elements)))
+            self.evictions += 1
+
+    def retirer(self, cle):
+        valeur = self.elements.pop(cle)
+        if self.poids is not None:
+            self.poids_total -= self.poids(valeur)
+
+    def vider(self):
+        self.elements.clear()
+        self.poids_total = 0
+
+    def statistiques(self):
+        return {
+            "taille" : len(self.elements), "poids" : self.poids_total, "succes" : self.succes, 
+            "echecs" : self.echecs, "evictions" : self.evictions
+        }
+
+    def __len__(self):
+        return len(self.elements)
+
+
+class Ordonnanceur:
+    """
+    Partage le temps de chaque frame entre le jeu et des tâches asyncio
+    (télémétrie, console de debug, rechargement des ressources...), voir 
+    Jeu.boucle_async.
+
+    Chaque frame a une échéance, fps fois par seconde. Une fois la frame 
+    calculée, le jeu rend la main à asyncio jusqu'à l'échéance 
+    (attendre_frame) : les tâches n'ont que le temps qui reste. Sans fps 
+    (pas de limite, jeu sans tête), il n'y a pas d'échéance : chaque 
+    passage entre deux frames est ouvert aux tâches, et une tâche qui cède
+    avance d'un morceau par frame.
+
+    asyncio ne peut pas interrompre une tâche : une tâche qui calcule 
+    longtemps doit appeler ceder() entre deux morceaux de travail. Elle ne
+    reprend que s'il reste au moins marge secondes avant l'échéance, sinon
+    elle attend la frame suivante. Les morceaux doivent donc durer moins 
+    que marge.
+    """
+    def __init__(self, fps:int = None, marge:float = 0.002):
+        self.duree_frame = 1 / fps if fps else 0
+        self.marge = marge
+        self.echeance = time.perf_counter()
+        # Résolu à la prochaine ouverture du temps libre (créé dans la 
+        # boucle asyncio, à la première attente)
+        self.ouverture = None
+        self.ouvert = False
+        # Temps rendu à asyncio depuis le début, et frames sans temps libre
+        self.temps_libre = 0
+        self.frames_pleines = 0
+
+    def restant(self) -> float:
+        """
+        Temps restant avant l'échéance de la frame, en secondes.
+        """
+        return self.echeance - time.perf_counter()
+
+    async def attendre_frame(self):
+        """
+        Laisse tourner les tâches jusqu'à l'échéance de la frame, puis fixe 
+        la suivante.
+        """
+        if self.ouverture is None:
+            self.ouverture = asyncio.get_running_loop().create_future()
+        restant = self.restant()
+        if not self.duree_frame:
+            # Sans échéance, le passage entre deux frames est ouvert
+            self.ouvrir()
+            await asyncio.sleep(0)
+            self.ouvert = False
+        elif restant > self.marge:
+            self.ouvrir()
+            await asyncio.sleep(restant)
+            self.ouvert = False
+            self.temps_libre += restant
+        else:
+            # Pas de temps libre : on laisse quand même passer les 
+            # entrées/sorties prêtes
+            self.frames_pleines += 1
+            await asyncio.sleep(0)
+        # Les échéances s'enchainent sans dériver, sauf quand la frame a 
+        # pris tout une frame de retard : on repart alors de maintenant
+        maintenant = time.perf_counter()
+        if maintenant - self.echeance < self.duree_frame:
+            self.echeance += self.duree_frame
+        else:
+            self.echeance = maintenant + self.duree_frame
+
+    def ouvrir(self):
+        """
+        Ouvre le temps libre : les tâches qui attendaient dans ceder() 
+        repartent.
+        """
+        ouverture, self.ouverture = self.ouverture, asyncio.get_running_loop().create_future()
+        self.ouvert = True
+        ouverture.set_result(None)
+
+    async def ceder(self):
+        """
+        A appeler par les tâches entre deux morceaux de travail : rend la 
+        main, et ne revient que s'il reste assez de temps dans la frame.
+        """
+        await asyncio.sleep(0)
+        while not self.ouvert or (self.duree_frame and self.restant() < self.marge):
+            if self.ouverture is None:
+                self.ouverture = asyncio.get_running_loop().create_future()
+            await self.ouverture
+
+
+class Profileur:
+    """
+    Mesure le temps passé dans chaque phase d'une frame (entrées, logique de
+    chaque classe d'objet, transition, dessin, affichage, ...) avec
+    time.perf_counter_ns.
+
+    Les durées d'une frame sont cumulées par phase (une phase peut être 
+    mesurée plusieurs fois, par exemple la logique si plusieurs pas de 
+    simulation ont lieu), puis gardées sur les fenetre dernières frames pour
+    calculer la médiane (p50), le p95 et le maximum.
+
+    Chaque frame peut aussi être écrite dans un fichier (voir exporter) pour
+    être analysée plus tard.
+
+    Inactif, le profileur ne coûte presque rien : top() et noter() 
+    s'arrêtent tout de suite, et la scène ne mesure ses objets que si actif
+    est vrai.
+    """
+    def __init__(self, fenetre:int = 120):
+        self.actif = False
+        self.fenetre = fenetre
+        # Durées (en nanosecondes) de la frame en cours, par phase
+        self.frame = {}
+        # Durées des dernières frames, par phase
+        self.historique = {}
+        self.fichier = None
+        self.format = None
+
+    def top(self) -> int:
+        """
+        Renvoie l'instant présent (0 si le profileur est inactif), à donner
+        ensuite à noter().
+        """
+        if not self.actif:
+            return 0
+        return time.perf_counter_ns()
+
+    def noter(self, phase:str, debut:int) -> int:
+        """
+        Ajoute le temps écoulé depuis debut à la phase, et renvoie l'instant
+        présent pour enchaîner avec la phase suivante.
+        """
+        if not self.actif:
+            return 0
+        maintenant = time.perf_counter_ns()
+        self.ajouter(phase, maintenant - debut)
+        return maintenant
+
+    def ajouter(self, phase:str, duree:int):
+        self.frame[phase] = self.frame.get(phase, 0) + duree
+
+    def terminer_frame(self, numero:int):
+        """
+        Range les durées de la frame dans l'historique, et les écrit dans le
+        fichier d'export s'il y en a un.
+        """
+        if not self.actif:
+            return
+        for phase, duree in self.frame.items():
+            historique = self.historique.get(phase)
+            if historique is None:
+                historique = self.historique[phase] = deque(maxlen=self.fenetre)
+            historique.append(duree)
+        if self.fichier is not None:
+            if self.format == "csv":
+                for phase, duree in self.frame.items():
+                    self.fichier.write(f"{numero},{phase},{duree}\n")
+            else:
+                self.fichier.write(json.dumps({"frame" : numero, "phases" : self.frame}) + "\n")
+        self.frame = {}
+
+    def statistiques(self):
+        """
+        Renvoie, pour chaque phase, la médiane, le p95 et le maximum (en 
+        millisecondes) sur les dernières frames, des plus coûteuses aux moins
+        coûteuses.
+        """
+        resultats = {}
+        for phase, historique in self.historique.items():
+            durees = sorted(historique)
+            resultats[phase] = {
+                "p50" : durees[len(durees) // 2] / 1e6,
+                "p95" : durees[min(len(durees) - 1, len(durees) * 95 // 100)] / 1e6,
+                "max" : durees[-1] / 1e6
+            }
+        return dict(sorted(resultats.items(), key=lambda element: -element[1]["p50"]))
+
+    def exporter(self, chemin:str):
+        """
+        Active le profileur et écrit chaque frame dans un fichier : en CSV 
+        (une ligne "frame,phase,duree_ns" par phase) si le chemin finit par
+        .csv, en JSON Lines (un objet par frame) sinon.
+        """
+        self.fermer()
+        self.format = "csv" if chemin.endswith(".csv") else "jsonl"
+        self.fichier = open(chemin, "w", encoding="utf-8")
+        if self.format == "csv":
+            self.fichier.write("frame,phase,duree_ns\n")
+        self.actif = True
+
+    def fermer(self):
+        if self.fichier is not None:
+            self.fichier.close()
+            self.fichier = None
+
+
+class ChargementParesseux(dict):
+    """
+    Dictionnaire dont les valeurs sont chargées au premier accès (par la 
+    fonction charger, qui reçoit la clé). Une fois chargées, y accéder coûte
+    autant qu'avec un dictionnaire classique.
+    """
+    def __init__(self, charger:Callable):
+        super().__init__()
+        self.charger = charger
+
+    def __missing__(self, cle):
+        valeur = self[cle] = self.charger(cle)
+        return valeur
+
+
+class Ressources:
+    """
+    Gestionnaire des images et des sons.
+
+    Les ressources sont d'abord déclarées (voir image et son), avec les 
+    salles qui en ont besoin. precharger(salle) lance leur décodage sur un
+    groupe de fils d'execution, sans attendre : le jeu peut afficher ses 
+    premières frames pendant que le reste se charge. Si une ressource est 
+    demandée (images["nom"]) avant d'être prête, on attend juste celle-ci.
+
+    Les surfaces ne sont converties au format de l'ecran (convert_alpha)
+    qu'au moment de leur première utilisation, dans le fil principal.
+
+    Les images redimensionnées sont gardées sur le disque, dans 
+    dossier_cache, au format BMP (non compressé, donc lu bien plus vite 
+    qu'un PNG) : au démarrage suivant, on évite le décodage du PNG et le 
+    transform.scale. Le cache d'une image est refait
+    quand le fichier source change (sa date de modification fait partie de
+    la clé), et l'ancienne version est alors effacée.
+
+    Les petits sprites déclarés avec atlas=True sont rangés ensemble dans 
+    une seule surface (l'atlas) : chacun n'est plus qu'une sous-surface de 
+    celle-ci.
+
+    Une ressource dont le fichier a changé peut être relue seule, pendant 
+    que le jeu tourne (voir recharger et Surveillant).
+    """
+    def __init__(self, dossier_cache:str = None, travailleurs:int = 4):
+        self.dossier_cache = dossier_cache
+        self.executeur = ThreadPoolExecutor(travailleurs, thread_name_prefix="ressources")
+        # nom -> (fonction de décodage, arguments)
+        self.definitions = {}
+        # salle -> noms des ressources dont elle a besoin
+        self.salles = {}
+        # Décodages lancés mais pas encore récupérés
+        self.en_cours = {}
+        self.noms_atlas = []
+        self.atlas = None
+        self.images = ChargementParesseux(self.finir_image)
+        self.sons = ChargementParesseux(self.finir_son)
+        # Silhouettes de collision des images (voir Silhouette.variantes),
+        # calculées une seule fois, au premier usage
+        self.silhouettes = ChargementParesseux(lambda nom: Silhouette.variantes(self.images[nom]))
+        # Compteurs : images lues dans le cache disque, ou décodées
+        self.depuis_cache = 0
+        self.decodees = 0
+
+    def image(self, nom:str, chemin:str, taille:Tuple[int, int] = None, salles:Iterable[str] = (), atlas:bool = False):
+        """
+        Déclare une image, éventuellement redimensionnée à la taille donnée.
+        """
+        self.definitions[nom] = (self.decoder_image, (chemin, taille))
+        self.declarer_salles(nom, salles)
+        if atlas:
+            self.noms_atlas.append(nom)
+
+    def son(self, nom:str, chemin:str, salles:Iterable[str] = ()):
+        self.definitions[nom] = (pygame.mixer.Sound, (chemin,))
+        self.declarer_salles(nom, salles)
+
+    def declarer_salles(self, nom:str, salles:Iterable[str]):
+        for salle in salles:
+            self.salles.setdefault(salle, []).append(nom)
+
+    def precharger(self, salle:str = None):
+        """
+        Lance le décodage des ressources d'une salle (de toutes si salle est
+        None) qui ne sont pas encore chargées.
+        """
+        noms = self.definitions if salle is None else self.salles.get(salle, ())
+        for nom in noms:
+            self.lancer(nom)
+
+    def lancer(self, nom:str):
+        if nom in self.en_cours or nom in self.images or nom in self.sons:
+            return
+        fonction, arguments = self.definitions[nom]
+        self.en_cours[nom] = self.executeur.submit(fonction, *arguments)
+
+    def recuperer(self, nom:str):
+        """
+        Attend la fin du décodage d'une ressource (en le lançant si besoin) 
+        et la renvoie. Une erreur de chargement est levée ici.
+        """
+        self.lancer(nom)
+        return self.en_cours.pop(nom).result()
+
+    def attendre(self):
+        """
+        Charge tout ce qui a été déclaré, en attendant la fin des décodages.
+        """
+        self.precharger()
+        for nom, (fonction, arguments) in self.definitions.items():
+            if fonction == self.decoder_image:
+                self.images[nom]
+            else:
+                self.sons[nom]
+
+    def finir_image(self, nom:str):
+        if nom in self.noms_atlas:
+            self.construire_atlas()
+            return self.images[nom]
+        return self.recuperer(nom).convert_alpha()
+
+    def finir_son(self, nom:str):
+        return self.recuperer(nom)
+
+    def decoder_image(self, chemin:str, taille:Tuple[int, int]):
+        """
+        Charge (et redimensionne) une image, depuis le cache disque s'il est
+        à jour. Appelée dans un fil d'execution du groupe.
+        """
+        fichier_cache = None
+        if self.dossier_cache is not None:
+            etat = os.stat(chemin)
+            # Le nom du fichier est fait de celui de l'image, de sa source 
+            # (chemin et taille) puis de sa version (date et poids du fichier)
+            source = hashlib.sha1(f"{chemin}|{taille}".encode()).hexdigest()[:8]
+            version = hashlib.sha1(f"{etat.st_mtime_ns}|{etat.st_size}".encode()).hexdigest()[:8]
+            nom = os.path.splitext(os.path.basename(chemin))[0]
+            prefixe = os.path.join(self.dossier_cache, f"{nom}-{source}-")
+            fichier_cache = prefixe + version + ".bmp"
+            if os.path.exists(fichier_cache):
+                self.depuis_cache += 1
+                return pygame.image.load(fichier_cache)
+
+        surface = pygame.image.load(chemin)
+        if taille is not None:
+            surface = pygame.transform.scale(surface, taille)
+        self.decodees += 1
+        if fichier_cache is not None:
+            os.makedirs(self.dossier_cache, exist_ok=True)
+            # On écrit à coté puis on renomme, pour ne jamais laisser un 
+            # fichier à moitié écrit si le jeu est coupé
+            temporaire = fichier_cache + f".{os.getpid()}.tmp.bmp"
+            pygame.image.save(surface, temporaire)
+            os.replace(temporaire, fichier_cache)
+            # Les anciennes versions de l'image ne serviront plus
+            for ancien in glob.glob(glob.escape(prefixe) + "?" * len(version) + ".bmp"):
+                if ancien != fichier_cache:
+                    try:
+                        os.remove(ancien)
+                    except OSError:
+                        pass
+        return surface
+
+    def recharger(self, nom:str):
+        """
+        Relit une ressource déjà déclarée, sans toucher aux autres. Si la 
+        lecture échoue (fichier à moitié écrit...), l'ancienne version est 
+        gardée et l'erreur est levée.
+
+        Une image de l'atlas en sort et devient une surface à part. Sa 
+        silhouette sera recalculée à sa prochaine utilisation.
+        """
+        fonction, arguments = self.definitions[nom]
+        # Un décodage en cours lirait peut être l'ancienne version
+        ancien = self.en_cours.pop(nom, None)
+        if ancien is not None:
+            ancien.cancel()
+        if fonction == self.decoder_image:
+            surface = self.decoder_image(*arguments).convert_alpha()
+            if nom in self.noms_atlas:
+                self.noms_atlas.remove(nom)
+            self.images[nom] = surface
+            self.silhouettes.pop(nom, None)
+        else:
+            self.sons[nom] = fonction(*arguments)
+
+    def construire_atlas(self, largeur_max:int = 1024, marge:int = 1):
+        """
+        Range les images de l'atlas par étagères (les plus hautes d'abord) 
+        dans une seule surface, puis remplace chacune par sa sous-surface.
+        """
+        surfaces = {nom : self.recuperer(nom) for nom in self.noms_atlas}
+        largeur_max = max([largeur_max] + [surface.get_width() for surface in surfaces.values()])
+        places = {}
+        x = y = hauteur_etagere = largeur = 0
+        for nom in sorted(surfaces, key=lambda nom: -surfaces[nom].get_height()):
+            l, h = surfaces[nom].get_size()
+            if x + l > largeur_max:
+                # Etagère pleine, on passe à la suivante
+                x = 0
+                y += hauteur_etagere + marge
+                hauteur_etagere = 0
+            places[nom] = pygame.Rect(x, y, l, h)
+            x += l + marge
+            hauteur_etagere = max(hauteur_etagere, h)
+            largeur = max(largeur, x)
+        atlas = pygame.Surface((largeur, y + hauteur_etagere), pygame.SRCALPHA)
+        for nom, place in places.items():
+            atlas.blit(surfaces[nom], place)
+        self.atlas = atlas.convert_alpha()
+        for nom, place in places.items():
+            self.images[nom] = self.atlas.subsurface(place)
+
+    def fermer(self):
+        self.executeur.shutdown(wait=False, cancel_futures=True)
+
+
+class Surveillant:
+    """
+    Surveille des fichiers et appelle une fonction quand l'un d'eux change,
+    pour recharger le jeu à chaud (voir Jeu.recharger_objets et 
+    Ressources.recharger).
+
+    Les fichiers sont comparés par leur date de modification et leur taille
+    (os.stat), au plus une fois toutes les periode secondes : quelques 
+    dizaines de stat ne coûtent presque rien, et contrairement à inotify 
+    ça marche partout. Un fichier qui a disparu (un éditeur qui le remplace)
+    est ignoré jusqu'à ce qu'il revienne.
+    """
+    def __init__(self, periode:float = 0.25):
+        self.periode = periode
+        # chemin -> [signature vue, fonctions à appeler]
+        self.fichiers = {}
+        self.prochaine_verification = 0
+        # Erreurs des derniers rechargements : chemin -> exception
+        self.erreurs = {}
+
+    @staticmethod
+    def signature(chemin:str):
+        try:
+            etat = os.stat(chemin)
+        except OSError:
+            return None
+        return etat.st_mtime_ns, etat.st_size
+
+    def surveiller(self, chemin:str, fonction:Callable):
+        """
+        fonction() sera appelée à chaque changement du fichier.
+        """
+        self.fichiers.setdefault(chemin, [self.signature(chemin), []])[1].append(fonction)
+
+    def verifier(self, forcer:bool = False) -> List[str]:
+        """
+        Appelle les fonctions des fichiers qui ont changé, et renvoie leurs 
+        chemins. Une fonction qui échoue n'arrête pas le jeu : l'erreur est
+        affichée et gardée dans erreurs, on réessaiera au prochain 
+        changement.
+        """
+        maintenant = time.perf_counter()
+        if not forcer and maintenant < self.prochaine_verification:
+            return []
+        self.prochaine_verification = maintenant + self.periode
+        changes = []
+        for chemin, entree in self.fichiers.items():
+            signature = self.signature(chemin)
+            if signature is None or signature == entree[0]:
+                continue
+            entree[0] = signature
+            changes.append(chemin)
+            self.erreurs.pop(chemin, None)
+            for fonction in entree[1]:
+                try:
+                    fonction()
+                except Exception as erreur:
+                    self.erreurs[chemin] = erreur
+                    print(f"Rechargement de {chemin} impossible : {erreur!r}", file=sys.stderr)
+        return changes
+
+
+class Mixeur:
+    """
+    Gestion du son : un petit nombre de voix pour les bruitages, et la 
+    musique à part.
+
+    Bruitages : jouer(nom, priorite) prend une voix libre. S'il n'y en a 
+    plus, on vole la plus ancienne des voix de plus petite priorité (si elle
+    ne dépasse pas celle du nouveau son), sinon le son n'est pas joué. 
+    limiter(nom, maximum) borne le nombre d'exemplaires d'un même son joués 
+    en même temps : au dela, le nouveau remplace le plus ancien.
+
+    Musique : elle passe par pygame.mixer.music, qui lit le fichier petit à
+    petit au lieu de le décoder entièrement en mémoire comme un Sound. Une
+    musique introuvable est simplement ignorée (une seule fois).
+
+    actif = False (jeu sans tête) ne joue rien.
+
+    Le mixeur de SDL travaille par tampons de TAMPON echantillons (voir 
+    preparer) : avec le tampon de 512 de pygame, il se réveille plus de 80
+    fois par seconde, et le décodage de la musique en continu coutait plus
+    de processeur que l'ancienne musique décodée d'avance. 2048 echantillons
+    (46 ms à 44,1 kHz) le font passer en dessous, avec une latence qui
+    reste correcte pour des bruitages.
+    """
+    TAMPON = 2048
+
+    @staticmethod
+    def preparer(tampon:int = None):
+        """
+        Règle le mixeur de SDL. A appeler avant pygame.init() (ou 
+        pygame.mixer.init()), qui l'ouvre.
+        """
+        pygame.mixer.pre_init(buffer=tampon or Mixeur.TAMPON)
+
+    def __init__(self, ressources:Ressources, voix:int = 8, actif:bool = True):
+        self.ressources = ressources
+        self.actif = actif
+        # Pour chaque voix : (nom du son, priorité, numéro d'ordre) du dernier son joué
+        self.infos = [(None, 0, 0)] * voix
+        self.voix = []
+        if actif:
+            pygame.mixer.set_num_channels(voix)
+            self.voix = [pygame.mixer.Channel(i) for i in range(voix)]
+        self.limites = {}
+        self.musiques = {}
+        self.musique_actuelle = None
+        self.compteur = 0
+        # Statistiques
+        self.jouees = 0
+        self.volees = 0
+        self.refusees = 0
+        self.max_occupees = 0
+
+    def limiter(self, nom:str, maximum:int):
+        self.limites[nom] = maximum
+
+    def musique(self, nom:str, chemin:str):
+        """
+        Déclare une musique (elle n'est ouverte qu'au moment de la jouer).
+        """
+        self.musiques[nom] = chemin
+
+    def jouer(self, nom:str, priorite:int = 0):
+        """
+        Joue un bruitage, et renvoie la voix utilisée (None s'il n'a pas été
+        joué).
+        """
+        if not self.actif:
+            return None
+        son = self.ressources.sons[nom]
+        infos = self.infos
+        # Un seul passage sur les voix : la première libre, le plus ancien
+        # exemplaire de ce son, et la voix à voler s'il le faut
+        libre = None
+        ancien = None
+        victime = None
+        memes = 0
+        occupees = 0
+        for i, voix in enumerate(self.voix):
+            if not voix.get_busy():
+                if libre is None:
+                    libre = i
+                continue
+            occupees += 1
+            nom_voix, priorite_voix, ordre = infos[i]
+            if nom_voix == nom:
+                memes += 1
+                if ancien is None or ordre < infos[ancien][2]:
+                    ancien = i
+            if priorite_voix <= priorite and (victime is None or (priorite_voix, ordre) < infos[victime][1:]):
+                victime = i
+        limite = self.limites.get(nom)
+        if limite is not None and memes >= limite:
+            # Trop d'exemplaires de ce son : le plus ancien laisse sa place
+            place = ancien
+            self.volees += 1
+        elif libre is not None:
+            place = libre
+            occupees += 1
+        elif victime is not None:
+            place = victime
+            self.volees += 1
+        else:
+            self.refusees += 1
+            return None
+        self.compteur += 1
+        infos[place] = (nom, priorite, self.compteur)
+        self.voix[place].play(son)
+        self.jouees += 1
+        self.max_occupees = max(self.max_occupees, occupees)
+        return self.voix[place]
+
+    def jouer_musique(self, nom:str, boucles:int = -1):
+        """
+        Lance une musique, sauf si c'est déjà elle qui joue : on peut donc 
+        l'appeler à chaque frame.
+        """
+        if not self.actif or nom == self.musique_actuelle:
+            return
+        self.musique_actuelle = nom
+        pygame.mixer.music.stop()
+        chemin = self.musiques.get(nom)
+        if chemin is None:
+            return
+        try:
+            pygame.mixer.music.load(chemin)
+        except (pygame.error, FileNotFoundError):
+            # Pas de musique plutôt qu'un jeu qui plante, et on ne réessaie pas
+            self.musiques[nom] = None
+            return
+        pygame.mixer.music.play(boucles)
+
+    def arreter_musique(self):
+        if self.actif:
+            pygame.mixer.music.stop()
+        self.musique_actuelle = None
+
+    def statistiques(self):
+        return {
+            "voix" : len(self.voix), "occupees" : sum(voix.get_busy() for voix in self.voix),
+            "max_occupees" : self.max_occupees, "jouees" : self.jouees, 
+            "volees" : self.volees, "refusees" : self.refusees
+        }
+
+
+def interpoler(points:Sequence[Tuple[float, float]], x:float) -> float:
+    """
+    Interpolation linéaire d'une courbe donnée par ses points (x, y), 
+    triés par x. En dehors, la courbe est prolongée par le premier ou le 
+    dernier y.
+    """
+    if x <= points[0][0]:
+        return points[0][1]
+    for (x0, y0), (x1, y1) in zip(points, points[1:]):
+        if x <= x1:
+            return y0 + (y1 - y0) * (x - x0) / (x1 - x0) if x1 != x0 else y1
+    return points[-1][1]
+
+
+class Transition:
+    """
+    Transition entre deux salles, décrite par des données :
+    - courbe : l'opacité (de 0 à 1) en fonction de l'avancement (de 0 à 1)
+    - effet : "fondu" (tout l'ecran s'assombrit) ou "volet" (un rideau 
+      glisse depuis la gauche, sa largeur suit la courbe)
+    - tremblement : l'amplitude (en pixels) du tremblement de l'ecran, en
+      fonction de l'avancement
+    - vitesse : avancement par frame à 60 FPS
+    
+    Les courbes sont des fonctions, ou des listes de points (x, y) reliés
+    par des segments (voir interpoler). Elles ne sont calculées qu'une fois,
+    dans des tables de resolution valeurs indexées par l'avancement arrondi.
+
+    La surface du voile est créée une fois pour toutes : pendant la 
+    transition, on ne fait que changer sa transparence ou sa position.
+    """
+    def __init__(self, courbe, effet:str = "fondu", tremblement = 5, vitesse:float = 0.01, couleur:Tuple[int, int, int] = (0, 0, 0), taille:Tuple[int, int] = (1280, 720), resolution:int = 256):
+        self.effet = effet
+        self.vitesse = vitesse
+        self.taille = taille
+        self.resolution = resolution
+        self.opacites = self.tabuler(courbe)
+        self.alphas = [round(opacite * 255) for opacite in self.opacites]
+        self.amplitudes = [round(amplitude) for amplitude in self.tabuler(tremblement)]
+        self.surface = pygame.Surface(taille)
+        self.surface.fill(couleur)
+
+    def tabuler(self, courbe):
+        if isinstance(courbe, (int, float)):
+            return [courbe] * self.resolution
+        if not callable(courbe):
+            points = sorted(courbe)
+            courbe = lambda x: interpoler(points, x)
+        return [courbe(i / (self.resolution - 1)) for i in range(self.resolution)]
+
+    def indice(self, avancement:float) -> int:
+        return int(avancement * (self.resolution - 1) + 0.5)
+
+    def amplitude(self, avancement:float) -> int:
+        return self.amplitudes[self.indice(avancement)]
+
+    def afficher(self, jeu, avancement:float):
+        """
+        Demande le dessin du voile, par dessus tout le reste.
+        """
+        i = self.indice(avancement)
+        if self.effet == "volet":
+            largeur = self.taille[0]
+            jeu.dessiner(self.surface, (round(self.opacites[i] * largeur) - largeur, 0), Z_TRANSITION)
+        else:
+            self.surface.set_alpha(self.alphas[i])
+            jeu.dessiner(self.surface, (0, 0), Z_TRANSITION)
+
+
+class Camera:
+    """
+    Vue sur le monde d'une salle : un rectangle de la taille de l'ecran, 
+    dont le coin (x, y) peut se déplacer dans le monde (voir suivre), pour
+    des niveaux plus grands que l'ecran.
+
+    Les entitées dessinent en coordonnées du monde (Jeu.dessiner_monde), 
+    la caméra les ramène à l'ecran. Celles dont le rectangle sort de la vue
+    (agrandie de marge_dessin, qui doit dépasser le déplacement d'une 
+    entitée en un pas à cause de l'interpolation) ne sont pas dessinées. Avec marge_actualisation, les entitées dont la position est
+    à plus de cette distance de la vue n'ont plus qu'une actualisation 
+    réduite (voir Entitee.actualiser_loin).
+
+    dessinees, ecartees et loin comptent les entitées dessinées, écartées 
+    du dessin et actualisées sommairement à la dernière frame.
+    """
+    def __init__(self, taille:Tuple[int, int] = (1280, 720), monde:pygame.Rect = None, marge_dessin:int = 128, marge_actualisation:int = None):
+        self.largeur, self.hauteur = taille
+        # Le monde est par défaut de la taille de l'ecran
+        self.monde = pygame.Rect(0, 0, *taille) if monde is None else monde
+        self.marge_dessin = marge_dessin
+        self.marge_actualisation = marge_actualisation
+        self.x = self.monde.x
+        self.y = self.monde.y
+        self.dessinees = 0
+        self.ecartees = 0
+        self.loin = 0
+
+    def suivre(self, x:float, y:float):
+        """
+        Centre la vue sur un point du monde, sans jamais en sortir.
+        """
+        monde = self.monde
+        self.x = round(max(monde.left, min(x - self.largeur / 2, monde.right - self.largeur)))
+        self.y = round(max(monde.top, min(y - self.hauteur / 2, monde.bottom - self.hauteur)))
+
+    def vers_ecran(self, x:float, y:float) -> Tuple[float, float]:
+        return x - self.x, y - self.y
+
+    def vers_monde(self, x:float, y:float) -> Tuple[float, float]:
+        """
+        Position dans le monde d'un point de l'ecran (la souris par exemple).
+        """
+        return x + self.x, y + self.y
+
+    def vue(self) -> pygame.Rect:
+        return pygame.Rect(self.x, self.y, self.largeur, self.hauteur)
+
+    def zone_dessin(self) -> pygame.Rect:
+        return self.vue().inflate(2 * self.marge_dessin, 2 * self.marge_dessin)
+
+    def zone_actualisation(self) -> pygame.Rect:
+        """
+        Zone (dans le monde) où les entitées sont actualisées entièrement, 
+        None si elles le sont toutes.
+        """
+        if self.marge_actualisation is None:
+            return None
+        return self.vue().inflate(2 * self.marge_actualisation, 2 * self.marge_actualisation)
+
+    def statistiques(self):
+        return {"dessinees" : self.dessinees, "ecartees" : self.ecartees, "loin" : self.loin}
+
+
+class Vagues:
+    """
+    Calendrier des apparitions d'ennemis, décrit par un fichier JSON (ou 
+    TOML) plutôt que tiré au hasard à chaque frame : le nombre d'ennemis 
+    dépend du temps écoulé et non plus des FPS, et on peut le régler.
+
+    Le fichier contient une liste "vagues", chaque vague étant décrite par :
+    - "classe" : le nom de la classe des objets à faire apparaitre
+    - "debut" : l'instant de la première apparition, en secondes
+    - "cadence" : le nombre d'apparitions par seconde (sans cadence, la 
+      vague n'apparait qu'une fois)
+    - "duree" : le temps pendant lequel la vague continue (sans fin par 
+      défaut)
+    - "rafale" : le nombre d'objets par apparition (1 par défaut), pour les 
+      essais de charge
+    - "aleatoire" : si vrai, les écarts entre apparitions (la première 
+      comprise) sont tirés au hasard, selon une loi exponentielle de 
+      moyenne 1 / cadence, au lieu d'être réguliers. C'est l'équivalent 
+      d'une chance fixe d'apparition à chaque instant, mais indépendant 
+      des FPS
+    - "apparitions" : les arguments possibles du constructeur (sans jeu), 
+      l'un d'eux est tiré au hasard à chaque objet
+    Les autres clés sont laissées au jeu (voir GestionnaireJeu).
+
+    Les prochaines apparitions de chaque vague sont rangées dans un tas 
+    (heapq), trié par instant : avancer() ne regarde que le haut du tas.
+
+    Les tirages des vagues aléatoires ne dépendent que de la graine des 
+    vagues : avec la même graine, recommencer reconstruit le même 
+    calendrier.
+    """
+    def __init__(self, vagues:List[dict]):
+        self.vagues = vagues
+        self.graine = None
+        # Vague aléatoire (son indice) -> son générateur et les instants 
+        # déjà tirés
+        self.tirages = {}
+        self.recommencer()
+
+    @classmethod
+    def charger(cls, chemin:str):
+        if chemin.endswith(".toml"):
+            if tomllib is None:
+                raise ValueError(f"Impossible de lire {chemin} : tomllib demande Python 3.11")
+            with open(chemin, "rb") as fichier:
+                donnees = tomllib.load(fichier)
+        else:
+            with open(chemin) as fichier:
+                donnees = json.load(fichier)
+        return cls(donnees["vagues"])
+
+    def instant(self, indice:int, numero:int) -> float:
+        """
+        Instant de l'apparition numero de la vague (None s'il n'y en a pas).
+        """
+        vague = self.vagues[indice]
+        cadence = vague.get("cadence")
+        if cadence is None:
+            return vague.get("debut", 0) if numero == 0 else None
+        if vague.get("aleatoire"):
+            instant = self.tirer(indice, numero)
+        else:
+            instant = vague.get("debut", 0) + numero / cadence
+        if instant >= vague.get("debut", 0) + vague.get("duree", math.inf):
+            return None
+        return instant
+
+    def tirer(self, indice:int, numero:int) -> float:
+        """
+        Instant de l'apparition numero d'une vague aléatoire : les écarts 
+        sont tirés dans l'ordre puis gardés.
+        """
+        tirage = self.tirages.get(indice)
+        if tirage is None:
+            tirage = self.tirages[indice] = (random.Random(f"{self.graine}-{indice}"), [])
+        generateur, instants = tirage
+        vague = self.vagues[indice]
+        while len(instants) <= numero:
+            precedent = instants[-1] if instants else vague.get("debut", 0)
+            instants.append(precedent + generateur.expovariate(vague["cadence"]))
+        return instants[numero]
+
+    def planifier(self, indice:int, numero:int):
+        instant = self.instant(indice, numero)
+        if instant is not None:
+            heapq.heappush(self.calendrier, (instant, indice, numero))
+
+    def recommencer(self, horloge:float = 0, graine:int = None):
+        """
+        Reprend le calendrier à l'instant horloge (0 pour tout recommencer) :
+        les apparitions passées sont considérées comme faites. graine est 
+        celle des vagues aléatoires : la même redonne les mêmes apparitions,
+        None en tire une nouvelle (avec le module random).
+        """
+        if graine is None:
+            graine = random.getrandbits(32)
+        if graine != self.graine:
+            self.graine = graine
+            self.tirages = {}
+        self.horloge = horloge
+        self.calendrier = []
+        for indice, vague in enumerate(self.vagues):
+            numero = 0
+            cadence = vague.get("cadence")
+            # Les apparitions régulières se comptent, les aléatoires sont
+            # parcourues depuis la première
+            if cadence is not None and horloge > vague.get("debut", 0) and not vague.get("aleatoire"):
+                numero = max(0, int((horloge - vague.get("debut", 0)) * cadence) - 1)
+            instant = self.instant(indice, numero)
+            while instant is not None and instant < horloge:
+                numero += 1
+                instant = self.instant(indice, numero)
+            self.planifier(indice, numero)
+
+    def avancer(self, duree:float) -> List[Tuple[dict, int]]:
+        """
+        Avance l'horloge de duree secondes, et renvoie les apparitions qui 
+        ont eu lieu : des couples (vague, nombre d'objets).
+        """
+        self.horloge += duree
+        apparitions = []
+        calendrier = self.calendrier
+        while calendrier and calendrier[0][0] < self.horloge:
+            _, indice, numero = heapq.heappop(calendrier)
+            vague = self.vagues[indice]
+            apparitions.append((vague, vague.get("rafale", 1)))
+            self.planifier(indice, numero + 1)
+        return apparitions
@@ -6,12 +6,17 @@ from moteur import *
 from typing import *
 
 SCORE = 0
+# Le score est sauvegardé avec les salles (voir Scene.sauvegarder)
+Scene.declarer_globale(__name__, "SCORE", "q")
 
 class Boutton(Objet):
     """
     Le boutton est un objet rectangulaire associé à une image qui peut 
     être cliqué pour effectuer des actions diverses.
     """
+    __slots__ = ("position", "taille_initiale", "taille", "texte", "zoom", "id")
+    FORMAT = Objet.FORMAT + "dddddd16sdi"
+
     def __init__(self, jeu, position:Tuple[int, int], taille:Tuple[int, int], id):
         super().__init__(jeu, z_pos=1)
         self.position = position
@@ -21,6 +26,18 @@ class Boutton(Objet):
         self.zoom = 0.5 
         self.id = id # L'id permet d'identifier les bouttons entre eux
         self.actualiser_rectangle()
+
+    def etat(self):
+        return super().etat() + (*self.position, *self.taille_initiale, *self.taille, self.texte.encode(), self.zoom, self.id)
+
+    def restaurer(self, jeu, valeurs):
+        i = super().restaurer(jeu, valeurs)
+        x, y, largeur_initiale, hauteur_initiale, largeur, hauteur, texte, self.zoom, self.id = valeurs[i : i + 9]
+        self.position = (x, y)
+        self.taille_initiale = (largeur_initiale, hauteur_initiale)
+        self.taille = (largeur, hauteur)
+        self.texte = texte.rstrip(b"\0").decode()
+        return i + 9
         
     def actualiser_rectangle(self):
         
@@ -78,35 +95,37 @@ class Boutton(Objet):
         # Logique individuelle de chaque boutton
         self.logiques_separees(scene)
         
-        # On verifie si la souris touche le boutton
-        if self.rectangle.collidepoint(pygame.mouse.get_pos()):
+        # On verifie si la souris touche le boutton (seulement si le menu 
+        # est affiché)
+        if self.au_premier_plan() and self.rectangle.collidepoint(self.jeu.position_souris):
             self.jeu.souris_sur_boutton = True
             # Si en plus on clique ...
-            if pygame.mouse.get_pressed()[0]:
+            if self.jeu.boutons_souris[0]:
                 # On apelle la méthode designée à l'action du boutton
                 self.click(scene) 
             
         self.actualiser_rectangle()
-        self.dessiner()
         self.animation()
 
     def animation(self):
         """
         Gère l'animation du boutton qui grandit ou se recracte selon s'il touche la souris
         """
-        if self.rectangle.collidepoint(pygame.mouse.get_pos()):
+        if self.rectangle.collidepoint(self.jeu.position_souris):
             # Incrémentation limitée à 0.8
-            self.zoom = min(self.zoom + 0.01 * self.jeu.dt, 0.8)
+            self.zoom = min(self.zoom + 0.01 * self.scene.dt, 0.8)
         else:
             # Décrémentation limitée à 0.7
-            self.zoom = max(self.zoom - 0.01 * self.jeu.dt, 0.7)
+            self.zoom = max(self.zoom - 0.01 * self.scene.dt, 0.7)
             
     def dessiner(self):
         self.jeu.dessiner(
             # On prends bien soin de redimensionner l'image en fonction de la taille du boutton
-            pygame.transform.scale(self.jeu.images["boutton"], self.taille), 
+            # (le jeu garde en cache les images redimensionnées)
+            self.jeu.variante(self.jeu.images["boutton"], self.taille), 
             # On l'affiche au coin supérieur droit du boutton
-            self.rectangle.topleft
+            self.rectangle.topleft,
+            self.z_pos
         )
         
         # Dessin du texte
@@ -114,9 +133,9 @@ class Boutton(Objet):
         # On génère le texte
         texte = self.jeu.generer_texte(self.texte, "arial", 80, gras=True)
         # On l'adapte à la taille du boutton 
-        texte = pygame.transform.scale(texte, self.taille)
+        texte = self.jeu.variante(texte, self.taille)
         # Enfin, on le dessine
-        self.jeu.dessiner(texte, self.rectangle.topleft)
+        self.jeu.dessiner(texte, self.rectangle.topleft, self.z_pos)
     
     def logiques_separees(self, scene):
         # Gère le texte de chaque boutton
@@ -129,6 +148,7 @@ class Boutton(Objet):
             
     def click(self, scene):
         if self.jeu.horloge_transition == -1:
+            # Les sons de l'interface passent avant les lasers
             self.jeu.jouer_son("menu_click", 1)
             if self.id == 0: 
                 # Transite vers la salle nommée "jeu"
@@ -146,51 +166,154 @@ salle, ils permettent d'effectuer des actions ciblées sur chaque
 salle.
 """
 class GestionnaireMenu(Objet):
+    __slots__ = ()
+
     def __init__(self, jeu):
         super().__init__(jeu)
-        
-    def actualiser(self, scene):
-        # Affichage du fond d'ecran
-        self.jeu.dessiner(self.jeu.images["fond_menu"], (0, 0))
+        # PS : la musique du menu est lancée quand on y entre (voir 
+        # Jeu.musique_salle)
+
+    def dessiner(self):
+        # Affichage du fond d'ecran (qui ne bouge pas)
+        self.jeu.dessiner_fond(self.jeu.images["fond_menu"], (0, 0))
         # Dessin du logo
         # PS : l'utilisation d'une fonction sinusoidale du temps donne l'effet de va et viens du logo
-        self.jeu.dessiner(self.jeu.images["logo"], (-200, -110 + math.sin(time.time() * 2) * 40))
-        # Musique du menu
-        if not pygame.mixer.Channel(0).get_busy():
-            self.jeu.jouer_son("menu", 0)
+        self.jeu.dessiner(self.jeu.images["logo"], (-200, -110 + math.sin(self.jeu.temps * 2) * 40), self.z_pos)
 
 class GestionnaireJeu(Objet):
+    """
+    Fait apparaitre les ennemis selon le calendrier des vagues du jeu (voir
+    Vagues dans moteur.py). Chaque ennemi donne aussi au joueur le "mana" 
+    de sa vague (1 par défaut).
+
+    Dans les apparitions des vagues, x peut valoir "gauche" ou "droite" : 
+    l'ennemi apparait alors juste en dehors de ce bord du monde (voir 
+    Jeu.largeur_monde), à ECART_APPARITION pixels.
+
+    C'est aussi lui qui tient le score et termine la partie, à la réception
+    des evenements "touche" de la frame (voir Scene.publier), et l'affichage
+    du score et du mana n'est refait que quand ils changent.
+    """
+    __slots__ = ("vagues", "texte_score", "texte_balles")
+    # Etat binaire : en plus, l'horloge et la graine des vagues
+    FORMAT = Objet.FORMAT + "dI"
+    ECART_APPARITION = 200
+    abonnements = {"touche" : "toucher", "score" : "nouveau_score", "mana" : "nouveau_mana"}
+
     def __init__(self, jeu):
         super().__init__(jeu)
+        self.ajouter_etiquette("gestionnaire_jeu")
+        self.vagues = jeu.vagues
+        # Textes de l'interface, refaits au prochain dessin quand ils valent None
+        self.texte_score = None
+        self.texte_balles = None
+
+    def etat(self):
+        return super().etat() + (self.vagues.horloge, self.vagues.graine)
+
+    def restaurer(self, jeu, valeurs):
+        i = super().restaurer(jeu, valeurs)
+        self.vagues = jeu.vagues
+        self.vagues.recommencer(valeurs[i], valeurs[i + 1])
+        self.texte_score = None
+        self.texte_balles = None
+        return i + 2
         
     def actualiser(self, scene):
-        self.jeu.dessiner(self.jeu.images["fond_menu"], (0, 0))
-        self.jeu.dessiner(self.jeu.images["sol"], (0, 0))
-        try:
-            debut = True
-            joueur = scene.filtrer("joueur")[0]
-        except:
-            debut = False
-        # Musique du jeu
-        if not pygame.mixer.Channel(0).get_busy():
-            self.jeu.jouer_son("jeu", 0)
-        if random.randint(1, 300) == 3 and debut:
-            joueur.balles += 1
-            if random.randint(1, 2) == 1:
-                scene.lier(Ennemi1(self.jeu, (-200, 300), "droite"))
-            else:
-                scene.lier(Ennemi1(self.jeu, (2000, 300), "gauche"))
-        if debut:
-            texte_score = self.jeu.generer_texte("SCORE | " + str(SCORE), "arial", 60, True, fond=(255, 255, 255))
-            self.jeu.dessiner(texte_score, (30, 10))
-            texte_balles = self.jeu.generer_texte("MANA | " + str(joueur.balles), "arial", 60, True, fond=(255, 255, 255))
-            self.jeu.dessiner(texte_balles, (950, 10)) 
+        joueur = scene.trouver("joueur", self.salle)
+        if joueur is not None:
+            # La caméra suit le joueur (si le monde est plus grand que l'ecran)
+            camera = scene.cameras.get(self.salle)
+            if camera is not None:
+                camera.suivre(joueur.x, joueur.y)
+            mana = joueur.balles
+            # Le delta time est en 60èmes de seconde
+            for vague, nombre in self.vagues.avancer(scene.dt / 60):
+                classe = Objet.classes[vague["classe"]]
+                for _ in range(nombre):
+                    joueur.balles += vague.get("mana", 1)
+                    # Les ennemis sont recyclés par la scène (voir Scene.creer)
+                    position, *arguments = random.choice(vague["apparitions"])
+                    scene.lier(scene.creer(classe, self.jeu, self.position_apparition(position), *arguments), self.salle)
+            if joueur.balles != mana:
+                scene.publier("mana", joueur.balles)
+
+    def position_apparition(self, position):
+        x, y = position
+        if x == "gauche":
+            x = -self.ECART_APPARITION
+        elif x == "droite":
+            x = self.jeu.largeur_monde + self.ECART_APPARITION
+        return x, y
+
+    def toucher(self, lot):
+        """
+        Une boule qui touche un ennemi rapporte un point, un ennemi qui 
+        touche le joueur termine la partie.
+        """
+        global SCORE
+        points = 0
+        for cible, auteur in lot:
+            if cible.a_etiquette("joueur"):
+                self.perdre(cible)
+                return
+            points += 1
+        if points:
+            SCORE += points
+            self.scene.publier("score", SCORE)
+
+    def perdre(self, joueur):
+        """
+        On retourne au menu, et tout est remis à zéro pour la prochaine 
+        partie (ou on recommence tout de suite, si une sauvegarde existe).
+        """
+        global SCORE
+        if self.jeu.reessai_instantane and self.jeu.sauvegarde_jeu is not None:
+            self.jeu.reessai_demande = True
+            return
+        self.jeu.lancer_transition("menu")
+        self.jeu.jouer_musique("menu")
+        joueur.balles = 2
+        SCORE = 0
+        for objet in self.scene.filtrer("ennemi1", self.salle):
+            objet.tuer()
+        # Et les vagues reprennent depuis le début, avec de nouveaux tirages
+        self.vagues.recommencer()
+        self.scene.publier("score", SCORE)
+        self.scene.publier("mana", joueur.balles)
+
+    def nouveau_score(self, lot):
+        self.texte_score = None
+
+    def nouveau_mana(self, lot):
+        self.texte_balles = None
+
+    def dessiner(self):
+        self.jeu.dessiner_fond(self.jeu.images["fond_menu"], (0, 0))
+        self.jeu.dessiner_fond(self.jeu.images["sol"], (0, 0))
+        joueur = self.scene.trouver("joueur")
+        if joueur is not None:
+            if self.texte_score is None:
+                self.texte_score = self.jeu.generer_texte("SCORE | " + str(SCORE), "arial", 60, True, fond=(255, 255, 255))
+            if self.texte_balles is None:
+                self.texte_balles = self.jeu.generer_texte("MANA | " + str(joueur.balles), "arial", 60, True, fond=(255, 255, 255))
+            # Le score et le mana passent au dessus de tout le reste
+            self.jeu.dessiner(self.texte_score, (30, 10), Z_INTERFACE)
+            self.jeu.dessiner(self.texte_balles, (950, 10), Z_INTERFACE) 
         
 class Joueur(Entitee):
     """ 
     Le Joueur est bel et bien une entitée car affecté par la 
     physique.
     """ 
+    __slots__ = ("direction", "touche_sol", "touche_sol_", "balles")
+    FORMAT = Entitee.FORMAT + "6s??i"
+    # Position de l'image par rapport à celle du joueur
+    DECALAGE = (-72, -350)
+    # Vitesses verticales données par un saut et par un petit rebond
+    SAUT = 30
+    REBOND = 10
+
     def __init__(self, jeu, position):
         super().__init__(jeu, position)
         self.z_pos = 3
@@ -203,29 +326,72 @@ class Joueur(Entitee):
         self.touche_sol = False
         self.touche_sol_ = False
         self.balles = 2
+        # Hauteur du sol pour le joueur
+        self.sol = 550
+
+    def etat(self):
+        return super().etat() + (self.direction.encode(), self.touche_sol, self.touche_sol_, self.balles)
+
+    def restaurer(self, jeu, valeurs):
+        i = super().restaurer(jeu, valeurs)
+        direction, self.touche_sol, self.touche_sol_, self.balles = valeurs[i : i + 4]
+        self.direction = direction.rstrip(b"\0").decode()
+        # Le rectangle est déjà restauré, il ne manque que la silhouette
+        if self.rectangle is not None:
+            self.silhouette = self.choisir_silhouette()
+        return i + 4
+
+    def choisir_silhouette(self):
+        return self.jeu.silhouettes["joueur"][self.direction == "gauche", False]
+
+    def actualiser_rectangle(self):
+        # Les collisions suivent l'image dessinée (voir dessiner)
+        self.prendre_silhouette(self.choisir_silhouette(), self.DECALAGE)
     
     def actualiser(self, scene):
         super().actualiser(scene)
-        self.logique_verticale()
-        self.controles()
-        self.dessiner()
-        self.logique_attaque(scene)
+        # En arrière plan, le joueur n'est plus contrôlé et la partie ne 
+        # peut pas se terminer
+        premier_plan = self.au_premier_plan()
+        if premier_plan:
+            self.logique_verticale()
+            self.controles()
+            self.logique_attaque(scene)
         self.ajouter_etiquette("joueur")
-        self.rectangle = pygame.Rect(self.x, self.y, 50, 50)
+        self.actualiser_rectangle()
+        if premier_plan:
+            self.verif_ennemis(scene)
+        
+    def verif_ennemis(self, scene):
+        """
+        Si un ennemi touche le joueur, la partie est perdue (voir 
+        GestionnaireJeu.toucher). La grille de la scène ne nous donne que 
+        les ennemis proches.
+        """
+        for ennemi in scene.grilles[self.salle].candidats(self.rectangle, "ennemi1"):
+            if self.touche(ennemi):
+                scene.publier("touche", self, ennemi)
+                return
         
     def logique_attaque(self, scene):
         if self.jeu.souris_pressee and self.balles > 0:
             # On récupère la position de la souris
-            x, y = pygame.mouse.get_pos()
+            x, y = self.jeu.position_souris
+            # La souris est à l'ecran, le joueur dans le monde
+            camera = scene.cameras.get(self.salle)
+            if camera is not None:
+                x, y = camera.vers_monde(x, y)
             # On calcule l'angle à l'horizontale du vecteur entre la position
             # de la souris et celle du joueur
             angle = math.atan2(x - self.x, y - self.y)
             # On récupère le cosinus et sinus de l'angle
             cos, sin = math.cos(angle), math.sin(angle)
             # On injecte ces valeurs dans le code de la boule
-            scene.lier(Boule(self.jeu, (self.x - 50, self.y - 70),  (cos, sin)), "jeu")
-            self.jeu.jouer_son("laser", random.randint(10, 1000))
+            # (les boules mortes sont recyclées par la scène)
+            scene.lier(scene.creer(Boule, self.jeu, (self.x - 50, self.y - 70),  (cos, sin)), self.salle)
+            self.jeu.jouer_son("laser")
             self.balles -= 1
+            scene.publier("mana", self.balles)
         
     def controles(self):
         """  
@@ -236,47 +402,46 @@ class Joueur(Entitee):
             self.dx = -10
             self.direction = "gauche"
         # Déplacement vers la droite
-        if self.jeu.touches[pygame.K_d] and self.x < 1230:
+        if self.jeu.touches[pygame.K_d] and self.x < self.jeu.largeur_monde - 50:
             self.dx = 10
             self.direction = "droite"
         # Si aucune touche n'est préssée
         if not (self.jeu.touches[pygame.K_RIGHT] or self.jeu.touches[pygame.K_LEFT]):
             # On freine le joueur
-            self.dx *= 0.8 ** self.jeu.dt
+            self.dx *= 0.8 ** self.scene.dt
         # Logique des rebons
         if self.touche_sol_ and (self.jeu.touches[pygame.K_q] or self.jeu.touches[pygame.K_d]):
             # Qui sont des petits sauts
-            self.dy = -10
+            self.dy = -self.REBOND
             self.touche_sol_ = False
     
     def logique_verticale(self):
-        # Gravité
-        self.dy += 1.2 * self.jeu.dt
+        # La gravité et l'arrêt au sol sont gérés par la physique des entitées
         # Si on tombe en dessous du sol
-        if self.y > 550:
-            # On annule notre vitesse vertivale
-            self.dy = 0
-            # Et on indique dans une variable que le sol a été touché
+        if self.au_sol:
+            # On indique dans une variable que le sol a été touché
             self.touche_sol = True
             self.touche_sol_ = True
         # Si on touche le sol et qu'on appuye sur espace
         if self.touche_sol and (self.jeu.touches[pygame.K_SPACE] or self.jeu.touches[pygame.K_z]):
             # On saute
-            self.dy = -30
+            self.dy = -self.SAUT
             # Et le sol n'est plus touché
             self.touche_sol = False
             
     def dessiner(self):
         # On récup_re l'image du joueur
-        image = self.jeu.images["joueur"]
-        # Elle est ensuite inversée selon la direction de celui-ci
-        if self.direction == "gauche":
-            image = pygame.transform.flip(image, True, False)
-        # Enfin on la dessine
-        self.jeu.dessiner(
+        # Elle est inversée selon la direction de celui-ci (les deux versions
+        # sont gardées en cache par le jeu)
+        image = self.jeu.variante(self.jeu.images["joueur"], retourner_x=self.direction == "gauche")
+        # Position interpolée entre deux pas de simulation
+        x, y = self.position_affichee()
+        # Enfin on la dessine (dans le monde, voir Camera)
+        self.jeu.dessiner_monde(
             image, 
             # Avec des décalages, pour l'image epouse la position du joueur
-            (self.x - 72, self.y - 350)
+            (x + self.DECALAGE[0], y + self.DECALAGE[1]),
+            self.z_pos
         )
         
 class Ennemi1(Entitee):
@@ -284,8 +449,22 @@ class Ennemi1(Entitee):
     La logique du premier ennemi est quasiment la même que celle du joueur.
     Seul les controles et quelque details sont différents.
     """ 
+    __slots__ = ("direction", "touche_sol", "touche_sol_", "mort")
+    FORMAT = Entitee.FORMAT + "6s???"
+    DECALAGE = (-72, -350)
+    SAUT = 20
+    REBOND = 10
+
     def __init__(self, jeu, position, direction):
         super().__init__(jeu, position)
+        self.apparaitre(direction)
+
+    def reinitialiser(self, jeu, position, direction):
+        # Un ennemi recyclé garde son rectangle (voir Entitee.reinitialiser)
+        super().reinitialiser(jeu, position)
+        self.apparaitre(direction)
+
+    def apparaitre(self, direction):
         self.direction = direction
         self.ajouter_etiquette("ennemi1")
         if self.direction == "gauche":
@@ -295,64 +474,84 @@ class Ennemi1(Entitee):
         self.touche_sol = False
         self.touche_sol_ = False
         self.mort = False
+        # Les ennemis marchent plus bas que le joueur
+        self.sol = 695
+        # On tue les ennemis trop eloignés de la carte
+        self.limites = (-1000, self.jeu.largeur_monde + 1000, 2000)
+        self.actualiser_rectangle()
+
+    def etat(self):
+        return super().etat() + (self.direction.encode(), self.touche_sol, self.touche_sol_, self.mort)
+
+    def restaurer(self, jeu, valeurs):
+        i = super().restaurer(jeu, valeurs)
+        direction, self.touche_sol, self.touche_sol_, self.mort = valeurs[i : i + 4]
+        self.direction = direction.rstrip(b"\0").decode()
+        # Le rectangle est déjà restauré, il ne manque que la silhouette
+        self.silhouette = self.choisir_silhouette()
+        return i + 4
+
+    def choisir_silhouette(self):
+        # Un ennemi mort est dessiné à l'envers, sa silhouette aussi
+        return self.jeu.silhouettes["ennemi1"][self.direction == "gauche", self.mort]
+
+    def actualiser_rectangle(self):
+        # Le rectangle est mis à jour sur place plutôt que recréé
+        self.prendre_silhouette(self.choisir_silhouette(), self.DECALAGE)
     
     def actualiser(self, scene):
-        global SCORE
         super().actualiser(scene)
-        joueur = scene.filtrer("joueur")[0]
-        self.rectangle = pygame.Rect(self.x - 50, self.y - 280, 100, 200)
+        self.actualiser_rectangle()
         self.logique_verticale()
         self.ia()
-        self.dessiner()
         self.verif_touche(scene)
-        if self.rectangle.colliderect(joueur.rectangle):
-            self.jeu.lancer_transition("menu")
-            self.jeu.jouer_son("menu", 0)
-            joueur.balles = 2
-            SCORE = 0
-            for objet in scene.salles[scene.salle_actuelle]:
-                if "ennemi1" in objet.etiquettes:
-                    objet.tuer()
-                    
+        # PS : la collision avec le joueur est gérée par le joueur lui même
+
+    def actualiser_loin(self, scene):
+        # Loin de l'ecran, l'ennemi ne fait qu'avancer : ni sauts, ni 
+        # collisions (voir Camera)
+        Entitee.actualiser(self, scene)
+        self.actualiser_rectangle()
         
     def ia(self):
         # Comme le joueur, l'ennemi effectue des petits sauts en continu
         if self.touche_sol_:
-            self.dy = -10
+            self.dy = -self.REBOND
             self.touche_sol_ = False
-        # On tue les ennemis trop eloignés de la carte
-        if self.x > 3000 or self.x < -1000 or self.y > 2000:
-            self.tuer()
+        # PS : les ennemis trop eloignés de la carte sont tués grâce à 
+        # self.limites, par la physique des entitées
             
     def verif_touche(self, scene):
-        global SCORE
-        boules = scene.filtrer("boule")
+        # On ne teste que les boules proches de l'ennemi
+        boules = scene.grilles[self.salle].candidats(self.rectangle, "boule")
         for balle in boules:
-            if balle.rectangle.colliderect(self.rectangle):
+            if self.touche(balle):
                 self.mort = True
+                # Un ennemi mort traverse le sol
+                self.definir_sol(None)
                 balle.tuer()
-                SCORE += 1
+                # Le point est compté par GestionnaireJeu
+                scene.publier("touche", self, balle)
                 
     
     def logique_verticale(self):
-        self.dy += 1.2 * self.jeu.dt
         if not self.mort:
-            if self.y > 695:
-                self.dy = 0
+            if self.au_sol:
                 self.touche_sol = True
                 self.touche_sol_ = True
             if self.touche_sol and random.randint(1, 100) == 5:
-                self.dy = -20
+                self.dy = -self.SAUT
                 self.touche_sol = False
         else:
             self.dx = 0
             
     def dessiner(self):
-        image = self.jeu.images["ennemi1"]
-        image = pygame.transform.flip(image, self.direction == "gauche", self.mort)
-        self.jeu.dessiner(
+        image = self.jeu.variante(self.jeu.images["ennemi1"], retourner_x=self.direction == "gauche", retourner_y=self.mort)
+        x, y = self.position_affichee()
+        self.jeu.dessiner_monde(
             image, 
-            (self.x - 72, self.y - 350)
+            (x + self.DECALAGE[0], y + self.DECALAGE[1]),
+            self.z_pos
         )
         
 class Boule(Entitee):
@@ -376,25 +575,39 @@ class Boule(Entitee):
     Etant constante, on a juste a ajuster la vitesse de notre boule pour lui appliquer
     la gravité et la trajectoire voulue en suivra.
     """ 
+    __slots__ = ()
+    # On coeficiente plus fort la vitesse horizontale pour créer 
+    # un gameplay plus horizontal, ce qui est cohérent avec notre jeu
+    VITESSE = (40, 30)
+
     def __init__(self, jeu, position, trigo):
         super().__init__(jeu, position)
-        # On coeficiente plus fort la vitesse horizontale pour créer 
-        # un gameplay plus horizontal, ce qui est cohérent avec notre jeu
-        self.dx = 40 * trigo[1] 
-        self.dy = 30 * trigo[0]
+        self.lancer(trigo)
+
+    def reinitialiser(self, jeu, position, trigo):
+        # Une boule recyclée garde son rectangle (voir Entitee.reinitialiser)
+        super().reinitialiser(jeu, position)
+        self.lancer(trigo)
+
+    def lancer(self, trigo):
+        self.dx = self.VITESSE[0] * trigo[1] 
+        self.dy = self.VITESSE[1] * trigo[0]
         self.ajouter_etiquette("boule")
-        self.rectangle = pygame.Rect(self.x + 15, self.y + 7, 100, 100)
+        # L'image de la boule est dessinée à sa position
+        self.prendre_silhouette(self.jeu.silhouettes["boule"][False, False])
+        # La boule meurt une fois tombée assez bas
+        self.limites = (-math.inf, math.inf, 2000)
     
     def actualiser(self, scene):
+        # La gravité est appliquée par la physique des entitées
         super().actualiser(scene)
-        self.appliquer_gravite()
-        self.rectangle = pygame.Rect(self.x + 15, self.y + 7, 100, 100)
-        self.dessiner()
-        if self.y > 2000:
-            self.tuer()
-        
-    def appliquer_gravite(self):
-        self.dy += 1.2 * self.jeu.dt
+        # Le rectangle est mis à jour sur place plutôt que recréé
+        self.prendre_silhouette(self.silhouette)
+
+    def restaurer(self, jeu, valeurs):
+        i = super().restaurer(jeu, valeurs)
+        self.silhouette = jeu.silhouettes["boule"][False, False]
+        return i
     
     def dessiner(self):
-        self.jeu.dessiner(self.jeu.images["boule"], (self.x, self.y))
+        self.jeu.dessiner_monde(self.jeu.images["boule"], self.position_affichee(), self.z_pos)